@@ -4,6 +4,7 @@ from time import time
 import typing
 
 from homeassistant import const as hac
+from homeassistant.config_entries import SOURCE_INTEGRATION_DISCOVERY
 from homeassistant.core import HomeAssistant, SupportsResponse, callback
 from homeassistant.exceptions import (
     ConfigEntryError,
@@ -20,7 +21,9 @@ from .helpers import (
     Loggable,
     async_import_module,
 )
+from .helpers.discovery import BulkDiscovery
 from .helpers.manager import ApiProfile, ConfigEntryManager
+from .helpers.scheduler import PollingScheduler
 from .meross_device import MerossDevice
 from .meross_profile import MerossCloudProfile, MerossCloudProfileStore, MQTTConnection
 from .merossclient import (
@@ -28,6 +31,7 @@ from .merossclient import (
     HostAddress,
     MerossAckReply,
     MerossDeviceDescriptor,
+    MerossProtocolError,
     MerossPushReply,
     MerossRequest,
     cloudapi,
@@ -316,6 +320,8 @@ class MerossApi(ApiProfile):
     """
 
     __slots__ = (
+        "polling_scheduler",
+        "discovery",
         "_deviceclasses",
         "_mqtt_connection",
     )
@@ -344,6 +350,8 @@ class MerossApi(ApiProfile):
 
     def __init__(self, hass: HomeAssistant):
         super().__init__(mlc.CONF_PROFILE_ID_LOCAL, None)
+        self.polling_scheduler = PollingScheduler(hass.loop)
+        self.discovery = BulkDiscovery(self)
         self._deviceclasses: dict[str, type] = {}
         self._mqtt_connection: HAMQTTConnection | None = None
 
@@ -465,6 +473,77 @@ class MerossApi(ApiProfile):
             _async_service_request,
             supports_response=SupportsResponse.OPTIONAL,
         )
+
+        async def _async_service_discover(
+            service_call: "ServiceCall",
+        ) -> "ServiceResponse":
+            # hosts (or subnets) and uuids are free text lists
+            hosts = service_call.data.get(mlc.CONF_HOST, "").replace(",", " ").split()
+            device_ids = (
+                service_call.data.get(mlc.CONF_DEVICE_ID, "").replace(",", " ").split()
+            )
+            if not device_ids and not hosts:
+                raise HomeAssistantError(
+                    "Missing both device_id and host: provide at least one valid entry"
+                )
+            if key := service_call.data.get(mlc.CONF_KEY):
+                keys = [key]
+            else:
+                keys = []
+                for profile in (*self.active_profiles(), self):
+                    if (key := profile.key) and (key not in keys):
+                        keys.append(key)
+                keys = keys or [""]
+            try:
+                results = await self.discovery.async_discover(hosts, device_ids, keys)
+            except Exception as exception:
+                raise HomeAssistantError(str(exception)) from exception
+
+            devices = {}
+            errors = {}
+            unreachable = 0
+            config_entries_helper = ConfigEntriesHelper(hass)
+            for target, result in results.items():
+                if isinstance(result, BaseException):
+                    if isinstance(result, MerossProtocolError):
+                        errors[target] = f"{result.__class__.__name__}({str(result)})"
+                    else:
+                        unreachable += 1
+                    continue
+                device_id = result[mlc.CONF_DEVICE_ID]
+                # ApiProfile.devices might carry stale (None) keys for entries
+                # already removed: the config entries are the reference here
+                if config_entries_helper.get_config_entry(
+                    device_id
+                ) or config_entries_helper.get_config_flow(device_id):
+                    status = "configured"
+                else:
+                    # the flow has all it needs so it will reach the final step
+                    await hass.config_entries.flow.async_init(
+                        mlc.DOMAIN,
+                        context={"source": SOURCE_INTEGRATION_DISCOVERY},
+                        data=result,
+                    )
+                    status = "discovered"
+                devices[device_id] = {
+                    mlc.CONF_HOST: result.get(mlc.CONF_HOST),
+                    "type": MerossDeviceDescriptor(
+                        result[mlc.CONF_PAYLOAD]
+                    ).productnametype,
+                    "status": status,
+                }
+            return {
+                "devices": devices,
+                "errors": errors,
+                "unreachable": unreachable,
+            }
+
+        hass.services.async_register(
+            mlc.DOMAIN,
+            mlc.SERVICE_DISCOVER,
+            _async_service_discover,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
         return
 
     # interface: ConfigEntryManager
@@ -494,10 +573,14 @@ class MerossApi(ApiProfile):
     async def async_terminate(self):
         """complete shutdown when HA exits. See self.async_shutdown for differences"""
         self.hass.services.async_remove(mlc.DOMAIN, mlc.SERVICE_REQUEST)
+        self.hass.services.async_remove(mlc.DOMAIN, mlc.SERVICE_DISCOVER)
+        self.discovery.cache.clear()
+        MerossDevice.RESPONSE_SIZE_MAX_MODELS.clear()
         for device in MerossApi.active_devices():
             await device.async_shutdown()
         for profile in MerossApi.active_profiles():
             await profile.async_shutdown()
+        self.polling_scheduler.shutdown()
         await super().async_shutdown()
         await MerossHttpClient.async_shutdown_session()
         self._mqtt_connection = None
@@ -531,41 +614,42 @@ class MerossApi(ApiProfile):
                 "in the integration configuration page"
             )
 
-        ability = descriptor.ability
-        digest = descriptor.digest
-
-        mixin_classes = []
-
-        for key_digest in digest:
-            if key_digest not in MIXIN_DIGEST_INIT:
-                continue
-            _mixin_or_descriptor = MIXIN_DIGEST_INIT[key_digest]
-            if isinstance(_mixin_or_descriptor, tuple):
-                with self.exception_warning(
-                    "initializing digest(%s) mixin", key_digest
-                ):
-                    _mixin_or_descriptor = getattr(
-                        await async_import_module(_mixin_or_descriptor[0]),
-                        _mixin_or_descriptor[1],
-                    )
-                    MIXIN_DIGEST_INIT[key_digest] = _mixin_or_descriptor
+        # the init plan is shared among devices with the same abilities/digest
+        # so that the device class is only resolved once too
+        init_plan = await MerossDevice.async_get_init_plan(descriptor, self)
+        if not (class_type := init_plan.device_class):
+            mixin_classes = []
+            for key_digest in descriptor.digest:
+                if key_digest not in MIXIN_DIGEST_INIT:
+                    continue
+                _mixin_or_descriptor = MIXIN_DIGEST_INIT[key_digest]
+                if isinstance(_mixin_or_descriptor, tuple):
+                    with self.exception_warning(
+                        "initializing digest(%s) mixin", key_digest
+                    ):
+                        _mixin_or_descriptor = getattr(
+                            await async_import_module(_mixin_or_descriptor[0]),
+                            _mixin_or_descriptor[1],
+                        )
+                        MIXIN_DIGEST_INIT[key_digest] = _mixin_or_descriptor
+                        mixin_classes.append(_mixin_or_descriptor)
+                else:
                     mixin_classes.append(_mixin_or_descriptor)
+
+            # We must be careful when ordering the mixin and leave MerossDevice as last class.
+            # Messing up with that will cause MRO to not resolve inheritance correctly.
+            # see https://github.com/albertogeniola/MerossIot/blob/0.4.X.X/meross_iot/device_factory.py
+            mixin_classes.append(MerossDevice)
+            # build a label to cache the set
+            class_name = ""
+            for m in mixin_classes:
+                class_name = class_name + m.__name__
+            if class_name in self._deviceclasses:
+                class_type = self._deviceclasses[class_name]
             else:
-                mixin_classes.append(_mixin_or_descriptor)
-
-        # We must be careful when ordering the mixin and leave MerossDevice as last class.
-        # Messing up with that will cause MRO to not resolve inheritance correctly.
-        # see https://github.com/albertogeniola/MerossIot/blob/0.4.X.X/meross_iot/device_factory.py
-        mixin_classes.append(MerossDevice)
-        # build a label to cache the set
-        class_name = ""
-        for m in mixin_classes:
-            class_name = class_name + m.__name__
-        if class_name in self._deviceclasses:
-            class_type = self._deviceclasses[class_name]
-        else:
-            class_type = type(class_name, tuple(mixin_classes), {})
-            self._deviceclasses[class_name] = class_type
+                class_type = type(class_name, tuple(mixin_classes), {})
+                self._deviceclasses[class_name] = class_type
+            init_plan.device_class = class_type
 
         device = class_type(descriptor, config_entry)
         return device
@@ -22,20 +22,16 @@ from .helpers import (
     get_default_no_verify_ssl_context,
     reverse_lookup,
 )
+from .helpers.discovery import async_http_identify
 from .helpers.manager import CloudApiClient
 from .merossclient import (
     HostAddress,
     MerossDeviceDescriptor,
     MerossKeyError,
     cloudapi,
-    compute_message_encryption_key,
     const as mc,
     fmt_macaddress,
-    get_macaddress_from_uuid,
-    get_message_uuid,
-    namespaces as mn,
 )
-from .merossclient.httpclient import MerossHttpClient
 from .merossclient.mqttclient import MerossMQTTDeviceClient
 
 if typing.TYPE_CHECKING:
@@ -236,7 +232,11 @@ class MerossFlowHandlerMixin(
                     user_input,
                     mlc.CONF_CLOUD_REGION,
                     mlc.CONF_MFA_CODE,
+                    mlc.CONF_MQTT_POOL_SIZE,
                 )
+                if profile_config.get(mlc.CONF_MQTT_POOL_SIZE) == 1:
+                    # default: don't store it
+                    profile_config.pop(mlc.CONF_MQTT_POOL_SIZE)
                 if (mlc.CONF_PASSWORD in user_input) or (
                     mlc.CONF_MFA_CODE in user_input
                 ):
@@ -426,6 +426,24 @@ class MerossFlowHandlerMixin(
             )
         ] = bool
         if self._profile_entry:
+            config_schema[
+                vol.Optional(
+                    mlc.CONF_MQTT_POOL_SIZE,
+                    description={DESCR: profile_config.get(mlc.CONF_MQTT_POOL_SIZE)},
+                )
+            ] = vol.All(
+                cv.positive_int, vol.Range(min=1, max=mlc.CONF_MQTT_POOL_SIZE_MAX)
+            )
+            config_schema[
+                vol.Optional(
+                    mlc.CONF_MQTT_ASYNCIO_TRANSPORT,
+                    description={
+                        DESCR: profile_config.get(
+                            mlc.CONF_MQTT_ASYNCIO_TRANSPORT, False
+                        )
+                    },
+                )
+            ] = bool
             self._setup_entitymanager_schema(config_schema, profile_config)
         return self.async_show_form_with_errors(
             "profile",
@@ -447,57 +465,14 @@ class MerossFlowHandlerMixin(
     ) -> tuple[mlc.DeviceConfigType, MerossDeviceDescriptor]:
         # passing key=None would allow key-hack and we don't want it aymore
         key = key or ""
-        api = self.api
-        _httpclient = MerossHttpClient(
-            host,
-            key,
-            None,
-            api,  # type: ignore (api almost duck-compatible with logging.Logger)
-            api.VERBOSE,
-        )
-
-        response_ability = await _httpclient.async_request_strict(
-            *mn.Appliance_System_Ability.request_default
-        )
-        ability = response_ability[mc.KEY_PAYLOAD][mc.KEY_ABILITY]
-        try:
-            all = (
-                await _httpclient.async_request_strict(
-                    *mn.Appliance_System_All.request_default
-                )
-            )[mc.KEY_PAYLOAD][mc.KEY_ALL]
-        except:
-            # might it be the device needs encryption?
-            if mn.Appliance_Encrypt_ECDHE.name not in ability:
-                raise
-            # here we'd need the uuid and mac but we have no ns_all
-            # to parse so we'll try extract these info from ns_ability query
-            uuid = get_message_uuid(response_ability[mc.KEY_HEADER])
-            _httpclient.set_encryption(
-                compute_message_encryption_key(
-                    uuid, key, get_macaddress_from_uuid(uuid)
-                ).encode("utf-8")
-            )
-            all = (
-                await _httpclient.async_request_strict(
-                    *mn.Appliance_System_All.request_default
-                )
-            )[mc.KEY_PAYLOAD][mc.KEY_ALL]
-
-        payload = {
-            mc.KEY_ALL: all,
-            mc.KEY_ABILITY: ability,
-        }
-        descriptor = MerossDeviceDescriptor(payload)
-        return (
-            {
-                mlc.CONF_HOST: host,
-                mlc.CONF_PAYLOAD: payload,
-                mlc.CONF_KEY: key,
-                mlc.CONF_DEVICE_ID: descriptor.uuid,
-            },
-            descriptor,
-        )
+        discovery = self.api.discovery
+        if not (device_config := discovery.cache.get_by_host(host, key)):
+            # packed identification is only worth for bulk discovery: here we
+            # don't want to pay its fallback for devices not supporting it
+            device_config = await async_http_identify(host, key, self.api, packed=False)
+            discovery.cache.set(device_config)
+            device_config = dict(device_config)  # type: ignore
+        return device_config, MerossDeviceDescriptor(device_config[mlc.CONF_PAYLOAD])
 
     async def _async_mqtt_discovery(
         self, device_id: str, key: str | None, descriptor: MerossDeviceDescriptor | None
@@ -505,6 +480,11 @@ class MerossFlowHandlerMixin(
         mqttconnections: list[MQTTConnection] = []
         if key is None:
             key = ""
+        discovery_cache = self.api.discovery.cache
+        if device_config := discovery_cache.get(device_id, key):
+            return device_config, MerossDeviceDescriptor(
+                device_config[mlc.CONF_PAYLOAD]
+            )
         if descriptor:
             profile = MerossApi.profiles.get(descriptor.userId)  # type: ignore
             if profile and (profile.key == key):
@@ -548,6 +528,8 @@ class MerossFlowHandlerMixin(
         for identify_coro in identifies:
             try:
                 device_config = await identify_coro
+                discovery_cache.set(device_config)
+                device_config = dict(device_config)  # type: ignore
                 return device_config, MerossDeviceDescriptor(
                     device_config[mlc.CONF_PAYLOAD]
                 )
@@ -1109,6 +1091,11 @@ class OptionsFlow(MerossFlowHandlerMixin, ce.OptionsFlow):
                 default=mlc.CONF_POLLING_PERIOD_DEFAULT,  # type: ignore
                 description={DESCR: device_config.get(mlc.CONF_POLLING_PERIOD)},
             ): cv.positive_int,
+            vol.Required(
+                mlc.CONF_PUSH_DEDUP,
+                default=False,  # type: ignore
+                description={DESCR: device_config.get(mlc.CONF_PUSH_DEDUP)},
+            ): bool,
         }
         # setup device specific config right before last option
         if device:
@@ -1140,6 +1127,12 @@ class OptionsFlow(MerossFlowHandlerMixin, ce.OptionsFlow):
                 )
                 or logging.NOTSET
             )
+            config[mlc.CONF_LOGGING_SAMPLING] = user_input.get(
+                mlc.CONF_LOGGING_SAMPLING
+            )
+            config[mlc.CONF_LOGGING_JSONL] = user_input.get(
+                mlc.CONF_LOGGING_JSONL, False
+            )
             config[mlc.CONF_OBFUSCATE] = user_input[mlc.CONF_OBFUSCATE]
             config[mlc.CONF_TRACE_TIMEOUT] = user_input.get(mlc.CONF_TRACE_TIMEOUT)
             if user_input[mlc.CONF_TRACE]:
@@ -1174,6 +1167,14 @@ class OptionsFlow(MerossFlowHandlerMixin, ce.OptionsFlow):
                     }
                 }
             ),
+            vol.Optional(
+                mlc.CONF_LOGGING_SAMPLING,
+                description={DESCR: config.get(mlc.CONF_LOGGING_SAMPLING)},
+            ): cv.positive_int,
+            vol.Optional(
+                mlc.CONF_LOGGING_JSONL,
+                description={DESCR: config.get(mlc.CONF_LOGGING_JSONL, False)},
+            ): bool,
             vol.Required(
                 mlc.CONF_OBFUSCATE,
                 description={DESCR: config.get(mlc.CONF_OBFUSCATE, True)},
@@ -28,6 +28,10 @@ CONF_LOGGING_LEVEL_OPTIONS: Final = {
     CONF_LOGGING_DEBUG: "debug",
     CONF_LOGGING_VERBOSE: "verbose",
 }
+# log only 1 every N messages (per namespace) when logging DEBUG/VERBOSE
+CONF_LOGGING_SAMPLING: Final = "logging_sampling"
+# also log to the (shared) json lines file
+CONF_LOGGING_JSONL: Final = "logging_jsonl"
 CONF_OBFUSCATE: Final = "obfuscate"
 # create a file with device info and communication tracing
 CONF_TRACE: Final = "trace"
@@ -37,6 +41,8 @@ CONF_TRACE_TIMEOUT_DEFAULT: Final = 600
 CONF_TRACE_MAXSIZE: Final = 262144  # or when MAXSIZE exceeded
 # folder where to store traces
 CONF_TRACE_DIRECTORY: Final = "traces"
+# folder where to store the json lines log
+CONF_LOGGING_JSONL_DIRECTORY: Final = "logs"
 
 
 class ManagerConfigType(TypedDict):
@@ -48,6 +54,10 @@ class ManagerConfigType(TypedDict):
     """create various diagnostic entities for debugging/diagnostics purposes"""
     logging_level: NotRequired[int]
     """override the default log level set in HA configuration"""
+    logging_sampling: NotRequired[int | None]
+    """log only 1 every N messages (per namespace) at DEBUG/VERBOSE levels"""
+    logging_jsonl: NotRequired[bool]
+    """also send the logs to the structured json lines file"""
     obfuscate: NotRequired[bool]
     """obfuscate sensitive data when logging/tracing"""
     trace_timeout: NotRequired[int | None]
@@ -96,8 +106,11 @@ CONF_PROTOCOL_OPTIONS: dict[str | None, str] = {
 CONF_POLLING_PERIOD: Final = "polling_period"
 CONF_POLLING_PERIOD_MIN: Final = 5
 CONF_POLLING_PERIOD_DEFAULT: Final = 30
+CONF_PUSH_DEDUP: Final = "push_dedup"
 # this is a 'fake' conf used to force-flush
 CONF_TIMESTAMP: Final = mc.KEY_TIMESTAMP
+# learned (hidden from UI) limit of the device response buffer
+CONF_RESPONSE_SIZE_MAX: Final = "response_size_max"
 
 
 class DeviceConfigTypeMinimal(ManagerConfigType):
@@ -122,10 +135,14 @@ class DeviceConfigType(DeviceConfigTypeMinimal, total=False):
     """configures the protocol: auto will automatically switch between the available transports"""
     polling_period: NotRequired[int | None]
     """base polling period to query device state"""
+    push_dedup: NotRequired[bool]
+    """skip parsing PUSH payloads (per channel) when identical to the last received"""
     timezone: NotRequired[str]
     """IANA timezone set in the device"""
     timestamp: NotRequired[float]
     """special (hidden from UI) field used to force entry save"""
+    response_size_max: NotRequired[int]
+    """special (hidden from UI) field storing the learned device response size limit"""
 
 
 CONF_CLOUD_REGION: Final = "cloud_region"
@@ -134,6 +151,9 @@ CONF_PASSWORD: Final = hac.CONF_PASSWORD
 CONF_MFA_CODE: Final = "mfa_code"
 CONF_SAVE_PASSWORD: Final = "save_password"
 CONF_CHECK_FIRMWARE_UPDATES: Final = "check_firmware_updates"
+CONF_MQTT_POOL_SIZE: Final = "mqtt_pool_size"
+CONF_MQTT_POOL_SIZE_MAX: Final = 4
+CONF_MQTT_ASYNCIO_TRANSPORT: Final = "mqtt_asyncio_transport"
 
 
 class ProfileConfigType(
@@ -152,10 +172,16 @@ class ProfileConfigType(
     """saves the account password in HA storage"""
     check_firmware_updates: NotRequired[bool]
     """activate a periodical query to the cloud api to look for fw updates """
+    mqtt_pool_size: NotRequired[int]
+    """number of MQTT connections (x broker) the devices are spread over"""
+    mqtt_asyncio_transport: NotRequired[bool]
+    """(experimental) run the MQTT connections socket in the HA loop (no thread)"""
 
 
 SERVICE_REQUEST = "request"
 """name of the general purpose device send request service exposed by meross_lan"""
+SERVICE_DISCOVER = "discover"
+"""name of the service identifying (in bulk) devices by host/subnet or uuid"""
 CONF_NOTIFYRESPONSE = "notifyresponse"
 """key used in service 'request' call"""
 CONF_PROFILE_ID_LOCAL: Final = ""
@@ -195,6 +221,16 @@ PARAM_TIMESTAMP_TOLERANCE = 5
 """max device timestamp diff against our and trigger warning and (eventually) fix it"""
 PARAM_TRACING_ABILITY_POLL_TIMEOUT = 2
 """used to delay the iteration of abilities while tracing"""
+PARAM_TRACE_FORMAT = "csv"
+"""trace files format: 'csv' (legacy), 'ndjson' or 'binary' (see helpers.tracing)"""
+PARAM_TRACE_COMPRESSION = None
+"""trace files compression: None, 'gzip' or 'zstd' (needs the zstandard package)"""
+PARAM_TRACE_SEGMENTS = 1
+"""when > 1 traces rotate every CONF_TRACE_MAXSIZE bytes keeping these many files"""
+PARAM_LOGGING_JSONL_MAXSIZE = 4194304
+"""size of the json lines log file before rotating"""
+PARAM_LOGGING_JSONL_BACKUPS = 2
+"""number of rotated json lines log files to keep"""
 PARAM_ROLLERSHUTTER_TRANSITION_POLL_TIMEOUT = 2
 """used when polling the cover state to monitor an ongoing transition"""
 PARAM_CLOUDMQTT_UPDATE_PERIOD = 1795
@@ -221,6 +257,18 @@ PARAM_CLOUDPROFILE_QUERY_LATESTVERSION_TIMEOUT = 604800  # 1 week
 """timeout for querying cloud api latestVersion endpoint"""
 PARAM_CLOUDPROFILE_DELAYED_SAVE_TIMEOUT = 30
 """used to delay updated profile data to storage"""
+PARAM_CLOUDPROFILE_MQTT_POOL_REBALANCE_PERIOD = 60
+"""period for checking the health of pooled MQTT connections and rebalancing devices"""
+PARAM_MQTT_IGNORE_TIMEOUT = 300
+"""how long MQTT traffic from an unwanted (ignored/disabled/not discoverable) uuid is dropped"""
+PARAM_MQTT_DISCOVERY_RETRY_TIMEOUT = 60
+"""minimum interval between MQTT discovery attempts for the same uuid"""
+PARAM_DISCOVERY_CONCURRENCY = 16
+"""maximum number of device identifications in flight during (bulk) discovery"""
+PARAM_DISCOVERY_CACHE_TIMEOUT = 300
+"""how long identified device configurations are kept for the config flows"""
+PARAM_DISCOVERY_CACHE_SIZE = 1024
+"""maximum number of identified device configurations kept (oldest are evicted)"""
 PARAM_HEADER_SIZE = 300
 """(rough) estimate of the header part of any response"""
 PARAM_RESPONSE_SIZE_MAX = 3000
@@ -450,6 +450,11 @@ class MerossSubDevice(NamespaceParser, MerossDeviceBase):
         """
         return f"{self.hub.id}_{entity.id}"
 
+    @property
+    def entities_dirty(self):
+        # our entities state flushing is batched along with the hub message handling
+        return self.hub.entities_dirty
+
     # interface: MerossDeviceBase
     async def async_shutdown(self):
         await NamespaceParser.async_shutdown(self)
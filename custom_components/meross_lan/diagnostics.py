@@ -2,12 +2,59 @@ import typing
 
 from . import MerossApi, const as mlc
 from .helpers import ConfigEntryType
-from .helpers.obfuscate import OBFUSCATE_DEVICE_ID_MAP, obfuscated_dict
-from .meross_profile import MerossCloudProfile, MerossCloudProfileStore
+from .helpers.obfuscate import (
+    OBFUSCATE_DEVICE_ID_MAP,
+    OBFUSCATE_SERVER_MAP,
+    obfuscated_dict,
+)
+from .meross_profile import (
+    MerossCloudProfile,
+    MerossCloudProfileStore,
+    MerossMQTTConnection,
+)
 
 if typing.TYPE_CHECKING:
     from homeassistant.config_entries import ConfigEntry
 
+    from .helpers.manager import ApiProfile
+
+
+def _get_mqttconnections_diagnostics(profile: "ApiProfile", obfuscate: bool):
+    data = {}
+    for connection_id, mqttconnection in profile.mqttconnections.items():
+        connection_data = {
+            "transactions": mqttconnection._mqtt_transactions.as_dict(),
+            "ignored": len(mqttconnection.mqttignored),
+            "filtered": mqttconnection.mqttfiltered,
+        }
+        if isinstance(mqttconnection, MerossMQTTConnection):
+            connection_data["pool"] = mqttconnection.get_pool_diagnostics()
+        data[
+            (
+                OBFUSCATE_SERVER_MAP.obfuscate(connection_id)
+                if obfuscate
+                else connection_id
+            )
+        ] = connection_data
+    return data
+
+
+def _get_startup_diagnostics(api: "MerossApi"):
+    startup_times = []
+    pending = 0
+    for device in MerossApi.active_devices():
+        if device.startup_time is None:
+            pending += 1
+        else:
+            startup_times.append(device.startup_time)
+    return {
+        "staged": api.polling_scheduler.startup_pending,
+        "pending": pending,
+        "online": len(startup_times),
+        "average": (sum(startup_times) / len(startup_times) if startup_times else None),
+        "max": max(startup_times, default=None),
+    }
+
 
 async def async_get_device_diagnostics(
     hass, config_entry: "ConfigEntry", device
@@ -34,8 +81,11 @@ async def async_get_config_entry_diagnostics(
                     "pref_protocol": device.pref_protocol,
                     "curr_protocol": device.curr_protocol,
                     "polling_period": device.polling_period,
+                    "startup_time": device.startup_time,
                     "device_response_size_min": device.device_response_size_min,
                     "device_response_size_max": device.device_response_size_max,
+                    "requests_collapsed": device.requests_collapsed,
+                    "metrics": device.metrics.as_dict(),
                     "MQTT": {
                         "cloud_profile": isinstance(
                             device._profile, MerossCloudProfile
@@ -49,12 +99,22 @@ async def async_get_config_entry_diagnostics(
                     "HTTP": {
                         "http": bool(device._http),
                         "http_active": bool(device._http_active),
+                        "stats": (
+                            {
+                                "requests": device._http.stats_requests,
+                                "queue_wait_total": device._http.stats_queue_wait_total,
+                                "queue_wait_max": device._http.stats_queue_wait_max,
+                            }
+                            if device._http
+                            else None
+                        ),
                     },
                     "namespace_handlers": {
                         handler.ns.name: {
                             "lastrequest": handler.lastrequest,
                             "lastresponse": handler.lastresponse,
                             "polling_epoch_next": handler.polling_epoch_next,
+                            "polling_response_size": handler.polling_response_size,
                             "polling_strategy": (
                                 handler.polling_strategy.__name__
                                 if handler.polling_strategy
@@ -98,6 +158,18 @@ async def async_get_config_entry_diagnostics(
                     ].items()
                 }
             data["store"] = store_data
+            if profile:
+                data["mqttconnections"] = _get_mqttconnections_diagnostics(
+                    profile, obfuscate
+                )
+            return data
+
+        case (ConfigEntryType.HUB, _):
+            if api := MerossApi.api:
+                data["mqttconnections"] = _get_mqttconnections_diagnostics(
+                    api, obfuscate
+                )
+                data["startup"] = _get_startup_diagnostics(api)
             return data
 
         case _:
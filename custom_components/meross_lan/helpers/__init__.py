@@ -4,6 +4,7 @@
 
 import abc
 import asyncio
+from collections import OrderedDict
 from contextlib import contextmanager
 from datetime import UTC, datetime
 from enum import StrEnum
@@ -265,8 +266,12 @@ class _Logger(logging.Logger if typing.TYPE_CHECKING else object):
     # for example: LOGGER.error("This error will %s be logged again", "soon", timeout=5)
     # it can also be overriden at the 'Logger' instance level
     default_timeout = 60 * 60 * 8
-    # cache of logged messages with relative last-thrown-epoch
-    _LOGGER_TIMEOUTS = {}
+    # cache of logged messages with relative last-thrown-epoch. This is an LRU
+    # bounded to LOGGER_TIMEOUTS_SIZE entries so that messages with
+    # ever-changing args don't grow it forever (the least recently thrown
+    # messages are evicted and could then be logged again before their timeout)
+    LOGGER_TIMEOUTS_SIZE = 1024
+    _LOGGER_TIMEOUTS: OrderedDict[tuple, float] = OrderedDict()
     # cache of subclassing types: see getLogger
     _CLASS_HOOKS = {}
 
@@ -275,8 +280,9 @@ class _Logger(logging.Logger if typing.TYPE_CHECKING else object):
             timeout = kwargs.pop("timeout")
             epoch = time()
             trap_key = (msg, args)
-            if trap_key in _Logger._LOGGER_TIMEOUTS:
-                if (epoch - _Logger._LOGGER_TIMEOUTS[trap_key]) < timeout:
+            logger_timeouts = _Logger._LOGGER_TIMEOUTS
+            if trap_key in logger_timeouts:
+                if (epoch - logger_timeouts[trap_key]) < timeout:
                     if self.isEnabledFor(mlc.CONF_LOGGING_VERBOSE):
                         super()._log(
                             mlc.CONF_LOGGING_VERBOSE,
@@ -285,7 +291,10 @@ class _Logger(logging.Logger if typing.TYPE_CHECKING else object):
                             **kwargs,
                         )
                     return
-            _Logger._LOGGER_TIMEOUTS[trap_key] = epoch
+                logger_timeouts.move_to_end(trap_key)
+            elif len(logger_timeouts) >= _Logger.LOGGER_TIMEOUTS_SIZE:
+                logger_timeouts.popitem(last=False)
+            logger_timeouts[trap_key] = epoch
 
         super()._log(level, msg, args, **kwargs)
 
@@ -0,0 +1,324 @@
+"""
+    Bulk device identification used when onboarding (large) fleets of devices.
+
+    Devices (probed over HTTP or announced over MQTT) are identified concurrently
+    (up to a cap) and, when possible, with a single Appliance.Control.Multiple
+    carrying both ns_all and ns_ability. The results are cached so that the
+    config flows don't need to query the devices again.
+"""
+
+import asyncio
+import ipaddress
+from time import time
+import typing
+from uuid import uuid4
+
+import aiohttp
+
+from .. import const as mlc
+from ..merossclient import (
+    MerossDeviceDescriptor,
+    MerossKeyError,
+    compute_message_encryption_key,
+    const as mc,
+    get_macaddress_from_uuid,
+    get_message_uuid,
+    namespaces as mn,
+)
+from ..merossclient.httpclient import MerossHttpClient
+
+if typing.TYPE_CHECKING:
+    from .. import MerossApi
+    from ..meross_profile import MQTTConnection
+    from . import Loggable
+
+
+_IDENTIFY_NAMESPACES = (mn.Appliance_System_All, mn.Appliance_System_Ability)
+
+
+async def async_http_identify(
+    host: str,
+    key: str,
+    logger: "Loggable",
+    *,
+    packed: bool = True,
+    timeout: aiohttp.ClientTimeout | None = None,
+) -> mlc.DeviceConfigType:
+    """
+    Queries ns_all and ns_ability from the device at host. When packed, both
+    are requested in a single ns_multiple and, if that fails for any reason
+    other than the device being unreachable, we fall back to querying them
+    one at a time (this also covers devices needing encryption).
+    """
+    httpclient = MerossHttpClient(
+        host,
+        key,
+        None,
+        logger,  # type: ignore (almost duck-compatible with logging.Logger)
+        logger.VERBOSE,
+    )
+    if timeout:
+        httpclient.timeout = timeout
+
+    payload = None
+    if packed:
+        try:
+            response = await httpclient.async_request_strict(
+                mn.Appliance_Control_Multiple.name,
+                mc.METHOD_SET,
+                {
+                    mn.Appliance_Control_Multiple.key: [
+                        {
+                            mc.KEY_HEADER: {
+                                mc.KEY_MESSAGEID: uuid4().hex,
+                                mc.KEY_METHOD: mc.METHOD_GET,
+                                mc.KEY_NAMESPACE: ns.name,
+                            },
+                            mc.KEY_PAYLOAD: ns.payload_get,
+                        }
+                        for ns in _IDENTIFY_NAMESPACES
+                    ]
+                },
+            )
+            payloads = {
+                message[mc.KEY_HEADER][mc.KEY_NAMESPACE]: message[mc.KEY_PAYLOAD]
+                for message in response[mc.KEY_PAYLOAD][mc.KEY_MULTIPLE]
+            }
+            payload = {ns.key: payloads[ns.name][ns.key] for ns in _IDENTIFY_NAMESPACES}
+        except (MerossKeyError, aiohttp.ClientConnectorError, asyncio.TimeoutError):
+            raise
+        except Exception as exception:
+            logger.log(
+                logger.DEBUG,
+                "Packed identification error('%s') for host:%s. Falling back to 2-steps",
+                str(exception),
+                host,
+            )
+
+    if not payload:
+        response_ability = await httpclient.async_request_strict(
+            *mn.Appliance_System_Ability.request_default
+        )
+        ability = response_ability[mc.KEY_PAYLOAD][mc.KEY_ABILITY]
+        try:
+            all = (
+                await httpclient.async_request_strict(
+                    *mn.Appliance_System_All.request_default
+                )
+            )[mc.KEY_PAYLOAD][mc.KEY_ALL]
+        except:
+            # might it be the device needs encryption?
+            if mn.Appliance_Encrypt_ECDHE.name not in ability:
+                raise
+            # here we'd need the uuid and mac but we have no ns_all
+            # to parse so we'll try extract these info from ns_ability query
+            uuid = get_message_uuid(response_ability[mc.KEY_HEADER])
+            httpclient.set_encryption(
+                compute_message_encryption_key(
+                    uuid, key, get_macaddress_from_uuid(uuid)
+                ).encode("utf-8")
+            )
+            all = (
+                await httpclient.async_request_strict(
+                    *mn.Appliance_System_All.request_default
+                )
+            )[mc.KEY_PAYLOAD][mc.KEY_ALL]
+
+        payload = {
+            mc.KEY_ALL: all,
+            mc.KEY_ABILITY: ability,
+        }
+
+    return {
+        mlc.CONF_HOST: host,
+        mlc.CONF_PAYLOAD: payload,  # type: ignore
+        mlc.CONF_KEY: key,
+        mlc.CONF_DEVICE_ID: MerossDeviceDescriptor(payload).uuid,
+    }
+
+
+class DiscoveryCache:
+    """
+    Device configurations recently gathered by any discovery (or config flow)
+    so that the config flows can finish without querying the device again.
+    """
+
+    TIMEOUT: typing.ClassVar = mlc.PARAM_DISCOVERY_CACHE_TIMEOUT
+    SIZE: typing.ClassVar = mlc.PARAM_DISCOVERY_CACHE_SIZE
+
+    __slots__ = (
+        "_device_configs",
+        "_hosts",
+    )
+
+    def __init__(self):
+        self._device_configs: dict[str, tuple[float, mlc.DeviceConfigType]] = {}
+        """device_id -> (expiry epoch, device_config) in expiry order"""
+        self._hosts: dict[str, str] = {}
+        """host -> device_id"""
+
+    def __len__(self):
+        return len(self._device_configs)
+
+    def get(self, device_id: str, key: str):
+        """Returns a copy of the cached device_config if it matches key"""
+        try:
+            expiry, device_config = self._device_configs[device_id]
+        except KeyError:
+            return None
+        if expiry < time():
+            self.pop(device_id)
+            return None
+        if device_config[mlc.CONF_KEY] != key:
+            return None
+        return dict(device_config)
+
+    def get_by_host(self, host: str, key: str):
+        if device_id := self._hosts.get(host):
+            device_config = self.get(device_id, key)
+            if device_config and (device_config.get(mlc.CONF_HOST) == host):
+                return device_config
+        return None
+
+    def set(self, device_config: mlc.DeviceConfigType):
+        device_id = device_config[mlc.CONF_DEVICE_ID]
+        self.pop(device_id)
+        # entries are (re)inserted with the same TIMEOUT so the oldest ones
+        # (the first in the dict) are the expired ones or the ones to evict
+        epoch = time()
+        device_configs = self._device_configs
+        while device_configs:
+            _device_id, (expiry, _) = next(iter(device_configs.items()))
+            if (expiry >= epoch) and (len(device_configs) < self.SIZE):
+                break
+            self.pop(_device_id)
+        device_configs[device_id] = (epoch + self.TIMEOUT, device_config)
+        if host := device_config.get(mlc.CONF_HOST):
+            self._hosts[host] = device_id
+
+    def pop(self, device_id: str):
+        if cached := self._device_configs.pop(device_id, None):
+            host = cached[1].get(mlc.CONF_HOST)
+            if host and (self._hosts.get(host) == device_id):
+                self._hosts.pop(host)
+
+    def clear(self):
+        self._device_configs.clear()
+        self._hosts.clear()
+
+
+class BulkDiscovery:
+    """
+    Identifies devices concurrently (up to CONCURRENCY identifications in flight)
+    feeding the DiscoveryCache. This is shared by the MQTT (auto) discovery and
+    by the 'discover' service probing lists of hosts/subnets or uuids.
+    """
+
+    CONCURRENCY: typing.ClassVar = mlc.PARAM_DISCOVERY_CONCURRENCY
+    HOSTS_MAX: typing.ClassVar = 1024
+    """limit on the number of hosts probed in a single run (a /22 subnet)"""
+    PROBE_TIMEOUT: typing.ClassVar = aiohttp.ClientTimeout(total=5, connect=2)
+    """shorter than the default since most of the hosts in a subnet won't answer"""
+
+    __slots__ = (
+        "api",
+        "cache",
+        "_semaphore",
+    )
+
+    def __init__(self, api: "MerossApi"):
+        self.api = api
+        self.cache = DiscoveryCache()
+        self._semaphore = asyncio.Semaphore(self.CONCURRENCY)
+
+    @staticmethod
+    def expand_hosts(hosts: typing.Iterable[str]):
+        """Expands any subnet (like '192.168.1.0/24') in the list of hosts."""
+        result: dict[str, None] = {}  # keep the order while removing duplicates
+        for host in hosts:
+            if not (host := host.strip()):
+                continue
+            if "/" in host:
+                network = ipaddress.ip_network(host, strict=False)
+                if network.num_addresses > BulkDiscovery.HOSTS_MAX:
+                    raise ValueError(f"Subnet {host} is too large")
+                result.update((str(address), None) for address in network.hosts())
+            else:
+                result[host] = None
+        if len(result) > BulkDiscovery.HOSTS_MAX:
+            raise ValueError(f"Too many hosts ({len(result)})")
+        return list(result)
+
+    async def async_identify_host(self, host: str, keys: typing.Sequence[str]):
+        """Identifies the device at host trying every key (in order)."""
+        cache = self.cache
+        for key in keys:
+            if device_config := cache.get_by_host(host, key):
+                return device_config
+        async with self._semaphore:
+            key_error = None
+            for key in keys:
+                try:
+                    device_config = await async_http_identify(
+                        host, key, self.api, timeout=self.PROBE_TIMEOUT
+                    )
+                    cache.set(device_config)
+                    return dict(device_config)
+                except MerossKeyError as error:
+                    key_error = error
+            raise key_error or MerossKeyError(None)
+
+    async def async_identify_mqtt(
+        self, mqtt_connection: "MQTTConnection", device_id: str, key: str
+    ):
+        """Identifies device_id (over mqtt_connection) with a packed request."""
+        if device_config := self.cache.get(device_id, key):
+            return device_config
+        async with self._semaphore:
+            device_config = await mqtt_connection.async_identify_device(
+                device_id, key, packed=True
+            )
+        self.cache.set(device_config)
+        return dict(device_config)
+
+    async def async_discover(
+        self,
+        hosts: typing.Iterable[str],
+        device_ids: typing.Iterable[str],
+        keys: typing.Sequence[str],
+    ):
+        """
+        Identifies all of the hosts (over HTTP) and device_ids (over the HA MQTT broker)
+        concurrently. Returns a map (host or device_id) -> device_config or exception.
+        """
+        # check the MQTT availability before building any (awaitable) coroutine
+        if device_ids:
+            mqtt_connection = self.api.mqtt_connection
+            if not mqtt_connection.mqtt_is_connected:
+                raise Exception("HA MQTT broker is not available")
+        identifies: dict[str, typing.Awaitable[mlc.DeviceConfigType]] = {
+            host: self.async_identify_host(host, keys)
+            for host in self.expand_hosts(hosts)
+        }
+        if device_ids:
+            for device_id in device_ids:
+                if device_id := device_id.strip():
+                    identifies[device_id] = self._async_identify_mqtt_keys(
+                        mqtt_connection, device_id, keys
+                    )
+        results = await asyncio.gather(*identifies.values(), return_exceptions=True)
+        return dict(zip(identifies.keys(), results))
+
+    async def _async_identify_mqtt_keys(
+        self,
+        mqtt_connection: "MQTTConnection",
+        device_id: str,
+        keys: typing.Sequence[str],
+    ):
+        key_error = None
+        for key in keys:
+            try:
+                return await self.async_identify_mqtt(mqtt_connection, device_id, key)
+            except MerossKeyError as error:
+                key_error = error
+        raise key_error or MerossKeyError(None)
@@ -0,0 +1,93 @@
+"""
+    Structured (json lines) log sink.
+
+    Loggers attached to the sink (see ConfigEntryManager.configure_logger) also
+    send their records to a shared, rotating, json lines file. Records are
+    formatted in the calling context (so that the log args are rendered
+    consistently with the other handlers) and written from a background thread
+    through the standard logging QueueHandler/QueueListener.
+    Structured data can be added to the json record by passing
+    extra={JsonLinesFormatter.FIELDS: {...}} when logging.
+"""
+
+import logging
+import logging.handlers
+import os
+import queue
+import typing
+
+from ..merossclient import json_dumps
+
+
+class JsonLinesFormatter(logging.Formatter):
+
+    FIELDS: typing.Final = "fields"
+    """LogRecord attribute (set through 'extra') carrying the structured data"""
+
+    def format(self, record: logging.LogRecord):
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if fields := getattr(record, self.FIELDS, None):
+            entry.update(fields)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json_dumps(entry)
+
+
+class _JsonLinesFileHandler(logging.handlers.RotatingFileHandler):
+
+    def _open(self):
+        # called (delayed) in the listener thread at the first record
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+class JsonLinesSink:
+    """
+    The shared json lines file: the background writer is started when the first
+    logger is attached and stopped (flushing) when the last one is detached.
+    """
+
+    instance: typing.ClassVar["JsonLinesSink | None"] = None
+
+    __slots__ = (
+        "path",
+        "loggers",
+        "_handler",
+        "_listener",
+    )
+
+    @staticmethod
+    def attach(logger: logging.Logger, path: str, maxsize: int, backups: int):
+        if not (sink := JsonLinesSink.instance):
+            sink = JsonLinesSink.instance = JsonLinesSink(path, maxsize, backups)
+        if logger not in sink.loggers:
+            sink.loggers.add(logger)
+            logger.addHandler(sink._handler)
+
+    @staticmethod
+    def detach(logger: logging.Logger):
+        if (sink := JsonLinesSink.instance) and (logger in sink.loggers):
+            sink.loggers.remove(logger)
+            logger.removeHandler(sink._handler)
+            if not sink.loggers:
+                JsonLinesSink.instance = None
+                sink._listener.stop()
+                for handler in sink._listener.handlers:
+                    handler.close()
+
+    def __init__(self, path: str, maxsize: int, backups: int):
+        self.path = path
+        self.loggers: set[logging.Logger] = set()
+        records = queue.SimpleQueue()
+        self._handler = logging.handlers.QueueHandler(records)
+        self._handler.setFormatter(JsonLinesFormatter())
+        file_handler = _JsonLinesFileHandler(
+            path, maxBytes=maxsize, backupCount=backups, encoding="utf8", delay=True
+        )
+        self._listener = logging.handlers.QueueListener(records, file_handler)
+        self._listener.start()
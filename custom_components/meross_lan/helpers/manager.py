@@ -1,7 +1,7 @@
 import abc
+import asyncio
 from enum import StrEnum
 import logging
-import os
 from time import localtime, strftime, time
 import typing
 
@@ -14,8 +14,11 @@ from ..const import (
     CONF_ALLOW_MQTT_PUBLISH,
     CONF_CREATE_DIAGNOSTIC_ENTITIES,
     CONF_KEY,
+    CONF_LOGGING_JSONL,
+    CONF_LOGGING_JSONL_DIRECTORY,
     CONF_LOGGING_LEVEL,
     CONF_LOGGING_LEVEL_OPTIONS,
+    CONF_LOGGING_SAMPLING,
     CONF_OBFUSCATE,
     CONF_PROTOCOL_AUTO,
     CONF_PROTOCOL_MQTT,
@@ -25,19 +28,25 @@ from ..const import (
     CONF_TRACE_TIMEOUT,
     CONF_TRACE_TIMEOUT_DEFAULT,
     DOMAIN,
+    PARAM_LOGGING_JSONL_BACKUPS,
+    PARAM_LOGGING_JSONL_MAXSIZE,
+    PARAM_TRACE_COMPRESSION,
+    PARAM_TRACE_FORMAT,
+    PARAM_TRACE_SEGMENTS,
 )
-from ..merossclient import cloudapi, const as mc, json_dumps
+from ..merossclient import MerossLazyResponse, cloudapi, const as mc, json_dumps
+from .jsonlog import JsonLinesFormatter, JsonLinesSink
 from .obfuscate import (
     OBFUSCATE_DEVICE_ID_MAP,
     OBFUSCATE_SERVER_MAP,
     OBFUSCATE_USERID_MAP,
     obfuscated_any,
-    obfuscated_dict,
+    obfuscated_payload,
 )
+from .tracing import TraceWriter
 
 if typing.TYPE_CHECKING:
     import asyncio
-    import io
 
     from homeassistant.config_entries import ConfigEntry
     from homeassistant.core import HomeAssistant
@@ -48,6 +57,36 @@ if typing.TYPE_CHECKING:
     from ..merossclient import HostAddress, MerossMessage, MerossPayloadType
 
 
+class MessageDump:
+    """
+    Lazy json rendering of a (eventually obfuscated) message to be passed as a
+    log arg: the dump is only built when (and if) a handler formats the record.
+    Since this might happen in a logging thread, the message (lazy) payload is
+    decoded upfront and, when not obfuscating, the json is just captured.
+    """
+
+    __slots__ = (
+        "message",
+        "obfuscate",
+        "_dump",
+    )
+
+    def __init__(self, message: "MerossMessage", obfuscate: bool):
+        self.message = message
+        self.obfuscate = obfuscate
+        if obfuscate:
+            if isinstance(message, MerossLazyResponse):
+                message._load()
+            self._dump = None
+        else:
+            self._dump = message.json()
+
+    def __str__(self):
+        if self._dump is None:
+            self._dump = json_dumps(obfuscated_payload(self.message))
+        return self._dump
+
+
 class ManagerState(StrEnum):
     INIT = "init"
     LOADING = "loading"
@@ -74,13 +113,16 @@ class EntityManager(Loggable):
         "config_entry_id",
         "deviceentry_id",
         "entities",
+        "entities_dirty",
         "platforms",
         "config",
         "key",
         "obfuscate",
+        "log_sampling",
+        "_log_sampling_counts",
         "state",
         "_tasks",
-        "_trace_file",
+        "_trace_writer",
         "_trace_future",
         "_trace_data",
         "_unsub_trace_endtime",
@@ -104,6 +146,8 @@ class EntityManager(Loggable):
         self.entities: typing.Final[dict[object, "MerossEntity"]] = {}
         self.state = ManagerState.INIT
         self._tasks: set[asyncio.Future] = set()
+        self.log_sampling = 1
+        self._log_sampling_counts: dict[str, int] = {}
         super().__init__(id, **kwargs)
 
     async def async_shutdown(self):
@@ -149,6 +193,18 @@ class EntityManager(Loggable):
             entity for entity in self.entities.values() if entity.PLATFORM is platform
         ]
 
+    def log_sampled(self, namespace: str):
+        """
+        Sampling of the (DEBUG/VERBOSE) message logs: 1 every 'log_sampling'
+        messages is logged and the count is kept per namespace so that the
+        first message of any namespace is always logged.
+        """
+        if self.log_sampling <= 1:
+            return True
+        count = self._log_sampling_counts.get(namespace, 0)
+        self._log_sampling_counts[namespace] = count + 1
+        return not (count % self.log_sampling)
+
     def generate_unique_id(self, entity: "MerossEntity"):
         """
         flexible policy in order to generate unique_ids for entities:
@@ -159,6 +215,30 @@ class EntityManager(Loggable):
         """
         return f"{self.id}_{entity.id}"
 
+    def entities_batch_begin(self):
+        """
+        Starts collecting (in entities_dirty) the entities flushing their state
+        instead of immediately writing it to HA so that bursts of updates (like
+        when parsing NS_ALL or a big ns_multiple) are written in a single pass.
+        Returns the set of dirty entities to be passed to entities_batch_end
+        or None if a batch is already in progress (nested call).
+        """
+        if self.entities_dirty is None:
+            self.entities_dirty = entities_dirty = set()
+            return entities_dirty
+        return None
+
+    def entities_batch_end(self, entities_dirty: "set[MerossEntity]"):
+        self.entities_dirty = None
+        for entity in entities_dirty:
+            if entity._hass_connected:
+                try:
+                    entity.async_write_ha_state()
+                except Exception as exception:
+                    entity.log_exception(
+                        self.WARNING, exception, "async_write_ha_state"
+                    )
+
     def schedule_async_callback(
         self, delay: float, target: "typing.Callable[..., typing.Coroutine]", *args
     ) -> "asyncio.TimerHandle":
@@ -237,7 +317,8 @@ class ConfigEntryManager(EntityManager):
         # during the corresponding platform async_setup_entry so to be able
         # to dynamically add more entities should they 'pop-up' (Hub only?)
         self.platforms = self.DEFAULT_PLATFORMS.copy()
-        self._trace_file: "io.TextIOWrapper | None" = None
+        self.entities_dirty: "set[MerossEntity] | None" = None
+        self._trace_writer: "TraceWriter | None" = None
         self._trace_future: "asyncio.Future | None" = None
         self._trace_data: list | None = None
         self._unsub_trace_endtime: "asyncio.TimerHandle | None" = None
@@ -259,6 +340,7 @@ class ConfigEntryManager(EntityManager):
         await self.async_destroy_diagnostic_entities()
         if self.is_tracing:
             self.trace_close()
+        JsonLinesSink.detach(self.logger)
 
     # interface: Loggable
     def configure_logger(self):
@@ -268,16 +350,34 @@ class ConfigEntryManager(EntityManager):
         the name might depend on it. We're then using this call during
         __init__ for the first setup and subsequently when ConfigEntry changes
         """
+        config = self.config
         self.logtag = self.get_logger_name()
+        # the name might have changed: detach the old one from the json sink
+        if logger := getattr(self, "logger", None):
+            JsonLinesSink.detach(logger)
         self.logger = logger = getLogger(f"{LOGGER.name}.{self.logtag}")
         try:
-            logger.setLevel(self.config.get(CONF_LOGGING_LEVEL, logging.NOTSET))
+            logger.setLevel(config.get(CONF_LOGGING_LEVEL, logging.NOTSET))
         except Exception as exception:
             # do not use self Loggable interface since we might be not set yet
             LOGGER.warning(
                 "error (%s) setting log level: likely a corrupted configuration entry",
                 str(exception),
             )
+        self.log_sampling = config.get(CONF_LOGGING_SAMPLING) or 1
+        self._log_sampling_counts.clear()
+        if config.get(CONF_LOGGING_JSONL):
+            JsonLinesSink.attach(
+                logger,
+                self.hass.config.path(
+                    "custom_components",
+                    DOMAIN,
+                    CONF_LOGGING_JSONL_DIRECTORY,
+                    f"{DOMAIN}.jsonl",
+                ),
+                PARAM_LOGGING_JSONL_MAXSIZE,
+                PARAM_LOGGING_JSONL_BACKUPS,
+            )
 
     def log(self, level: int, msg: str, *args, **kwargs):
         if (logger := self.logger).isEnabledFor(level):
@@ -388,7 +488,7 @@ class ConfigEntryManager(EntityManager):
 
     def loggable_dict(self, value: typing.Mapping[str, typing.Any]):
         """Conditionally obfuscate the dict values (based off OBFUSCATE_KEYS) to send to logging/tracing"""
-        return obfuscated_dict(value) if self.obfuscate else value
+        return obfuscated_payload(value) if self.obfuscate else value
 
     def loggable_broker(self, broker: "HostAddress | str"):
         """Conditionally obfuscate the connection_id (which is a broker address host:port) to send to logging/tracing"""
@@ -414,29 +514,26 @@ class ConfigEntryManager(EntityManager):
 
     @property
     def is_tracing(self):
-        return self._trace_file or self._trace_data
+        return self._trace_writer or self._trace_data
 
     async def async_trace_open(self):
         try:
             self.log(self.DEBUG, "Tracing start")
             epoch = time()
-            hass = self.hass
-
-            def _trace_open():
-                tracedir = hass.config.path(
-                    "custom_components", DOMAIN, CONF_TRACE_DIRECTORY
-                )
-                os.makedirs(tracedir, exist_ok=True)
-                return open(
-                    os.path.join(
-                        tracedir,
-                        f"{strftime('%Y-%m-%d_%H-%M-%S', localtime(epoch))}_{self.config_entry_id}.csv",
-                    ),
-                    mode="w",
-                    encoding="utf8",
-                )
-
-            self._trace_file = await hass.async_add_executor_job(_trace_open)
+            # the writer thread takes care of creating the directory/files
+            self._trace_writer = TraceWriter(
+                self.hass.config.path(
+                    "custom_components",
+                    DOMAIN,
+                    CONF_TRACE_DIRECTORY,
+                    f"{strftime('%Y-%m-%d_%H-%M-%S', localtime(epoch))}_{self.config_entry_id}",
+                ),
+                PARAM_TRACE_FORMAT,
+                PARAM_TRACE_COMPRESSION,
+                CONF_TRACE_MAXSIZE,
+                PARAM_TRACE_SEGMENTS,
+            )
+            self._trace_writer.open()
 
             @callback
             def _trace_close_callback():
@@ -460,12 +557,13 @@ class ConfigEntryManager(EntityManager):
         pass
 
     def trace_close(self):
-        if self._trace_file:
-            try:
-                self._trace_file.close()
-            except Exception as exception:
-                self.log_exception(self.WARNING, exception, "closing trace file")
-            self._trace_file = None
+        if trace_writer := self._trace_writer:
+            self._trace_writer = None
+            trace_writer.close()
+            if trace_writer.error:
+                self.log_exception(
+                    self.WARNING, trace_writer.error, "writing trace file"
+                )
             self.log(self.DEBUG, "Tracing end")
         if self._unsub_trace_endtime:
             self._unsub_trace_endtime.cancel()
@@ -496,12 +594,11 @@ class ConfigEntryManager(EntityManager):
             ]
             if self._trace_data:
                 self._trace_data.append(columns)
-            if self._trace_file:
-                columns[5] = json_dumps(data)
-                self._trace_file.write("\t".join(columns) + "\r\n")
-                columns[5] = data  # restore the (eventual) _trace_data ref
-                if self._trace_file.tell() > CONF_TRACE_MAXSIZE:
-                    self.trace_close()
+            if self._trace_writer and not self._trace_writer.write(
+                epoch, rxtx, protocol, method, namespace, json_dumps(data)
+            ):
+                # size limit reached (or io error)
+                self.trace_close()
 
         except Exception as exception:
             self.trace_close()
@@ -513,8 +610,9 @@ class ConfigEntryManager(EntityManager):
         msg: str,
     ):
         try:
+            epoch = time()
             columns = [
-                strftime("%Y/%m/%d - %H:%M:%S", localtime(time())),
+                strftime("%Y/%m/%d - %H:%M:%S", localtime(epoch)),
                 "",
                 CONF_PROTOCOL_AUTO,
                 "LOG",
@@ -523,10 +621,8 @@ class ConfigEntryManager(EntityManager):
             ]
             if self._trace_data:
                 self._trace_data.append(columns)
-            if self._trace_file:
-                self._trace_file.write("\t".join(columns) + "\r\n")
-                if self._trace_file.tell() > CONF_TRACE_MAXSIZE:
-                    self.trace_close()
+            if self._trace_writer and not self._trace_writer.write(epoch, *columns[1:]):
+                self.trace_close()
 
         except Exception as exception:
             self.trace_close()
@@ -674,34 +770,47 @@ class ApiProfile(ConfigEntryManager):
                 CONF_PROTOCOL_MQTT,
                 rxtx,
             )
+        if not self.isEnabledFor(self.DEBUG):
+            return
+        header = message[mc.KEY_HEADER]
+        namespace = header[mc.KEY_NAMESPACE]
+        if not self.log_sampled(namespace):
+            return
+        loggable_device_id = self.loggable_device_id(device_id)
+        extra = {
+            JsonLinesFormatter.FIELDS: {
+                "rxtx": rxtx,
+                "protocol": CONF_PROTOCOL_MQTT,
+                "method": header[mc.KEY_METHOD],
+                "namespace": namespace,
+                "messageId": header[mc.KEY_MESSAGEID],
+                "uuid": loggable_device_id,
+            }
+        }
         if self.isEnabledFor(self.VERBOSE):
-            header = message[mc.KEY_HEADER]
             connection.log(
                 self.VERBOSE,
                 "%s(%s) %s %s (uuid:%s messageId:%s) %s",
                 rxtx,
                 CONF_PROTOCOL_MQTT,
                 header[mc.KEY_METHOD],
-                header[mc.KEY_NAMESPACE],
-                self.loggable_device_id(device_id),
+                namespace,
+                loggable_device_id,
                 header[mc.KEY_MESSAGEID],
-                (
-                    json_dumps(obfuscated_dict(message))
-                    if self.obfuscate
-                    else message.json()
-                ),
+                MessageDump(message, self.obfuscate),
+                extra=extra,
             )
-        elif self.isEnabledFor(self.DEBUG):
-            header = message[mc.KEY_HEADER]
+        else:
             connection.log(
                 self.DEBUG,
                 "%s(%s) %s %s (uuid:%s messageId:%s)",
                 rxtx,
                 CONF_PROTOCOL_MQTT,
                 header[mc.KEY_METHOD],
-                header[mc.KEY_NAMESPACE],
-                self.loggable_device_id(device_id),
+                namespace,
+                loggable_device_id,
                 header[mc.KEY_MESSAGEID],
+                extra=extra,
             )
 
 
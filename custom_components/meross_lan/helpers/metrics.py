@@ -0,0 +1,227 @@
+"""
+    Transport metrics for MerossDevice.
+
+    These are always on so the recording side is kept as cheap as possible
+    (a bisect and a bunch of counters per request) while any 'statistic'
+    is only computed when reading (diagnostics or the optional diagnostic sensors).
+"""
+
+import bisect
+import typing
+
+
+class LatencyHistogram:
+    """
+    Fixed buckets (request -> response) latency histogram. Percentiles are
+    estimated as the upper edge of the bucket where they fall.
+    """
+
+    BUCKETS: typing.ClassVar = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    """bucket upper edges (seconds). The last bucket collects anything above."""
+
+    __slots__ = (
+        "counts",
+        "count",
+        "total",
+        "max",
+    )
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, latency: float):
+        self.counts[bisect.bisect_left(self.BUCKETS, latency)] += 1
+        self.count += 1
+        self.total += latency
+        if latency > self.max:
+            self.max = latency
+
+    @property
+    def average(self):
+        return self.total / self.count if self.count else None
+
+    def percentile(self, percent: float):
+        if not self.count:
+            return None
+        threshold = self.count * percent / 100
+        accumulated = 0
+        for index, count in enumerate(self.counts):
+            accumulated += count
+            if accumulated >= threshold:
+                if index < len(self.BUCKETS):
+                    return min(self.BUCKETS[index], self.max)
+                break
+        return self.max
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "average": self.average,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+            "buckets": {
+                **{f"<={edge}": c for edge, c in zip(self.BUCKETS, self.counts)},
+                f">{self.BUCKETS[-1]}": self.counts[-1],
+            },
+        }
+
+
+class ProtocolMetrics:
+    """Per transport (HTTP or MQTT) request metrics."""
+
+    __slots__ = (
+        "latency",
+        "requests",
+        "timeouts",
+        "errors",
+        "bytes_out",
+        "bytes_in",
+    )
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "bytes_out": self.bytes_out,
+            "bytes_in": self.bytes_in,
+            "latency": self.latency.as_dict(),
+        }
+
+
+class DeviceMetrics:
+    """
+    Collects the transport metrics for a device: overall per protocol, latency
+    per namespace (and protocol), ns_multiple packing efficiency and recoveries.
+    """
+
+    __slots__ = (
+        "protocols",
+        "namespaces",
+        "multiple_sent",
+        "multiple_requests",
+        "multiple_failures",
+        "multiple_response_size",
+        "multiple_response_size_max",
+        "truncation_recoveries",
+        "push_dedup_skipped",
+    )
+
+    def __init__(self):
+        self.protocols: dict[str, ProtocolMetrics] = {}
+        self.namespaces: dict[str, dict[str, LatencyHistogram]] = {}
+        self.multiple_sent = 0
+        """number of ns_multiple successfully sent."""
+        self.multiple_requests = 0
+        """total number of requests packed in the ns_multiple sent."""
+        self.multiple_failures = 0
+        self.multiple_response_size = 0
+        """total size of the ns_multiple responses."""
+        self.multiple_response_size_max = 0
+        """total of the (device) size limit when sending the ns_multiple."""
+        self.truncation_recoveries = 0
+        self.push_dedup_skipped = 0
+        """number of (channel) PUSH parses avoided by deduplication."""
+
+    def get_protocol(self, protocol: str):
+        try:
+            return self.protocols[protocol]
+        except KeyError:
+            self.protocols[protocol] = protocol_metrics = ProtocolMetrics()
+            return protocol_metrics
+
+    def record_request(
+        self,
+        protocol: str,
+        namespace: str,
+        latency: float,
+        bytes_out: int,
+    ):
+        protocol_metrics = self.get_protocol(protocol)
+        protocol_metrics.requests += 1
+        protocol_metrics.bytes_out += bytes_out
+        protocol_metrics.latency.record(latency)
+        try:
+            namespace_metrics = self.namespaces[namespace]
+        except KeyError:
+            self.namespaces[namespace] = namespace_metrics = {}
+        try:
+            namespace_metrics[protocol].record(latency)
+        except KeyError:
+            namespace_metrics[protocol] = histogram = LatencyHistogram()
+            histogram.record(latency)
+
+    def record_failure(
+        self,
+        protocol: str,
+        bytes_out: int,
+        timeout: bool,
+    ):
+        protocol_metrics = self.get_protocol(protocol)
+        protocol_metrics.requests += 1
+        protocol_metrics.bytes_out += bytes_out
+        if timeout:
+            protocol_metrics.timeouts += 1
+        else:
+            protocol_metrics.errors += 1
+
+    def record_bytes_in(self, protocol: str, bytes_in: int):
+        self.get_protocol(protocol).bytes_in += bytes_in
+
+    def record_multiple(
+        self, requests_count: int, response_size: int, response_size_max: int
+    ):
+        self.multiple_sent += 1
+        self.multiple_requests += requests_count
+        self.multiple_response_size += response_size
+        self.multiple_response_size_max += response_size_max
+
+    def as_dict(self):
+        return {
+            "protocols": {
+                protocol: protocol_metrics.as_dict()
+                for protocol, protocol_metrics in self.protocols.items()
+            },
+            "namespaces": {
+                namespace: {
+                    protocol: {
+                        "count": histogram.count,
+                        "average": histogram.average,
+                        "p90": histogram.percentile(90),
+                        "max": histogram.max,
+                    }
+                    for protocol, histogram in namespace_metrics.items()
+                }
+                for namespace, namespace_metrics in self.namespaces.items()
+            },
+            "multiple": {
+                "sent": self.multiple_sent,
+                "requests": self.multiple_requests,
+                "failures": self.multiple_failures,
+                "requests_per_message": (
+                    self.multiple_requests / self.multiple_sent
+                    if self.multiple_sent
+                    else None
+                ),
+                "fill_ratio": (
+                    self.multiple_response_size / self.multiple_response_size_max
+                    if self.multiple_response_size_max
+                    else None
+                ),
+            },
+            "truncation_recoveries": self.truncation_recoveries,
+            "push_dedup_skipped": self.push_dedup_skipped,
+        }
@@ -98,7 +98,7 @@ class NamespaceHandler:
 
     - entity_class: specify a MerossEntity type (actually an implementation
     of Merossentity) to be instanced whenever a message for a particular channel
-    is received and the channel has no parser associated (see _handle_list)
+    is received and the channel has no parser associated (see _compile_handler)
 
     """
 
@@ -120,6 +120,7 @@ class NamespaceHandler:
         "polling_response_size",
         "polling_request",
         "polling_request_channels",
+        "push_lastvalues",
     )
 
     def __init__(
@@ -139,6 +140,8 @@ class NamespaceHandler:
         self.parsers: dict[object, typing.Callable[[dict], None]] = {}
         self.key_channel = ns.key_channel
         self.entity_class = None
+        self.push_lastvalues: dict[object, dict] = {}
+        """last PUSHed value per channel (see push_dedup)"""
         self.handler = handler or getattr(
             device, f"_handle_{namespace.replace('.', '_')}", self._handle_undefined
         )
@@ -233,6 +236,18 @@ class NamespaceHandler:
     def polling_response_size_inc(self):
         self.polling_response_size += self.polling_response_item_size
 
+    def polling_response_size_update(self, response_size: int):
+        """Updates the estimated polling_response_size with an observed one.
+        Bigger responses are immediately accounted for (we don't want to overflow
+        the device when packing NS_MULTIPLE) while smaller ones slowly pull
+        down the estimate."""
+        if response_size > self.polling_response_size:
+            self.polling_response_size = response_size
+        else:
+            self.polling_response_size = (
+                3 * self.polling_response_size + response_size
+            ) // 4
+
     def register_entity_class(
         self,
         entity_class: type["MerossEntity"],
@@ -245,7 +260,7 @@ class NamespaceHandler:
             if initially_disabled
             else entity_class
         )
-        self.handler = self._handle_list
+        self.handler = self._handle_compile
         self.device.platforms.setdefault(entity_class.PLATFORM)
         if build_from_digest:
             channels = set()
@@ -273,9 +288,10 @@ class NamespaceHandler:
     ):
         # when setting up the entity-dispatching we'll substitute the legacy handler
         # (used to be a MerossDevice method with syntax like _handle_Appliance_xxx_xxx)
-        # with our _handle_list, _handle_dict, _handle_generic. The 3 versions are meant
-        # to be optimized against a well known type of payload. We're starting by guessing our
-        # payload is a list but we'll dynamically adjust this whenever we find (in real world)
+        # with our _handle_compile which will in turn install a dispatcher (see
+        # _compile_handler) optimized against the actual type of payload. Since
+        # the key_channel could change here, the dispatcher is rebuilt on the next
+        # message and it will be rebuilt again whenever we find (in real world)
         # a different payload structure so we can adapt.
         # As an example of why this is needed, many modern payloads are just lists (
         # Thermostat payloads for instance) but many older ones are not, and still
@@ -294,12 +310,54 @@ class NamespaceHandler:
                 self.polling_response_base_size
                 + len(self.parsers) * self.polling_response_item_size
             )
-        self.handler = self._handle_list
+        self.handler = self._handle_compile
 
     def unregister(self, parser: "NamespaceParser"):
         if self.parsers.pop(getattr(parser, self.key_channel), None):
             parser.namespace_handlers.remove(self)
 
+    def push_dedup(self, payload: dict):
+        """
+        Filters out of a PUSH payload the channels carrying the same (structural
+        compare) value as the last PUSH. Returns None when nothing changed so that
+        the dispatching can be skipped altogether. Used when the device is
+        configured for PUSH deduplication (see MerossDevice._handle).
+        """
+        lastvalues = self.push_lastvalues
+        p_channels = payload.get(self.ns.key)
+        if type(p_channels) is list:
+            key_channel = self.key_channel
+            p_changed = []
+            try:
+                for p_channel in p_channels:
+                    channel = p_channel[key_channel]
+                    if lastvalues.get(channel) != p_channel:
+                        lastvalues[channel] = p_channel
+                        p_changed.append(p_channel)
+            except (KeyError, TypeError):
+                # unexpected layout: fallback to comparing the whole payload
+                lastvalues.clear()
+            else:
+                if skipped := len(p_channels) - len(p_changed):
+                    self.device.metrics.push_dedup_skipped += skipped
+                    if not p_changed:
+                        return None
+                    return payload | {self.ns.key: p_changed}
+                return payload
+        elif type(p_channels) is dict:
+            channel = p_channels.get(self.key_channel)
+            if lastvalues.get(channel) == p_channels:
+                self.device.metrics.push_dedup_skipped += 1
+                return None
+            lastvalues[channel] = p_channels
+            return payload
+
+        if lastvalues.get(None) == payload:
+            self.device.metrics.push_dedup_skipped += 1
+            return None
+        lastvalues[None] = payload
+        return payload
+
     def handle_exception(self, exception: Exception, function_name: str, payload):
         device = self.device
         device.log_exception(
@@ -313,67 +371,94 @@ class NamespaceHandler:
             timeout=604800,
         )
 
-    def _handle_list(self, header, payload):
+    def _handle_compile(self, header, payload):
         """
-        splits and forwards the received NS payload to
-        the registered entity(es).
-        This handler si optimized for list payloads:
-        "payload": { "key_namespace": [{"channel":...., ...}] }
+        Entry point handler used when the parsers are (re)registered or when
+        the payload shape changes: this 'compiles' the dispatcher specialized for the
+        received payload shape, installs it as the namespace handler and runs it.
         """
-        try:
-            for p_channel in payload[self.ns.key]:
+        if self.handler == self._handle_compile:
+            payload_type = type(payload[self.ns.key])
+        else:
+            # we're here since the payload shape changed in an already
+            # compiled dispatcher: this namespace might carry both (ToggleX
+            # is a well-known example) so we'll stick to the generic one
+            payload_type = None
+        self.handler = handler = self._compile_handler(payload_type)
+        handler(header, payload)
+
+    def _compile_handler(self, payload_type: type | None):
+        """
+        Builds a dispatcher specialized for the payload shape with all of the
+        'lookups' bound as closure locals. The list and dict versions check the
+        shape on every message and just go back to _handle_compile should it change.
+        """
+        key_namespace = self.ns.key
+        key_channel = self.key_channel
+        parsers = self.parsers
+        _try_create_entity = self._try_create_entity
+        _handle_compile = self._handle_compile
+
+        if payload_type is list:
+
+            def _handle_list(header, payload):
+                """
+                "payload": { "key_namespace": [{"channel":...., ...}] }
+                """
+                p_list = payload[key_namespace]
+                if type(p_list) is not list:
+                    _handle_compile(header, payload)
+                    return
+                for p_channel in p_list:
+                    try:
+                        _parse = parsers[p_channel[key_channel]]
+                    except KeyError as key_error:
+                        _parse = _try_create_entity(key_error)
+                    _parse(p_channel)
+
+            return _handle_list
+
+        if payload_type is dict:
+
+            def _handle_dict(header, payload):
+                """
+                "payload": { "key_namespace": {"channel":...., ...} }
+                """
+                p_channel = payload[key_namespace]
                 try:
-                    _parse = self.parsers[p_channel[self.key_channel]]
+                    _parse = parsers[p_channel.get(key_channel)]
                 except KeyError as key_error:
-                    _parse = self._try_create_entity(key_error)
+                    _parse = _try_create_entity(key_error)
+                except AttributeError:
+                    # not a dict anymore
+                    _handle_compile(header, payload)
+                    return
                 _parse(p_channel)
-        except TypeError:
-            # this might be expected: the payload is not a list
-            self.handler = self._handle_dict
-            self._handle_dict(header, payload)
 
-    def _handle_dict(self, header, payload):
-        """
-        splits and forwards the received NS payload to
-        the registered entity(es).
-        This handler si optimized for dict payloads:
-        "payload": { "key_namespace": {"channel":...., ...} }
-        """
-        p_channel = payload[self.ns.key]
-        try:
-            _parse = self.parsers[p_channel.get(self.key_channel)]
-        except KeyError as key_error:
-            _parse = self._try_create_entity(key_error)
-        except AttributeError:
-            # this might be expected: the payload is not a dict
-            # final fallback to the safe _handle_generic
-            self.handler = self._handle_generic
-            self._handle_generic(header, payload)
-            return
-        _parse(p_channel)
+            return _handle_dict
 
-    def _handle_generic(self, header, payload):
-        """
-        splits and forwards the received NS payload to
-        the registered entity(es)
-        This handler can manage both lists or dicts or even
-        payloads without the "channel" key (see namespace Toggle)
-        which will default forwarding to channel == None
-        """
-        p_channel = payload[self.ns.key]
-        if type(p_channel) is dict:
-            try:
-                _parse = self.parsers[p_channel.get(self.key_channel)]
-            except KeyError as key_error:
-                _parse = self._try_create_entity(key_error)
-            _parse(p_channel)
-        else:
-            for p_channel in p_channel:
+        def _handle_generic(header, payload):
+            """
+            This handler can manage both lists or dicts or even
+            payloads without the "channel" key (see namespace Toggle)
+            which will default forwarding to channel == None
+            """
+            p_channel = payload[key_namespace]
+            if type(p_channel) is dict:
                 try:
-                    _parse = self.parsers[p_channel[self.key_channel]]
+                    _parse = parsers[p_channel.get(key_channel)]
                 except KeyError as key_error:
-                    _parse = self._try_create_entity(key_error)
+                    _parse = _try_create_entity(key_error)
                 _parse(p_channel)
+            else:
+                for p_channel in p_channel:
+                    try:
+                        _parse = parsers[p_channel[key_channel]]
+                    except KeyError as key_error:
+                        _parse = _try_create_entity(key_error)
+                    _parse(p_channel)
+
+        return _handle_generic
 
     def _handle_undefined(self, header: dict, payload: dict):
         device = self.device
@@ -8,6 +8,8 @@
     the ObfuscateMap instance so that every time we obfuscate a key value,
     we return the same (stable) obfuscation in order to correlate data in
     traces and logs. Some keys are not cached/mapped and just 'redacted'
+    Since logging/tracing obfuscate every message, the engine only copies the
+    (sub)structures actually carrying sensitive values (see 'obfuscated_payload').
 """
 
 import re
@@ -103,10 +105,25 @@ class ObfuscateServerMap(ObfuscateMap):
 class ObfuscateFrom(ObfuscateRule):
     """
     Obfuscate the "from" payload field which may carry the device "uuid"
-    or the "userid"
+    or the "userid". Results are cached since the same few topics are
+    carried over and over in messages.
     """
 
+    CACHE_SIZE: typing.ClassVar = 256
+
+    def __init__(self):
+        self._cache: dict[str, str] = {}
+
     def obfuscate(self, value: str):
+        try:
+            return self._cache[value]
+        except KeyError:
+            if len(self._cache) >= self.CACHE_SIZE:
+                self._cache.clear()
+            obfuscated_value = self._cache[value] = self._obfuscate(value)
+            return obfuscated_value
+
+    def _obfuscate(self, value: str):
         """
         Renders the obfuscated uuid in place like:
         "/appliance/###############################0/publish"
@@ -132,6 +149,7 @@ class ObfuscateFrom(ObfuscateRule):
         return mc.RE_PATTERN_UUID.sub(_sub, value)
 
     def clear(self):
+        self._cache.clear()
         OBFUSCATE_USERID_MAP.clear()
         OBFUSCATE_DEVICE_ID_MAP.clear()
 
@@ -200,39 +218,67 @@ OBFUSCATE_KEYS: dict[str, ObfuscateRule] = {
 }
 
 
+def _obfuscate_list(data: list) -> list:
+    result = None
+    for index, value in enumerate(data):
+        if isinstance(value, dict):
+            obfuscated_value = _obfuscate_dict(value)
+        elif isinstance(value, list):
+            obfuscated_value = _obfuscate_list(value)
+        else:
+            continue
+        if obfuscated_value is not value:
+            if result is None:
+                result = list(data)
+            result[index] = obfuscated_value
+    return data if result is None else result
+
+
+def _obfuscate_dict(data: typing.Mapping[str, typing.Any]):
+    result = None
+    for key, value in data.items():
+        if isinstance(value, dict):
+            obfuscated_value = _obfuscate_dict(value)
+        elif isinstance(value, list):
+            obfuscated_value = _obfuscate_list(value)
+        elif key in OBFUSCATE_KEYS:
+            obfuscated_value = OBFUSCATE_KEYS[key].obfuscate(value)
+        else:
+            continue
+        if obfuscated_value is not value:
+            if result is None:
+                result = dict(data)
+            result[key] = obfuscated_value
+    return data if result is None else result
+
+
+def obfuscated_payload(
+    data: typing.Mapping[str, typing.Any],
+) -> typing.Mapping[str, typing.Any]:
+    """
+    Copy on write dictionary obfuscation: returns 'data' itself (or shares its
+    sub-structures) when there's nothing to obfuscate so the result must be
+    considered read-only. Fits logging/tracing.
+    """
+    return _obfuscate_dict(data)
+
+
 def obfuscated_list(data: list):
     """
     List obfuscation: recursevely invokes dict/list obfuscation on the list items.
     Simple objects are not obfuscated.
     """
-    return [
-        (
-            obfuscated_dict(value)
-            if isinstance(value, dict)
-            else obfuscated_list(value) if isinstance(value, list) else value
-        )
-        for value in data
-    ]
+    result = _obfuscate_list(data)
+    return list(result) if result is data else result
 
 
 def obfuscated_dict(data: typing.Mapping[str, typing.Any]) -> dict[str, typing.Any]:
-    """Dictionary obfuscation based on the set keys defined in OBFUSCATE_KEYS."""
-    return {
-        key: (
-            obfuscated_dict(value)
-            if isinstance(value, dict)
-            else (
-                obfuscated_list(value)
-                if isinstance(value, list)
-                else (
-                    OBFUSCATE_KEYS[key].obfuscate(value)
-                    if key in OBFUSCATE_KEYS
-                    else value
-                )
-            )
-        )
-        for key, value in data.items()
-    }
+    """
+    Dictionary obfuscation based on the set keys defined in OBFUSCATE_KEYS.
+    Returns a new dict but (unmodified) nested structures are shared.
+    """
+    result = _obfuscate_dict(data)
+    return dict(result) if result is data else result  # type: ignore
 
 
 def obfuscated_any(value):
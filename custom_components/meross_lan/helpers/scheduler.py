@@ -0,0 +1,217 @@
+"""
+    Polling scheduler:
+
+    a shared (integration wide) timer queue for MerossDevice polling.
+    Instead of every device arming its own loop timer at fixed periods,
+    devices enqueue their next due (loop) time here and a single loop timer
+    is armed for the earliest entry. When the timer fires we dispatch
+    all of the due devices and re-arm for the (new) earliest one.
+    The queue is a min-heap of PollingHandle(s) which are lazily removed
+    when cancelled (like asyncio does with its own TimerHandle(s)).
+
+    Staged startup:
+
+    the first polling cycle of a starting device is not queued straight away
+    but 'staged' in a (FIFO) queue. Staged devices are released as soon as
+    a slot is available, keeping up to STARTUP_CONCURRENCY first polls in flight,
+    so that a lot of devices starting together (HA boot) don't flood the
+    transports (HTTP session limits, cloud MQTT rate limits) while the fleet
+    is still brought up as fast as the devices reply. A slot is anyway released
+    after STARTUP_TIMEOUT so that slow (or offline) devices don't stall the queue.
+"""
+
+from collections import deque
+from functools import partial
+import heapq
+import typing
+
+if typing.TYPE_CHECKING:
+    import asyncio
+
+    from ..meross_device import MerossDevice
+
+
+class PollingHandle:
+    """
+    Scheduled polling entry. This is (duck) compatible with asyncio.TimerHandle
+    so that MerossDevice can just 'cancel' it without caring about the scheduler.
+    """
+
+    __slots__ = (
+        "scheduler",
+        "when",
+        "seq",
+        "device",
+        "namespace",
+        "cancelled",
+        "staged",
+    )
+
+    def __init__(
+        self,
+        scheduler: "PollingScheduler",
+        when: float,
+        seq: int,
+        device: "MerossDevice",
+        namespace: str | None,
+    ):
+        self.scheduler = scheduler
+        self.when = when
+        self.seq = seq
+        self.device = device
+        self.namespace = namespace
+        self.cancelled = False
+        self.staged = False
+        """the handle is waiting in the startup queue (see schedule_start)"""
+
+    def __lt__(self, other: "PollingHandle"):
+        return (self.when, self.seq) < (other.when, other.seq)
+
+    def cancel(self):
+        if not self.cancelled:
+            self.cancelled = True
+            if not self.staged:
+                self.scheduler._cancelled_count += 1
+
+
+class PollingScheduler:
+    """
+    Owned by MerossApi (one per HA instance) and shared by every MerossDevice.
+    """
+
+    # when the number of cancelled handles exceeds this (and half of the queue)
+    # we rebuild the heap so that it doesn't grow indefinitely
+    CANCELLED_COMPACT_THRESHOLD = 100
+
+    STARTUP_CONCURRENCY: typing.ClassVar = 20
+    """maximum number of first polling cycles in flight (part of the HTTP sessions)"""
+    STARTUP_TIMEOUT: typing.ClassVar = 5
+    """time after which a first polling cycle stops holding its startup slot"""
+
+    __slots__ = (
+        "loop",
+        "_queue",
+        "_seq",
+        "_cancelled_count",
+        "_timer",
+        "_timer_when",
+        "_startup_queue",
+        "_startup_inflight",
+    )
+
+    def __init__(self, loop: "asyncio.AbstractEventLoop"):
+        self.loop = loop
+        self._queue: list[PollingHandle] = []
+        self._seq = 0
+        self._cancelled_count = 0
+        self._timer: "asyncio.TimerHandle | None" = None
+        self._timer_when = 0.0
+        self._startup_queue: deque[PollingHandle] = deque()
+        """handles waiting for their first polling cycle"""
+        self._startup_inflight: dict[PollingHandle, "asyncio.TimerHandle"] = {}
+        """first polling cycles holding a startup slot (with their timeout)"""
+
+    def __len__(self):
+        return len(self._queue) - self._cancelled_count
+
+    def schedule(self, delay: float, device: "MerossDevice", namespace: str | None):
+        """Enqueue a device polling cycle to be run after 'delay' seconds. The returned
+        handle has the same 'cancel' semantic as the asyncio TimerHandle."""
+        self._seq += 1
+        handle = PollingHandle(
+            self, self.loop.time() + delay, self._seq, device, namespace
+        )
+        heapq.heappush(self._queue, handle)
+        if (not self._timer) or (handle.when < self._timer_when):
+            self._arm(handle.when)
+        return handle
+
+    def schedule_start(self, device: "MerossDevice"):
+        """Stages the first polling cycle of a starting device (see module doc)."""
+        self._seq += 1
+        handle = PollingHandle(self, 0.0, self._seq, device, None)
+        handle.staged = True
+        self._startup_queue.append(handle)
+        self._startup_run()
+        return handle
+
+    @property
+    def startup_pending(self):
+        return sum(not handle.cancelled for handle in self._startup_queue)
+
+    def shutdown(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        for timeout in self._startup_inflight.values():
+            timeout.cancel()
+        self._startup_inflight.clear()
+        for handle in self._queue:
+            handle.cancelled = True
+        self._queue.clear()
+        self._cancelled_count = 0
+        for handle in self._startup_queue:
+            handle.cancelled = True
+        self._startup_queue.clear()
+
+    def _arm(self, when: float):
+        if self._timer:
+            self._timer.cancel()
+        self._timer_when = when
+        self._timer = self.loop.call_at(when, self._run)
+
+    def _run(self):
+        self._timer = None
+        queue = self._queue
+        if self._cancelled_count > max(
+            self.CANCELLED_COMPACT_THRESHOLD, len(queue) // 2
+        ):
+            self._queue = queue = [handle for handle in queue if not handle.cancelled]
+            heapq.heapify(queue)
+            self._cancelled_count = 0
+
+        now = self.loop.time()
+        while queue:
+            handle = queue[0]
+            if handle.cancelled:
+                heapq.heappop(queue)
+                self._cancelled_count -= 1
+                if handle in self._startup_inflight:
+                    self._startup_done(handle)
+                continue
+            if handle.when > now:
+                self._arm(handle.when)
+                return
+            heapq.heappop(queue)
+            # flag as consumed without accounting it in _cancelled_count
+            handle.cancelled = True
+            device = handle.device
+            task = device.async_create_task(
+                device._async_polling_callback(handle.namespace),
+                "._async_polling_callback",
+            )
+            if handle in self._startup_inflight:
+                task.add_done_callback(partial(self._startup_done, handle))
+
+    def _startup_run(self):
+        startup_queue = self._startup_queue
+        startup_inflight = self._startup_inflight
+        while startup_queue and (len(startup_inflight) < self.STARTUP_CONCURRENCY):
+            handle = startup_queue.popleft()
+            if handle.cancelled:
+                continue
+            # released handles go through the heap (dispatched by _run) so that
+            # the first polling cycle is not started inside the device setup
+            handle.staged = False
+            handle.when = self.loop.time()
+            heapq.heappush(self._queue, handle)
+            if (not self._timer) or (handle.when < self._timer_when):
+                self._arm(handle.when)
+            startup_inflight[handle] = self.loop.call_later(
+                self.STARTUP_TIMEOUT, self._startup_done, handle
+            )
+
+    def _startup_done(self, handle: PollingHandle, *args):
+        if timeout := self._startup_inflight.pop(handle, None):
+            timeout.cancel()
+            self._startup_run()
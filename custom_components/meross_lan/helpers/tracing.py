@@ -0,0 +1,331 @@
+"""
+    Trace files writer.
+
+    Trace records are handed to a background thread through a bounded ring
+    buffer (the oldest records are dropped when full) so that the event loop
+    never blocks on disk I/O. Payloads are serialized before queueing since
+    they could be modified afterwards in the loop.
+    Supported formats:
+    - csv: the legacy tab separated format (the one read by the emulator)
+    - ndjson: one json array [epoch, rxtx, protocol, method, namespace, data]
+    per line
+    - binary: the same json array prefixed by its length (4 bytes big endian)
+    Any format can be compressed (gzip or zstd when the 'zstandard' package is
+    available) and rotated in 'segments' when exceeding the size limit.
+    'convert_to_csv' converts any trace back to the legacy csv format.
+"""
+
+from collections import deque
+import gzip
+import os
+import struct
+import threading
+from time import localtime, strftime
+import typing
+
+from ..const import CONF_PROTOCOL_AUTO
+from ..merossclient import json_dumps, json_loads
+
+try:
+    import zstandard  # type: ignore
+except ImportError:
+    zstandard = None
+
+
+class TraceFormat:
+    CSV: typing.Final = "csv"
+    NDJSON: typing.Final = "ndjson"
+    BINARY: typing.Final = "binary"
+
+
+class TraceCompression:
+    NONE: typing.Final = None
+    GZIP: typing.Final = "gzip"
+    ZSTD: typing.Final = "zstd"
+
+
+FORMAT_EXTENSIONS: typing.Final = {
+    TraceFormat.CSV: ".csv",
+    TraceFormat.NDJSON: ".ndjson",
+    TraceFormat.BINARY: ".bin",
+}
+COMPRESSION_EXTENSIONS: typing.Final = {
+    TraceCompression.NONE: "",
+    TraceCompression.GZIP: ".gz",
+    TraceCompression.ZSTD: ".zst",
+}
+
+METHOD_LOG: typing.Final = "LOG"
+"""'method' column of the log records (the 'namespace' column carries the level)."""
+
+_RecordType = tuple[float, str, str, str, str, str]
+"""(epoch, rxtx, protocol, method, namespace, data) where data is json
+(or the plain message for METHOD_LOG records)"""
+
+
+def _format_time(epoch: float):
+    return strftime("%Y/%m/%d - %H:%M:%S", localtime(epoch))
+
+
+def _open_write(path: str, compression: str | None):
+    if compression == TraceCompression.GZIP:
+        return gzip.open(path, "wb")
+    if compression == TraceCompression.ZSTD:
+        compressor = zstandard.ZstdCompressor()  # type: ignore
+        return compressor.stream_writer(open(path, "wb"))
+    return open(path, "wb")
+
+
+def _open_read(path: str):
+    if path.endswith(COMPRESSION_EXTENSIONS[TraceCompression.GZIP]):
+        return gzip.open(path, "rb")
+    if path.endswith(COMPRESSION_EXTENSIONS[TraceCompression.ZSTD]):
+        if not zstandard:
+            raise Exception("zstandard package is needed to read .zst traces")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"))
+    return open(path, "rb")
+
+
+class TraceWriter:
+    """
+    Writes trace records to path_base + extension(s) (see module doc) in a
+    background thread. When 'segments' > 1 the trace is rotated every 'maxsize'
+    (uncompressed) bytes keeping at most 'segments' files (path_base.1, ...)
+    else it just stops (write returns False) once maxsize is exceeded.
+    """
+
+    BUFFER_SIZE: typing.ClassVar = 4096
+    """ring buffer size (records)"""
+
+    __slots__ = (
+        "path_base",
+        "format",
+        "compression",
+        "maxsize",
+        "segments",
+        "paths",
+        "dropped",
+        "error",
+        "_buffer",
+        "_condition",
+        "_closing",
+        "_stopped",
+        "_thread",
+    )
+
+    def __init__(
+        self,
+        path_base: str,
+        format: str = TraceFormat.CSV,
+        compression: str | None = TraceCompression.NONE,
+        maxsize: int = 0,
+        segments: int = 1,
+    ):
+        if (compression == TraceCompression.ZSTD) and not zstandard:
+            compression = TraceCompression.GZIP
+        self.path_base = path_base
+        self.format = format
+        self.compression = compression
+        self.maxsize = maxsize
+        self.segments = segments
+        self.paths: list[str] = []
+        """trace files written (the oldest could have been removed by rotation)"""
+        self.dropped = 0
+        """records dropped since the (background) writer couldn't keep the pace"""
+        self.error: Exception | None = None
+        self._buffer: deque[_RecordType] = deque(maxlen=self.BUFFER_SIZE)
+        self._condition = threading.Condition()
+        self._closing = False
+        self._stopped = False
+        self._thread = threading.Thread(
+            target=self._run, name=f"TraceWriter({os.path.basename(path_base)})"
+        )
+        self._thread.daemon = True
+
+    @property
+    def path(self):
+        """The trace file currently being written."""
+        return self.paths[-1] if self.paths else None
+
+    @property
+    def stopped(self):
+        return self._stopped
+
+    def open(self):
+        self._thread.start()
+
+    def close(self):
+        """Flushes the buffered records and closes the file (without waiting)."""
+        with self._condition:
+            self._closing = True
+            self._condition.notify()
+
+    def join(self, timeout: float | None = None):
+        self._thread.join(timeout)
+
+    def write(
+        self,
+        epoch: float,
+        rxtx: str,
+        protocol: str,
+        method: str,
+        namespace: str,
+        data: str,
+    ):
+        """
+        Queues a record (data is the json serialized payload or the message
+        for METHOD_LOG records). Returns False if the writer is not able to
+        accept records anymore (error or size limit).
+        """
+        if self._stopped:
+            return False
+        buffer = self._buffer
+        with self._condition:
+            if len(buffer) == self.BUFFER_SIZE:
+                self.dropped += 1
+            buffer.append((epoch, rxtx, protocol, method, namespace, data))
+            if len(buffer) == 1:
+                self._condition.notify()
+        return True
+
+    def _encode(self, record: _RecordType):
+        epoch, rxtx, protocol, method, namespace, data = record
+        if self.format == TraceFormat.CSV:
+            return (
+                "\t".join(
+                    (_format_time(epoch), rxtx, protocol, method, namespace, data)
+                )
+                + "\r\n"
+            ).encode("utf-8")
+        if method == METHOD_LOG:
+            data = json_dumps(data)
+        header = json_dumps([epoch, rxtx, protocol, method, namespace])
+        record_bytes = "".join((header[:-1], ",", data, "]")).encode("utf-8")
+        if self.format == TraceFormat.BINARY:
+            return struct.pack("!I", len(record_bytes)) + record_bytes
+        return record_bytes + b"\n"
+
+    def _open_segment(self, index: int):
+        paths = self.paths
+        path = "".join(
+            (
+                self.path_base,
+                f".{index}" if index else "",
+                FORMAT_EXTENSIONS[self.format],
+                COMPRESSION_EXTENSIONS[self.compression],
+            )
+        )
+        paths.append(path)
+        while len(paths) > self.segments:
+            try:
+                os.remove(paths.pop(0))
+            except OSError:
+                pass
+        return _open_write(path, self.compression)
+
+    def _run(self):
+        buffer = self._buffer
+        condition = self._condition
+        file = None
+        size = 0
+        dropped = 0
+        segment = 0
+        try:
+            os.makedirs(os.path.dirname(self.path_base), exist_ok=True)
+            file = self._open_segment(segment)
+            while True:
+                with condition:
+                    while not (buffer or self._closing):
+                        condition.wait()
+                    records = list(buffer)
+                    buffer.clear()
+                    closing = self._closing
+                    if self.dropped != dropped:
+                        message = f"{self.dropped - dropped} trace records dropped"
+                        records.append(
+                            (
+                                records[-1][0] if records else 0,
+                                "",
+                                CONF_PROTOCOL_AUTO,
+                                METHOD_LOG,
+                                "WARNING",
+                                message,
+                            )
+                        )
+                        dropped = self.dropped
+                for record in records:
+                    data = self._encode(record)
+                    if self.maxsize and (size + len(data) > self.maxsize):
+                        file.close()
+                        file = None
+                        if self.segments <= 1:
+                            self._stopped = True
+                            return
+                        segment += 1
+                        file = self._open_segment(segment)
+                        size = 0
+                    file.write(data)
+                    size += len(data)
+                if closing:
+                    return
+                file.flush()
+        except Exception as exception:
+            self.error = exception
+        finally:
+            self._stopped = True
+            if file:
+                try:
+                    file.close()
+                except Exception as exception:
+                    self.error = self.error or exception
+
+
+def is_trace_file(path: str):
+    """Checks the file name is an ndjson or binary trace (eventually compressed)."""
+    for extension in COMPRESSION_EXTENSIONS.values():
+        if extension and path.endswith(extension):
+            path = path[: -len(extension)]
+            break
+    return path.endswith(
+        (FORMAT_EXTENSIONS[TraceFormat.NDJSON], FORMAT_EXTENSIONS[TraceFormat.BINARY])
+    )
+
+
+def read_records(path: str) -> typing.Iterator[list]:
+    """
+    Parses an ndjson or binary trace (possibly compressed) returning the
+    records as [epoch, rxtx, protocol, method, namespace, data] lists.
+    """
+    with _open_read(path) as file:
+        if FORMAT_EXTENSIONS[TraceFormat.BINARY] in os.path.basename(path):
+            while header := file.read(4):
+                yield json_loads(file.read(struct.unpack("!I", header)[0]))
+        else:
+            for line in file:
+                if line := line.strip():
+                    yield json_loads(line)
+
+
+def convert_to_csv(path: str, path_csv: str | None = None):
+    """Converts an ndjson or binary trace to the legacy csv format."""
+    if not path_csv:
+        path_csv = path
+        for extension in (
+            *COMPRESSION_EXTENSIONS.values(),
+            FORMAT_EXTENSIONS[TraceFormat.NDJSON],
+            FORMAT_EXTENSIONS[TraceFormat.BINARY],
+        ):
+            if extension and path_csv.endswith(extension):
+                path_csv = path_csv[: -len(extension)]
+        path_csv += FORMAT_EXTENSIONS[TraceFormat.CSV]
+    with open(path_csv, "w", encoding="utf8", newline="") as file:
+        for epoch, rxtx, protocol, method, namespace, data in read_records(path):
+            if method != METHOD_LOG:
+                data = json_dumps(data)
+            file.write(
+                "\t".join(
+                    (_format_time(epoch), rxtx, protocol, method, namespace, data)
+                )
+                + "\r\n"
+            )
+    return path_csv
@@ -29,6 +29,8 @@ from .const import (
     CONF_PROTOCOL_HTTP,
     CONF_PROTOCOL_MQTT,
     CONF_PROTOCOL_OPTIONS,
+    CONF_PUSH_DEDUP,
+    CONF_RESPONSE_SIZE_MAX,
     CONF_TIMESTAMP,
     DOMAIN,
     PARAM_HEADER_SIZE,
@@ -41,7 +43,15 @@ from .const import (
     DeviceConfigType,
 )
 from .helpers import async_import_module, async_load_zoneinfo, datetime_from_epoch
-from .helpers.manager import ApiProfile, ConfigEntryManager, EntityManager, ManagerState
+from .helpers.jsonlog import JsonLinesFormatter
+from .helpers.manager import (
+    ApiProfile,
+    ConfigEntryManager,
+    EntityManager,
+    ManagerState,
+    MessageDump,
+)
+from .helpers.metrics import DeviceMetrics
 from .helpers.namespaces import NamespaceHandler
 from .merossclient import (
     HostAddress,
@@ -58,7 +68,7 @@ from .merossclient import (
 )
 from .merossclient.httpclient import MerossHttpClient, TerminatedException
 from .repairs import IssueSeverity, create_issue, remove_issue
-from .sensor import ProtocolSensor
+from .sensor import MLMetricsSensor, ProtocolSensor
 from .update import MLUpdate
 
 if typing.TYPE_CHECKING:
@@ -66,6 +76,7 @@ if typing.TYPE_CHECKING:
     from homeassistant.config_entries import ConfigEntry
     from homeassistant.core import HomeAssistant
 
+    from .helpers import Loggable
     from .helpers.namespaces import NamespaceParser
     from .meross_entity import MerossEntity
     from .meross_profile import MQTTConnection
@@ -133,6 +144,43 @@ class DeviceType(Enum):
     SUBDEVICE = 3
 
 
+class DeviceInitPlan:
+    """
+    The initializers (modules imported and functions looked up) resolved for a
+    device 'shape' i.e. its set of abilities and digest keys. Devices sharing
+    the same shape (same type/firmware) will just replay it.
+    See MerossDevice.async_get_init_plan.
+    """
+
+    __slots__ = (
+        "namespace_inits",
+        "digest_inits",
+        "device_class",
+    )
+
+    def __init__(self):
+        self.namespace_inits: "list[tuple[str, NamespaceInitFunc]]" = []
+        self.digest_inits: "dict[str, DigestInitFunc]" = {}
+        self.device_class: "type[MerossDevice] | None" = None
+        """the (mixin) class built by MerossApi.async_build_device"""
+
+
+class InflightRequest:
+    """
+    A GET request shared by identical callers (see
+    MerossDevice._async_request_singleflight).
+    """
+
+    __slots__ = (
+        "task",
+        "waiters",
+    )
+
+    def __init__(self, task: "asyncio.Task[MerossResponse | None]"):
+        self.task = task
+        self.waiters = 0
+
+
 class MerossDeviceBase(EntityManager):
     """
     Abstract base class for MerossDevice and MerossSubDevice (from hub)
@@ -316,6 +364,9 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
     init/parsing will not harm.
     """
 
+    INIT_PLANS: typing.Final[dict[typing.Hashable, DeviceInitPlan]] = {}
+    """Process-wide cache of the init plans (see async_get_init_plan)."""
+
     NAMESPACE_INIT: typing.Final[dict[str, typing.Any]] = {
         mn.Appliance_Config_OverTemp.name: (".devices.mss", "OverTempEnableSwitch"),
         mn.Appliance_Control_ConsumptionConfig.name: (
@@ -372,6 +423,13 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
     and this could have consequences in the order of polls
     """
 
+    RESPONSE_SIZE_MAX_MODELS: typing.Final[dict[str, int]] = {}
+    """
+    Static dict of learned device_response_size_max (see _update_response_size_max)
+    keyed by model so that devices of the same model can start with a sensible
+    limit instead of relearning it through overflows.
+    """
+
     DEFAULT_PLATFORMS = ConfigEntryManager.DEFAULT_PLATFORMS | {
         MLUpdate.PLATFORM: None,
     }
@@ -393,12 +451,14 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
         "descriptor",
         "tz",
         "polling_period",
+        "push_dedup",
         "_polling_delay",
         "conf_protocol",
         "pref_protocol",
         "curr_protocol",
         "needsave",
         "_entry_update_unsub",
+        "_entry_update_query_abilities",
         "device_debug",
         "device_info",
         "device_timestamp",
@@ -429,11 +489,15 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
         "_polling_epoch",
         "_polling_callback_unsub",
         "_polling_callback_shutdown",
+        "startup_begin",
+        "startup_time",
         "_queued_smartpoll_requests",
+        "_requests_inflight",
+        "requests_collapsed",
+        "metrics",
+        "sensors_metrics",
         "multiple_max",
-        "_multiple_len",
         "_multiple_requests",
-        "_multiple_response_size",
         "_timezone_next_check",
         "_trace_ability_callback_unsub",
         "_diagnostics_build",
@@ -452,6 +516,7 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
         self.tz = UTC
         self.needsave = False
         self._entry_update_unsub = None
+        self._entry_update_query_abilities = False
         self.curr_protocol = CONF_PROTOCOL_AUTO
         self.device_debug = None
         self.device_info = None
@@ -484,14 +549,20 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
         self._polling_epoch = 0.0
         self._polling_callback_unsub = None
         self._polling_callback_shutdown = None
+        self.startup_begin = 0.0
+        """loop time at start() (see startup_time)"""
+        self.startup_time: float | None = None
+        """time to first state i.e. from start() to the device being online"""
         self._queued_smartpoll_requests = 0
+        self._requests_inflight: dict[tuple, InflightRequest] = {}
+        self.requests_collapsed = 0
+        self.metrics = DeviceMetrics()
+        self.sensors_metrics: list[MLMetricsSensor] = []
         ability = descriptor.ability
         self.multiple_max: int = ability.get(
             mn.Appliance_Control_Multiple.name, {}
         ).get("maxCmdNum", 0)
-        self._multiple_len = self.multiple_max
-        self._multiple_requests: list["MerossRequestType"] = []
-        self._multiple_response_size = PARAM_HEADER_SIZE
+        self._multiple_requests: list[tuple["MerossRequestType", int]] = []
         self._timezone_next_check = (
             0 if mn.Appliance_System_Time.name in ability else PARAM_INFINITE_TIMEOUT
         )
@@ -513,6 +584,13 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
         self.sensor_protocol = ProtocolSensor(self)
         self.update_firmware = None
 
+        if response_size_max := self.config.get(
+            CONF_RESPONSE_SIZE_MAX
+        ) or MerossDevice.RESPONSE_SIZE_MAX_MODELS.get(descriptor.productmodel):
+            self.device_response_size_max = response_size_max
+            if self.device_response_size_min > response_size_max:
+                self.device_response_size_min = response_size_max
+
         self._update_config()
 
         # the update entity will only be instantiated 'on demand' since
@@ -536,82 +614,114 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
             except:
                 pass
 
-        for namespace, ns_init_func in MerossDevice.NAMESPACE_INIT.items():
-            if namespace not in descriptor.ability:
-                continue
-            try:
-                try:
-                    ns_init_func(self)
-                except TypeError:
-                    try:
-                        ns_init_func = getattr(
-                            await async_import_module(ns_init_func[0]),
-                            ns_init_func[1],
-                        )
-                    except Exception as exception:
-                        self.log_exception(
-                            self.WARNING,
-                            exception,
-                            "loading namespace initializer for %s",
-                            namespace,
-                        )
-                        ns_init_func = MerossDevice.namespace_init_empty
-                    MerossDevice.NAMESPACE_INIT[namespace] = ns_init_func
-                    ns_init_func(self)
+        init_plan = await MerossDevice.async_get_init_plan(descriptor, self)
 
+        for namespace, ns_init_func in init_plan.namespace_inits:
+            try:
+                ns_init_func(self)
             except Exception as exception:
                 self.log_exception(
                     self.WARNING, exception, "initializing namespace %s", namespace
                 )
 
+        digest_inits = init_plan.digest_inits
         for key_digest, _digest in (
             descriptor.digest.items() or descriptor.control.items()
         ):
             # older firmwares (MSS110 with 1.1.28) look like
             # carrying 'control' instead of 'digest'
             try:
-                try:
-                    self.digest_handlers[key_digest], _digest_pollers = (
-                        MerossDevice.DIGEST_INIT[key_digest](self, _digest)
-                    )
-                except (KeyError, TypeError):
-                    # KeyError: key is unknown to our code (fallback to lookup ".devices.{key_digest}")
-                    # TypeError: key is a string containing the module path
-                    try:
-                        _module_path = MerossDevice.DIGEST_INIT.get(
-                            key_digest, f".devices.{key_digest}"
-                        )
-                        digest_init_func: DigestInitFunc = getattr(
-                            await async_import_module(_module_path),
-                            f"digest_init_{key_digest}",
-                        )
-                    except Exception as exception:
-                        self.log_exception(
-                            self.WARNING,
-                            exception,
-                            "loading digest initializer for key '%s'",
-                            key_digest,
-                        )
-                        digest_init_func = MerossDevice.digest_init_empty
-                    MerossDevice.DIGEST_INIT[key_digest] = digest_init_func
-                    self.digest_handlers[key_digest], _digest_pollers = (
-                        digest_init_func(self, _digest)
-                    )
+                self.digest_handlers[key_digest], _digest_pollers = digest_inits[
+                    key_digest
+                ](self, _digest)
                 self.digest_pollers.update(_digest_pollers)
-
             except Exception as exception:
                 self.log_exception(
                     self.WARNING, exception, "initializing digest key '%s'", key_digest
                 )
                 self.digest_handlers[key_digest] = MerossDevice.digest_parse_empty
 
+    @staticmethod
+    def get_init_plan_key(descriptor: "MerossDeviceDescriptor"):
+        return (
+            frozenset(descriptor.ability),
+            frozenset(descriptor.digest or descriptor.control),
+        )
+
+    @staticmethod
+    async def async_get_init_plan(
+        descriptor: "MerossDeviceDescriptor", logger: "Loggable"
+    ):
+        """
+        Returns the (cached) init plan for the abilities/digest keys in descriptor.
+        When building a new one, the initializers (either 'well known' in
+        NAMESPACE_INIT/DIGEST_INIT or looked up in meross_lan/devices) get resolved
+        and stored back in the respective dicts so that the lookup is done once.
+        """
+        init_plan_key = MerossDevice.get_init_plan_key(descriptor)
+        try:
+            return MerossDevice.INIT_PLANS[init_plan_key]
+        except KeyError:
+            pass
+
+        init_plan = DeviceInitPlan()
+        ability = descriptor.ability
+        for namespace, ns_init_func in MerossDevice.NAMESPACE_INIT.items():
+            if namespace not in ability:
+                continue
+            if type(ns_init_func) is tuple:
+                try:
+                    ns_init_func = getattr(
+                        await async_import_module(ns_init_func[0]),
+                        ns_init_func[1],
+                    )
+                except Exception as exception:
+                    logger.log_exception(
+                        logger.WARNING,
+                        exception,
+                        "loading namespace initializer for %s",
+                        namespace,
+                    )
+                    ns_init_func = MerossDevice.namespace_init_empty
+                MerossDevice.NAMESPACE_INIT[namespace] = ns_init_func
+            init_plan.namespace_inits.append((namespace, ns_init_func))
+
+        for key_digest in init_plan_key[1]:
+            # a str is the module path: either configured or, when the key
+            # is unknown to our code, the fallback ".devices.{key_digest}"
+            digest_init_func = MerossDevice.DIGEST_INIT.get(
+                key_digest, f".devices.{key_digest}"
+            )
+            if type(digest_init_func) is str:
+                try:
+                    digest_init_func = getattr(
+                        await async_import_module(digest_init_func),
+                        f"digest_init_{key_digest}",
+                    )
+                except Exception as exception:
+                    logger.log_exception(
+                        logger.WARNING,
+                        exception,
+                        "loading digest initializer for key '%s'",
+                        key_digest,
+                    )
+                    digest_init_func = MerossDevice.digest_init_empty
+                MerossDevice.DIGEST_INIT[key_digest] = digest_init_func
+            init_plan.digest_inits[key_digest] = digest_init_func
+
+        MerossDevice.INIT_PLANS[init_plan_key] = init_plan
+        return init_plan
+
     def start(self):
         # called by async_setup_entry after the entities have been registered
         # here we'll register mqtt listening (in case) and start polling after
         # the states have been eventually restored (some entities need this)
         self._check_protocol_ext()
-        self._polling_callback_unsub = self.schedule_async_callback(
-            0, self._async_polling_callback, None
+        # staged startup: the first polling cycle is released by the scheduler
+        # at a steady pace
+        self.startup_begin = self.hass.loop.time()
+        self._polling_callback_unsub = ApiProfile.api.polling_scheduler.schedule_start(
+            self
         )
         self.state = ManagerState.STARTED
 
@@ -645,6 +755,11 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
 
     async def async_create_diagnostic_entities(self):
         self._diagnostics_build = True  # set a flag cause we'll lazy scan/build
+        if not self.sensors_metrics:
+            self.sensors_metrics = [
+                MLMetricsSensor(self, protocol)
+                for protocol in (CONF_PROTOCOL_HTTP, CONF_PROTOCOL_MQTT)
+            ]
         await super().async_create_diagnostic_entities()
 
     async def async_destroy_diagnostic_entities(self, remove: bool = False):
@@ -655,6 +770,7 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
                 is NamespaceHandler.async_poll_diagnostic
             ):
                 namespace_handler.polling_strategy = None
+        self.sensors_metrics = []
         await super().async_destroy_diagnostic_entities(remove)
 
     def get_logger_name(self) -> str:
@@ -708,6 +824,7 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
         self.digest_pollers = None  # type: ignore
         self.lazypoll_requests = None  # type: ignore
         self.sensor_protocol = None  # type: ignore
+        self.sensors_metrics = []
         self.update_firmware = None
         ApiProfile.devices[self.id] = None
 
@@ -724,6 +841,18 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
         signature. It is left for meross_lan.request service implementation but should be removed
         since very 'fragile'
         """
+        if request.method == mc.METHOD_GET:
+            return await self._async_request_singleflight(
+                (request.namespace, request.method, json_dumps(request.payload)),
+                self._async_request_raw,
+                request,
+            )
+        return await self._async_request_raw(request)
+
+    async def _async_request_raw(
+        self,
+        request: MerossRequest,
+    ) -> MerossResponse | None:
         self.lastrequest = time()
         mqttfailed = False
         if self.curr_protocol is CONF_PROTOCOL_MQTT:
@@ -761,6 +890,22 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
         current protocol. When switching transport the message is recomputed to
         avoid reusing the same (old) timestamps and messageids
         """
+        if method == mc.METHOD_GET:
+            return await self._async_request_singleflight(
+                (namespace, method, json_dumps(payload)),
+                self._async_request,
+                namespace,
+                method,
+                payload,
+            )
+        return await self._async_request(namespace, method, payload)
+
+    async def _async_request(
+        self,
+        namespace: str,
+        method: str,
+        payload: "MerossPayloadType",
+    ) -> MerossResponse | None:
         self.lastrequest = time()
         mqttfailed = False
         if self.curr_protocol is CONF_PROTOCOL_MQTT:
@@ -787,6 +932,50 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
 
         return None
 
+    async def _async_request_singleflight(
+        self,
+        key: tuple,
+        request_func: typing.Callable[
+            ..., typing.Coroutine[typing.Any, typing.Any, MerossResponse | None]
+        ],
+        *args,
+    ):
+        """
+        Identical GETs (same namespace, method and payload) issued while one is
+        already in flight (polling, heartbeat, service calls...) will share
+        that request response instead of doing their own roundtrip.
+        The request runs in its own task so that a caller being cancelled
+        doesn't affect the others: it is only cancelled when nobody waits for it.
+        """
+        if inflight := self._requests_inflight.get(key):
+            self.requests_collapsed += 1
+        else:
+            inflight = InflightRequest(
+                self.async_create_task(
+                    request_func(*args), f"._async_request({key[0]})"
+                )
+            )
+            if inflight.task.done():
+                # eagerly completed
+                return inflight.task.result()
+            self._requests_inflight[key] = inflight
+            inflight.task.add_done_callback(
+                lambda _task: self._requests_inflight_pop(key, inflight)
+            )
+        inflight.waiters += 1
+        try:
+            return await asyncio.shield(inflight.task)
+        finally:
+            inflight.waiters -= 1
+            if not (inflight.waiters or inflight.task.done()):
+                # don't let new callers join a cancelling request
+                self._requests_inflight_pop(key, inflight)
+                inflight.task.cancel()
+
+    def _requests_inflight_pop(self, key: tuple, inflight: InflightRequest):
+        if self._requests_inflight.get(key) is inflight:
+            del self._requests_inflight[key]
+
     def check_device_timezone(self):
         """
         Verifies the device timezone has the same utc offset as HA local timezone.
@@ -807,6 +996,12 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
             translation_placeholders={"device_name": self.name},
         )
 
+    def _set_online(self):
+        super()._set_online()
+        if (self.startup_time is None) and self.startup_begin:
+            self.startup_time = self.hass.loop.time() - self.startup_begin
+            self.log(self.DEBUG, "Time to first state: %.2f s", self.startup_time)
+
     def _set_offline(self):
         super()._set_offline()
         self._polling_delay = self.polling_period
@@ -814,6 +1009,8 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
         self.device_debug = None
         for handler in self.namespace_handlers.values():
             handler.polling_epoch_next = 0.0
+            # the device state is unknown after an outage: don't drop the first PUSHes
+            handler.push_lastvalues.clear()
 
     def get_type(self) -> DeviceType:
         return DeviceType.DEVICE
@@ -909,16 +1106,17 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
     def schedule_entry_update(self, query_abilities: bool):
         """
         Schedule the ConfigEntry update due to self.descriptor changing.
+        Any update requested while one is already pending is merged into that
+        (so that we only write the entry once) and the abilities are refreshed
+        if any of them asked so.
         """
-        if self._entry_update_unsub:
-            self._entry_update_unsub.cancel()
-        self._entry_update_unsub = self.schedule_async_callback(
-            5,
-            self._async_entry_update,
-            query_abilities,
-        )
+        self._entry_update_query_abilities |= query_abilities
+        if not self._entry_update_unsub:
+            self._entry_update_unsub = self.schedule_async_callback(
+                5, self._async_entry_update
+            )
 
-    async def _async_entry_update(self, query_abilities: bool):
+    async def _async_entry_update(self):
         """
         Called when we detect any meaningful change in the device descriptor
         that needs to be stored in configuration.
@@ -931,6 +1129,8 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
         execution which independently queries the device itself.
         """
         self._entry_update_unsub = None
+        query_abilities = self._entry_update_query_abilities
+        self._entry_update_query_abilities = False
         self.needsave = False
 
         with self.exception_warning("_async_entry_update"):
@@ -939,6 +1139,7 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
                 data = dict(entry.data)
                 data[CONF_TIMESTAMP] = time()  # force ConfigEntry update..
                 data[CONF_PAYLOAD][mc.KEY_ALL] = self.descriptor.all
+                data[CONF_RESPONSE_SIZE_MAX] = int(self.device_response_size_max)
                 if query_abilities and (
                     response := await self.async_request(
                         *mn.Appliance_System_Ability.request_default
@@ -1056,9 +1257,7 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
 
     def disable_multiple(self):
         self.multiple_max = 0
-        self._multiple_len = 0
-        self._multiple_requests: list["MerossRequestType"] = []
-        self._multiple_response_size = PARAM_HEADER_SIZE
+        self._multiple_requests = []
 
     async def async_multiple_requests_ack(
         self, requests: typing.Collection["MerossRequestType"], auto_handle: bool = True
@@ -1091,47 +1290,73 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
         ):
             if auto_handle:
                 multiple_responses = multiple_response[mc.KEY_PAYLOAD][mc.KEY_MULTIPLE]
-                for message in multiple_responses:
-                    self._handle(
-                        message[mc.KEY_HEADER],
-                        message[mc.KEY_PAYLOAD],
-                    )
+                self._handle_multiple(multiple_responses)
                 return multiple_responses
             return multiple_response[mc.KEY_PAYLOAD][mc.KEY_MULTIPLE]
 
     async def async_multiple_requests_flush(self):
         multiple_requests = self._multiple_requests
-        multiple_response_size = self._multiple_response_size
-        self._multiple_len = self.multiple_max
+        if not multiple_requests:
+            return
         self._multiple_requests = []
-        self._multiple_response_size = PARAM_HEADER_SIZE
+        for requests, response_size in self._multiple_requests_plan(multiple_requests):
+            if not self._online:
+                return
+            await self._async_multiple_requests_send(requests, response_size)
 
+    def _multiple_requests_plan(
+        self, multiple_requests: list[tuple["MerossRequestType", int]]
+    ):
+        """
+        Packs the queued poll requests into as few NS_MULTIPLE messages as
+        possible based on their (learned) response size estimate, every message
+        being bounded by device_response_size_max and multiple_max. Requests are
+        packed in their original order (across messages too) since some parsers
+        depend on the others (i.e. ConsumptionX relies on the energy estimate
+        updated by Electricity) so that this is just a greedy sequential fill.
+        Lazy pollers are then used to fill in the remaining room.
+        """
+        response_size_max = self.device_response_size_max
+        multiple_max = self.multiple_max
+        # bins items: [requests, response size]
+        bins: list[list] = []
+        _bin = None
+        for request, response_size in multiple_requests:
+            if (
+                _bin
+                and (len(_bin[0]) < multiple_max)
+                and ((_bin[1] + response_size) < response_size_max)
+            ):
+                _bin[0].append(request)
+                _bin[1] += response_size
+            else:
+                _bin = [[request], PARAM_HEADER_SIZE + response_size]
+                bins.append(_bin)
+
+        result: list[tuple[list["MerossRequestType"], int]] = []
+        lazypoll_requests = self.lazypoll_requests
+        for requests, response_size in bins:
+            # lazy pollers are ordered by 'oldest polled first' so
+            # the first is the one which hasn't been polled since longer
+            for handler in list(lazypoll_requests):
+                if len(requests) >= multiple_max:
+                    break
+                if (handler.polling_response_size + response_size) < response_size_max:
+                    handler.lastrequest = time()
+                    handler.polling_epoch_next = (
+                        handler.lastrequest + handler.polling_period
+                    )
+                    requests.append(handler.polling_request)
+                    lazypoll_requests.remove(handler)
+                    response_size += handler.polling_response_size
+            result.append((requests, response_size))
+        return result
+
+    async def _async_multiple_requests_send(
+        self, multiple_requests: list["MerossRequestType"], multiple_response_size: int
+    ):
         requests_len = len(multiple_requests)
         while self.online and requests_len:
-            lazypoll_requests = self.lazypoll_requests
-            while (requests_len < self.multiple_max) and lazypoll_requests:
-                # we have space available in current ns_multiple and lazy pollers are waiting
-                for handler in lazypoll_requests:
-                    # lazy pollers are ordered by 'oldest polled first' so
-                    # the first is the one which hasn't been polled since longer
-                    # we then decide to add to the current ns_multiple the first that would fit in
-                    if (
-                        handler.polling_response_size + multiple_response_size
-                    ) < self.device_response_size_max:
-                        handler.lastrequest = time()
-                        handler.polling_epoch_next = (
-                            handler.lastrequest + handler.polling_period
-                        )
-                        multiple_requests.append(handler.polling_request)
-                        lazypoll_requests.remove(handler)
-                        multiple_response_size += handler.polling_response_size
-                        requests_len += 1
-                        # check if we can add more
-                        break  # for
-                else:
-                    # no lazy_poller could match..break out of while
-                    break  # while
-
             if requests_len == 1:
                 await self.async_request(*multiple_requests[0])
                 return
@@ -1164,6 +1389,7 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
                 # msl bulb timeouts completely on MQTT, so the response to our mqtt requests
                 # is None again. At this point, if the device is still online we're
                 # trying a last resort issue of single requests
+                self.metrics.multiple_failures += 1
                 if self._online:
                     self.log(
                         self.DEBUG,
@@ -1174,13 +1400,9 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
                     # Here we reduce the device_response_size_max so that
                     # next ns_multiple will be less demanding. device_response_size_min
                     # is another dynamic param representing the biggest payload ever received
-                    self.device_response_size_max = (
-                        self.device_response_size_max + self.device_response_size_min
-                    ) / 2
-                    self.log(
-                        self.DEBUG,
-                        "Updating device_response_size_max:%d",
-                        self.device_response_size_max,
+                    self._update_response_size_max(
+                        (self.device_response_size_max + self.device_response_size_min)
+                        / 2
                     )
                     for request in multiple_requests:
                         await self.async_request(*request)
@@ -1190,6 +1412,10 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
 
             multiple_responses = response[mc.KEY_PAYLOAD][mc.KEY_MULTIPLE]
             responses_len = len(multiple_responses)
+            response_size = len(response.json())
+            self.metrics.record_multiple(
+                requests_len, response_size, self.device_response_size_max
+            )
             if self.isEnabledFor(self.DEBUG):
                 self.log(
                     self.DEBUG,
@@ -1197,27 +1423,31 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
                     requests_len,
                     responses_len,
                     multiple_response_size,
-                    len(response.json()),
+                    response_size,
                 )
             message: "MerossMessageType"
             if responses_len == requests_len:
                 # faster shortcut
-                for message in multiple_responses:
-                    self._handle(
-                        message[mc.KEY_HEADER],
-                        message[mc.KEY_PAYLOAD],
+                if multiple_response_size > PARAM_HEADER_SIZE:
+                    # we cannot measure every single response in the pack so we'll
+                    # correct the estimates of the involved handlers in proportion
+                    response_size_ratio = (response_size - PARAM_HEADER_SIZE) / (
+                        multiple_response_size - PARAM_HEADER_SIZE
                     )
+                    namespace_handlers = self.namespace_handlers
+                    for request in multiple_requests:
+                        if handler := namespace_handlers.get(request[0]):
+                            handler.polling_response_size_update(
+                                int(handler.polling_response_size * response_size_ratio)
+                            )
+                self._handle_multiple(multiple_responses)
                 return
             # the requests payload was too big and the response was
             # truncated. the http client tried to 'recover' by discarding
             # the incomplete payloads so we'll check what's missing
+            self._handle_multiple(multiple_responses)
             for message in multiple_responses:
-                m_header = message[mc.KEY_HEADER]
-                self._handle(
-                    m_header,
-                    message[mc.KEY_PAYLOAD],
-                )
-                namespace = m_header[mc.KEY_NAMESPACE]
+                namespace = message[mc.KEY_HEADER][mc.KEY_NAMESPACE]
                 for request in multiple_requests:
                     if request[0] == namespace:
                         multiple_requests.remove(request)
@@ -1226,6 +1456,27 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
             requests_len = len(multiple_requests)
             multiple_response_size = -1  # logging purpose
 
+    def _update_response_size_max(self, response_size_max: float):
+        """
+        Sets the learned device_response_size_max following a device overflow.
+        This is shared with devices of the same model (see RESPONSE_SIZE_MAX_MODELS)
+        and persisted in the config entry so that we don't have to relearn it.
+        """
+        self.device_response_size_max = response_size_max = int(response_size_max)
+        if self.device_response_size_min > response_size_max:
+            self.device_response_size_min = response_size_max
+        MerossDevice.RESPONSE_SIZE_MAX_MODELS[self.descriptor.productmodel] = (
+            response_size_max
+        )
+        self.log(
+            self.DEBUG,
+            "Updating device_response_size_min:%d device_response_size_max:%d",
+            self.device_response_size_min,
+            response_size_max,
+        )
+        if self.config.get(CONF_RESPONSE_SIZE_MAX) != response_size_max:
+            self.schedule_entry_update(False)
+
     async def async_mqtt_request_raw(
         self,
         request: "MerossMessage",
@@ -1238,15 +1489,29 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
                 "Attempting to use async_mqtt_request with no publishing profile",
             )
             return None
-        self._mqtt_lastrequest = time()
+        self._mqtt_lastrequest = request_epoch = time()
         self._trace_or_log(
-            self._mqtt_lastrequest,
+            request_epoch,
             request,
             CONF_PROTOCOL_MQTT,
             self.TRACE_TX,
         )
         self._queued_smartpoll_requests += 1
-        return await self._mqtt_publish.async_mqtt_publish(self.id, request)
+        response = await self._mqtt_publish.async_mqtt_publish(self.id, request)
+        if request.method in mc.METHOD_ACK_MAP:
+            # else we're not expecting any response (PUSH)
+            if response:
+                self.metrics.record_request(
+                    CONF_PROTOCOL_MQTT,
+                    request.namespace,
+                    time() - request_epoch,
+                    request.json_size(),
+                )
+            else:
+                self.metrics.record_failure(
+                    CONF_PROTOCOL_MQTT, request.json_size(), True
+                )
+        return response
 
     async def async_mqtt_request(
         self,
@@ -1281,15 +1546,35 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
             )
             return None
 
-        self._http_lastrequest = time()
+        self._http_lastrequest = request_epoch = time()
         self._trace_or_log(
-            self._http_lastrequest,
+            request_epoch,
             request,
             CONF_PROTOCOL_HTTP,
             self.TRACE_TX,
         )
+        method = request.method
+        if method == mc.METHOD_GET:
+            # polls (GET) are queued behind commands
+            priority = MerossHttpClient.PRIORITY_LOW
+        elif request.namespace is mn.Appliance_Control_Multiple.name:
+            # this is almost always carrying packed polls
+            priority = MerossHttpClient.PRIORITY_LOW
+        elif method == mc.METHOD_SET:
+            priority = MerossHttpClient.PRIORITY_HIGH
+        else:
+            priority = MerossHttpClient.PRIORITY_DEFAULT
+        request_json = request.json()
+        metrics = self.metrics
         try:
-            response = await http.async_request_raw(request.json())
+            response = await http.async_request_raw(request_json, priority)
+            metrics.record_request(
+                CONF_PROTOCOL_HTTP,
+                request.namespace,
+                time() - request_epoch,
+                len(request_json),
+            )
+            metrics.record_bytes_in(CONF_PROTOCOL_HTTP, response.json_size())
         except TerminatedException:
             return None
         except JSONDecodeError as jsonerror:
@@ -1305,20 +1590,15 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
                 str(jsonerror),
             )
             response_text = jsonerror.doc
+            # the device replied though: account it as an error
+            metrics.record_failure(CONF_PROTOCOL_HTTP, len(request_json), False)
+            metrics.record_bytes_in(CONF_PROTOCOL_HTTP, len(response_text))
             response_text_len_safe = int(len(response_text) * 0.9)
             if jsonerror.pos < response_text_len_safe:
                 # if the error is too early in the payload...
                 return None
             # the error happened because of truncated json payload
-            self.device_response_size_max = response_text_len_safe
-            if self.device_response_size_min > response_text_len_safe:
-                self.device_response_size_min = response_text_len_safe
-            self.log(
-                self.DEBUG,
-                "Updating device_response_size_min:%d device_response_size_max:%d",
-                self.device_response_size_min,
-                self.device_response_size_max,
-            )
+            self._update_response_size_max(response_text_len_safe)
             if request.namespace is not mn.Appliance_Control_Multiple.name:
                 return None
             # try to recover NS_MULTIPLE by discarding the incomplete
@@ -1328,9 +1608,15 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
                 return None
             response_text = response_text[0:trunc_pos] + "]}}"
             response = MerossResponse(response_text)
+            metrics.truncation_recoveries += 1
 
         except Exception as exception:
             namespace = request.namespace
+            metrics.record_failure(
+                CONF_PROTOCOL_HTTP,
+                len(request_json),
+                isinstance(exception, asyncio.TimeoutError),
+            )
             self.log(
                 self.DEBUG,
                 "HTTP ERROR %s %s (messageId:%s %s:%s)",
@@ -1393,25 +1679,14 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
     async def async_request_poll(self, handler: NamespaceHandler):
         handler.lastrequest = self._polling_epoch
         handler.polling_epoch_next = handler.lastrequest + handler.polling_period
-        if self._multiple_len and (
+        if self.multiple_max and (
             handler.polling_response_size < self.device_response_size_max
         ):
             # device supports NS_APPLIANCE_CONTROL_MULTIPLE namespace
-            # so we pack this request
-            multiple_response_size = (
-                self._multiple_response_size + handler.polling_response_size
+            # so we queue this request for packing (see async_multiple_requests_flush)
+            self._multiple_requests.append(
+                (handler.polling_request, handler.polling_response_size)
             )
-            if multiple_response_size > self.device_response_size_max:
-                await self.async_multiple_requests_flush()
-                multiple_response_size = (
-                    self._multiple_response_size + handler.polling_response_size
-                )
-            self._multiple_requests.append(handler.polling_request)
-            self._multiple_response_size = multiple_response_size
-            self._multiple_len -= 1
-            if self._multiple_len:
-                return
-            await self.async_multiple_requests_flush()
         else:
             await self.async_request(*handler.polling_request)
 
@@ -1600,20 +1875,77 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
                 self._polling_callback_shutdown.set_result(True)
                 self._polling_callback_shutdown = None
             else:
-                self._polling_callback_unsub = self.schedule_async_callback(
-                    self._polling_delay, self._async_polling_callback, None
-                )
+                self._polling_schedule(self._polling_next_delay(), None)
+            for sensor_metrics in self.sensors_metrics:
+                sensor_metrics.update_metrics()
             self.log(self.DEBUG, "Polling end")
 
-    def mqtt_receive(self, message: "MerossResponse"):
-        assert self._mqtt_connected
+    def _polling_schedule(self, delay: float, namespace: str | None):
+        self._polling_callback_unsub = ApiProfile.api.polling_scheduler.schedule(
+            delay, self, namespace
+        )
+
+    def _polling_next_delay(self):
+        """
+        Computes the delay for the next polling cycle. When offline this is just the
+        (progressively increasing) _polling_delay. When online we check the polling
+        handlers to see when the earliest one is really due so that devices being
+        updated by PUSHes (MQTT) don't wake up every polling_period just to find nothing
+        to do. The result is anyway bounded to [polling_period, PARAM_HEARTBEAT_PERIOD]
+        so that we never poll more often than configured and we still
+        periodically check the transports.
+        """
+        if not (self._online and (self.lastresponse > self.lastrequest)):
+            return self._polling_delay
+        if self._diagnostics_build:
+            return self.polling_period
+        epoch = self._polling_epoch
+        epoch_min = epoch + self.polling_period
+        epoch_next = epoch + PARAM_HEARTBEAT_PERIOD
+        if self.mqtt_locallyactive:
+            epoch_next = min(
+                epoch_next,
+                self._mqtt_lastresponse + PARAM_HEARTBEAT_PERIOD,
+                self._timezone_next_check,
+            )
+        if (self.curr_protocol is CONF_PROTOCOL_MQTT) and (
+            self.pref_protocol is CONF_PROTOCOL_HTTP
+        ):
+            epoch_next = min(
+                epoch_next, self._http_lastrequest + PARAM_HEARTBEAT_PERIOD
+            )
+        mqtt_active = self._mqtt_active
+        for handler in self.namespace_handlers.values():
+            if polling_strategy := handler.polling_strategy:
+                if (
+                    mqtt_active
+                    and handler.polling_epoch_next
+                    and (
+                        polling_strategy is NamespaceHandler.async_poll_default
+                        or polling_strategy is NamespaceHandler.async_poll_all
+                    )
+                ):
+                    # these are updated by PUSHes when MQTT is active
+                    continue
+                if handler.polling_epoch_next <= epoch_min:
+                    return self.polling_period
+                if handler.polling_epoch_next < epoch_next:
+                    epoch_next = handler.polling_epoch_next
+        return max(epoch_next - time(), self.polling_period)
+
+    def mqtt_receive(
+        self, message: "MerossResponse", mqtt_connection: "MQTTConnection"
+    ):
         self._mqtt_lastresponse = epoch = time()
+        self.metrics.record_bytes_in(CONF_PROTOCOL_MQTT, message.json_size())
         self._trace_or_log(epoch, message, CONF_PROTOCOL_MQTT, self.TRACE_RX)
         if not self._mqtt_active:
-            self._mqtt_active = self._mqtt_connected
+            # PUSHes are only subscribed by the primary connection of a cloud
+            # pool so they could come in while our own connection is down
+            self._mqtt_active = self._mqtt_connected or mqtt_connection
             if self._online:
                 self.sensor_protocol.update_attr_active(ProtocolSensor.ATTR_MQTT)
-        if self.curr_protocol is not CONF_PROTOCOL_MQTT:
+        if self._mqtt_connected and (self.curr_protocol is not CONF_PROTOCOL_MQTT):
             if (self.pref_protocol is CONF_PROTOCOL_MQTT) or (not self._http_active):
                 self._switch_protocol(CONF_PROTOCOL_MQTT)
         self._receive(epoch, message)
@@ -1657,9 +1989,7 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
             if not self._online and self._polling_callback_unsub:
                 # reschedule immediately
                 self._polling_callback_unsub.cancel()
-                self._polling_callback_unsub = self.schedule_async_callback(
-                    0, self._async_polling_callback, None
-                )
+                self._polling_schedule(0, None)
         elif self.conf_protocol is CONF_PROTOCOL_MQTT:
             self.log(
                 self.WARNING,
@@ -1772,13 +2102,17 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
         default (received) message handling entry point
         """
         self.lastresponse = epoch
-        message_size = len(message.json())
+        message_size = message.json_size()
         if message_size > self.device_response_size_min:
             self.device_response_size_min = message_size
             if message_size > self.device_response_size_max:
                 self.device_response_size_max = message_size
 
         header = message[mc.KEY_HEADER]
+        if (header[mc.KEY_METHOD] == mc.METHOD_GETACK) and (
+            handler := self.namespace_handlers.get(header[mc.KEY_NAMESPACE])
+        ):
+            handler.polling_response_size_update(message_size)
         # we'll use the device timestamp to 'align' our time to the device one
         # this is useful for metered plugs reporting timestamped energy consumption
         # and we want to 'translate' this timings in our (local) time.
@@ -1821,13 +2155,31 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
             # This could happen when we receive an MQTT message
             if self._polling_callback_unsub:
                 self._polling_callback_unsub.cancel()
-                self._polling_callback_unsub = self.schedule_async_callback(
-                    0,
-                    self._async_polling_callback,
-                    header[mc.KEY_NAMESPACE],
-                )
+                self._polling_schedule(0, header[mc.KEY_NAMESPACE])
+
+        if header[mc.KEY_METHOD] == mc.METHOD_SETACK:
+            # SETACK payloads are discarded anyway (see _handle) so we
+            # skip them here before (lazy) decoding the payload
+            if self.push_dedup:
+                self._push_dedup_reset(header[mc.KEY_NAMESPACE])
+            return
+        entities_dirty = self.entities_batch_begin()
+        try:
+            return self._handle(header, message[mc.KEY_PAYLOAD])
+        finally:
+            if entities_dirty is not None:
+                self.entities_batch_end(entities_dirty)
 
-        return self._handle(header, message[mc.KEY_PAYLOAD])
+    def _handle_multiple(self, multiple_responses: "list[MerossMessageType]"):
+        """Handles the messages packed in an ns_multiple response by batching
+        the entities state updates along the whole pack."""
+        entities_dirty = self.entities_batch_begin()
+        try:
+            for message in multiple_responses:
+                self._handle(message[mc.KEY_HEADER], message[mc.KEY_PAYLOAD])
+        finally:
+            if entities_dirty is not None:
+                self.entities_batch_end(entities_dirty)
 
     def _handle(
         self,
@@ -1842,6 +2194,8 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
             # SETACK generally doesn't carry any state/info so it is
             # no use parsing..moreover, our callbacks system is full
             # in place so we have no need to further process
+            if self.push_dedup:
+                self._push_dedup_reset(namespace)
             return
         elif method == mc.METHOD_PUSH:
             # we're saving for diagnostic purposes so we have knowledge of
@@ -1889,11 +2243,27 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
 
         handler.lastresponse = self.lastresponse
         handler.polling_epoch_next = handler.lastresponse + handler.polling_period
+        if self.push_dedup:
+            if method == mc.METHOD_PUSH:
+                if (payload := handler.push_dedup(payload)) is None:
+                    return
+            else:
+                self._push_dedup_reset(namespace)
         try:
             handler.handler(header, payload)  # type: ignore
         except Exception as exception:
             handler.handle_exception(exception, handler.handler.__name__, payload)
 
+    def _push_dedup_reset(self, namespace: str):
+        """Any message other than PUSH might update our state (optimistic SET,
+        polls, ...) so that the last PUSHed values are no more a reliable
+        reference for deduplication. NS_ALL carries (almost) the whole state."""
+        if namespace == mn.Appliance_System_All.name:
+            for handler in self.namespace_handlers.values():
+                handler.push_lastvalues.clear()
+        elif handler := self.namespace_handlers.get(namespace):
+            handler.push_lastvalues.clear()
+
     def _create_handler(self, ns: "mn.Namespace"):
         """Called by the base device message parsing chain when a new
         NamespaceHandler need to be defined (This happens the first time
@@ -2246,6 +2616,11 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
         if self.polling_period < CONF_POLLING_PERIOD_MIN:
             self.polling_period = CONF_POLLING_PERIOD_MIN
         self._polling_delay = self.polling_period
+        self.push_dedup = config.get(CONF_PUSH_DEDUP, False)
+        if not self.push_dedup:
+            # forget any PUSH state so it doesn't get stale should dedup be re-enabled
+            for handler in self.namespace_handlers.values():
+                handler.push_lastvalues.clear()
 
         _http = self._http
         host = self.host
@@ -2434,8 +2809,22 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
         # log to the trace file too but we've already 'traced' the
         # message if that's the case
         logger = self.logger
+        if not logger.isEnabledFor(self.DEBUG):
+            return
+        header = message[mc.KEY_HEADER]
+        namespace = header[mc.KEY_NAMESPACE]
+        if not self.log_sampled(namespace):
+            return
+        extra = {
+            JsonLinesFormatter.FIELDS: {
+                "rxtx": rxtx,
+                "protocol": protocol,
+                "method": header[mc.KEY_METHOD],
+                "namespace": namespace,
+                "messageId": header[mc.KEY_MESSAGEID],
+            }
+        }
         if logger.isEnabledFor(self.VERBOSE):
-            header = message[mc.KEY_HEADER]
             logger._log(
                 self.VERBOSE,
                 "%s(%s) %s %s (messageId:%s) %s",
@@ -2443,13 +2832,13 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
                     rxtx,
                     protocol,
                     header[mc.KEY_METHOD],
-                    header[mc.KEY_NAMESPACE],
+                    namespace,
                     header[mc.KEY_MESSAGEID],
-                    json_dumps(self.loggable_dict(message)),
+                    MessageDump(message, self.obfuscate),
                 ),
+                extra=extra,
             )
-        elif logger.isEnabledFor(self.DEBUG):
-            header = message[mc.KEY_HEADER]
+        else:
             logger._log(
                 self.DEBUG,
                 "%s(%s) %s %s (messageId:%s)",
@@ -2457,7 +2846,8 @@ class MerossDevice(ConfigEntryManager, MerossDeviceBase):
                     rxtx,
                     protocol,
                     header[mc.KEY_METHOD],
-                    header[mc.KEY_NAMESPACE],
+                    namespace,
                     header[mc.KEY_MESSAGEID],
                 ),
+                extra=extra,
             )
@@ -217,7 +217,11 @@ class MerossEntity(
             for state_callback in self.state_callbacks:
                 state_callback()
         if self._hass_connected:
-            self.async_write_ha_state()
+            if (entities_dirty := self.manager.entities_dirty) is None:
+                self.async_write_ha_state()
+            else:
+                # the manager is batching a message: write at the end
+                entities_dirty.add(self)
 
     def set_available(self):
         self.available = True
@@ -5,8 +5,11 @@
 import abc
 import asyncio
 from contextlib import asynccontextmanager
+from hashlib import md5
+from math import ceil
 from time import time
 import typing
+from zlib import crc32
 
 from homeassistant.config_entries import SOURCE_INTEGRATION_DISCOVERY
 from homeassistant.core import callback
@@ -18,6 +21,8 @@ from .const import (
     CONF_CHECK_FIRMWARE_UPDATES,
     CONF_DEVICE_ID,
     CONF_KEY,
+    CONF_MQTT_ASYNCIO_TRANSPORT,
+    CONF_MQTT_POOL_SIZE,
     CONF_PASSWORD,
     CONF_PAYLOAD,
     DOMAIN,
@@ -32,10 +37,12 @@ from .helpers import (
     versiontuple,
 )
 from .helpers.manager import ApiProfile, CloudApiClient
+from .helpers.metrics import LatencyHistogram
 from .merossclient import (
     MEROSSDEBUG,
     HostAddress,
     MerossKeyError,
+    MerossLazyResponse,
     MerossRequest,
     MerossResponse,
     check_message_strict,
@@ -43,6 +50,7 @@ from .merossclient import (
     get_active_broker,
     get_message_uuid,
     get_replykey,
+    get_topic_uuid,
     namespaces as mn,
 )
 from .merossclient.cloudapi import APISTATUS_TOKEN_ERRORS, CloudApiError
@@ -90,11 +98,23 @@ class ConnectionSensor(me.MEAlwaysAvailableMixin, MLDiagnosticSensor):
         received: int
         published: int
         dropped: int
+        deferred: int
+        queued: int
+        queue_dropped: int
+        filtered: int
 
     ATTR_DEVICES: typing.Final = "devices"
     ATTR_RECEIVED: typing.Final = "received"
     ATTR_PUBLISHED: typing.Final = "published"
     ATTR_DROPPED: typing.Final = "dropped"
+    ATTR_DEFERRED: typing.Final = "deferred"
+    """requests held back (instead of dropped) by the rate-limiter"""
+    ATTR_QUEUED: typing.Final = "queued"
+    """received messages waiting to be processed"""
+    ATTR_QUEUE_DROPPED: typing.Final = "queue_dropped"
+    """received messages discarded due to the receive queue overflowing"""
+    ATTR_FILTERED: typing.Final = "filtered"
+    """received messages discarded (undecoded) since their uuid is being ignored"""
 
     manager: ApiProfile
 
@@ -106,6 +126,10 @@ class ConnectionSensor(me.MEAlwaysAvailableMixin, MLDiagnosticSensor):
             ATTR_RECEIVED,
             ATTR_PUBLISHED,
             ATTR_DROPPED,
+            ATTR_DEFERRED,
+            ATTR_QUEUED,
+            ATTR_QUEUE_DROPPED,
+            ATTR_FILTERED,
             *MLDiagnosticSensor._unrecorded_attributes,
         }
     )
@@ -127,6 +151,10 @@ class ConnectionSensor(me.MEAlwaysAvailableMixin, MLDiagnosticSensor):
             ConnectionSensor.ATTR_RECEIVED: 0,
             ConnectionSensor.ATTR_PUBLISHED: 0,
             ConnectionSensor.ATTR_DROPPED: 0,
+            ConnectionSensor.ATTR_DEFERRED: 0,
+            ConnectionSensor.ATTR_QUEUED: 0,
+            ConnectionSensor.ATTR_QUEUE_DROPPED: 0,
+            ConnectionSensor.ATTR_FILTERED: 0,
         }
         super().__init__(
             connection.profile,
@@ -184,6 +212,7 @@ class _MQTTTransaction:
         "method",
         "request_time",
         "response_future",
+        "wheel_slot",
     )
 
     def __init__(
@@ -201,7 +230,8 @@ class _MQTTTransaction:
         self.response_future: "asyncio.Future[MerossResponse]" = (
             asyncio.get_running_loop().create_future()
         )
-        mqtt_connection._mqtt_transactions[request.messageid] = self
+        self.wheel_slot: dict[str, _MQTTTransaction] | None = None
+        mqtt_connection._mqtt_transactions.add(self)
 
     def cancel(self):
         mqtt_connection = self.mqtt_connection
@@ -214,7 +244,122 @@ class _MQTTTransaction:
             self.messageid,
         )
         self.response_future.cancel()
-        mqtt_connection._mqtt_transactions.pop(self.messageid, None)
+        mqtt_connection._mqtt_transactions.pop(self.messageid)
+
+
+class _MQTTTransactionManager:
+    """
+    Pending MQTT transactions indexed by messageId (and device) with the
+    response timeouts managed through a timing wheel: every transaction is
+    placed in the slot expiring 'timeout' later and a single loop timer ticks
+    (only while transactions are pending) expiring a whole slot at once instead
+    of arming a timer for every request.
+    """
+
+    TICK: typing.Final = 0.5
+    SLOTS: typing.Final = 32
+    """wheel size: timeouts longer than SLOTS * TICK are clamped"""
+
+    __slots__ = (
+        "transactions",
+        "device_transactions",
+        "latency",
+        "timeouts",
+        "timeouts_consecutive",
+        "_wheel",
+        "_wheel_cursor",
+        "_timer",
+    )
+
+    def __init__(self):
+        self.transactions: dict[str, _MQTTTransaction] = {}
+        self.device_transactions: dict[str, dict[str, _MQTTTransaction]] = {}
+        self.latency = LatencyHistogram()
+        """request -> response latency distribution"""
+        self.timeouts = 0
+        self.timeouts_consecutive = 0
+        """timeouts since the last response: a hint the connection is stalling"""
+        self._wheel: list[dict[str, _MQTTTransaction]] = [{} for _ in range(self.SLOTS)]
+        self._wheel_cursor = 0
+        self._timer: asyncio.TimerHandle | None = None
+
+    def __len__(self):
+        return len(self.transactions)
+
+    def add(self, transaction: _MQTTTransaction):
+        messageid = transaction.messageid
+        self.transactions[messageid] = transaction
+        try:
+            self.device_transactions[transaction.device_id][messageid] = transaction
+        except KeyError:
+            self.device_transactions[transaction.device_id] = {messageid: transaction}
+
+    def arm(self, transaction: _MQTTTransaction, timeout: float):
+        """Starts the response timeout (once the request is actually published)."""
+        # +1 since the next tick could be due anytime sooner than TICK
+        ticks = min(ceil(timeout / self.TICK) + 1, self.SLOTS - 1)
+        wheel_slot = self._wheel[(self._wheel_cursor + ticks) % self.SLOTS]
+        wheel_slot[transaction.messageid] = transaction
+        transaction.wheel_slot = wheel_slot
+        if not self._timer:
+            self._timer = asyncio.get_running_loop().call_later(self.TICK, self._tick)
+
+    def pop(self, messageid: str):
+        if transaction := self.transactions.pop(messageid, None):
+            if wheel_slot := transaction.wheel_slot:
+                wheel_slot.pop(messageid, None)
+            device_transactions = self.device_transactions[transaction.device_id]
+            del device_transactions[messageid]
+            if not device_transactions:
+                del self.device_transactions[transaction.device_id]
+        return transaction
+
+    def resolve(self, messageid: str, namespace: str, response: MerossResponse):
+        """Completes the pending transaction (if any) matching the response."""
+        transaction = self.transactions.get(messageid)
+        if transaction and (transaction.namespace == namespace):
+            self.pop(messageid)
+            self.latency.record(time() - transaction.request_time)
+            self.timeouts_consecutive = 0
+            if not transaction.response_future.done():
+                transaction.response_future.set_result(response)
+
+    def cancel_device(self, device_id: str):
+        if device_transactions := self.device_transactions.get(device_id):
+            for transaction in list(device_transactions.values()):
+                transaction.cancel()
+
+    def shutdown(self):
+        for transaction in list(self.transactions.values()):
+            transaction.cancel()
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+    def _tick(self):
+        self._wheel_cursor = cursor = (self._wheel_cursor + 1) % self.SLOTS
+        if wheel_slot := self._wheel[cursor]:
+            self._wheel[cursor] = {}
+            for messageid, transaction in wheel_slot.items():
+                # the slot is already detached: don't let pop() mutate it
+                transaction.wheel_slot = None
+                self.pop(messageid)
+                self.timeouts += 1
+                self.timeouts_consecutive += 1
+                if not transaction.response_future.done():
+                    transaction.response_future.set_exception(asyncio.TimeoutError())
+        if self.transactions:
+            self._timer = asyncio.get_running_loop().call_later(self.TICK, self._tick)
+        else:
+            self._timer = None
+
+    def as_dict(self):
+        return {
+            "pending": len(self.transactions),
+            "timeouts": self.timeouts,
+            "timeouts_consecutive": self.timeouts_consecutive,
+            "latency": self.latency.as_dict(),
+        }
 
 
 class MQTTConnection(Loggable):
@@ -235,6 +380,9 @@ class MQTTConnection(Loggable):
 
     DEFAULT_RESPONSE_TIMEOUT = 5
 
+    MQTTIGNORED_MAX: typing.ClassVar = 1024
+    """size limit of the (negative) cache of ignored uuids"""
+
     SESSION_HANDLERS: typing.Mapping[
         str,
         typing.Callable[
@@ -251,6 +399,8 @@ class MQTTConnection(Loggable):
         "topic_response",
         "mqttdevices",
         "mqttdiscovering",
+        "mqttignored",
+        "mqttfiltered",
         "namespace_handlers",
         "sensor_connection",
         "_mqtt_transactions",
@@ -262,18 +412,22 @@ class MQTTConnection(Loggable):
         profile: "MerossCloudProfile | MerossApi",
         broker: "HostAddress",
         topic_response: str,
+        connection_id: str | None = None,
     ):
         self.profile: typing.Final = profile
         self.broker = broker
         self.topic_response: typing.Final = topic_response
         self.mqttdevices: typing.Final[dict[str, "MerossDevice"]] = {}
         self.mqttdiscovering: typing.Final[set[str]] = set()
+        self.mqttignored: typing.Final[dict[str, float]] = {}
+        """uuid -> expiry epoch of devices whose traffic is dropped before decoding"""
+        self.mqttfiltered = 0
         self.namespace_handlers = self.SESSION_HANDLERS
         self.sensor_connection: "ConnectionSensor | None" = None
-        self._mqtt_transactions: typing.Final[dict[str, "_MQTTTransaction"]] = {}
+        self._mqtt_transactions: typing.Final = _MQTTTransactionManager()
         self._mqtt_is_connected = False
         super().__init__(
-            str(broker),
+            connection_id or str(broker),
             logger=profile,
         )
         profile.mqttconnections[self.id] = self
@@ -283,14 +437,14 @@ class MQTTConnection(Loggable):
     # interface: Loggable
     def configure_logger(self):
         self.logtag = (
-            f"{self.__class__.__name__}({self.profile.loggable_broker(self.broker)})"
+            f"{self.__class__.__name__}({self.profile.loggable_broker(self.id)})"
         )
 
     # interface: self
     async def async_shutdown(self):
-        for mqtt_transaction in list(self._mqtt_transactions.values()):
-            mqtt_transaction.cancel()
+        self._mqtt_transactions.shutdown()
         self.mqttdiscovering.clear()
+        self.mqttignored.clear()
         for device in self.mqttdevices.values():
             device.mqtt_detached()
         self.mqttdevices.clear()
@@ -326,12 +480,25 @@ class MQTTConnection(Loggable):
         if sensor_connection := self.sensor_connection:
             sensor_connection.update_devices()
 
+    def mqtt_ignore(self, device_id: str, timeout: float):
+        """
+        Adds device_id to the negative cache so that its messages get dropped
+        (before decoding) until timeout expires or the device is configured.
+        """
+        mqttignored = self.mqttignored
+        if len(mqttignored) >= self.MQTTIGNORED_MAX:
+            epoch = time()
+            for _device_id in [_d for _d, _e in mqttignored.items() if _e <= epoch]:
+                del mqttignored[_device_id]
+            if len(mqttignored) >= self.MQTTIGNORED_MAX:
+                # evict the oldest
+                del mqttignored[next(iter(mqttignored))]
+        mqttignored[device_id] = time() + timeout
+
     def detach(self, device: "MerossDevice"):
         device_id = device.id
         assert device_id in self.mqttdevices
-        for mqtt_transaction in list(self._mqtt_transactions.values()):
-            if mqtt_transaction.device_id == device_id:
-                mqtt_transaction.cancel()
+        self._mqtt_transactions.cancel_device(device_id)
         device.mqtt_detached()
         self.mqttdevices.pop(device_id)
         if sensor_connection := self.sensor_connection:
@@ -361,10 +528,10 @@ class MQTTConnection(Loggable):
             self.profile.trace_or_log(self, device_id, request, ApiProfile.TRACE_TX)
             await self._async_mqtt_publish(device_id, request)
             if transaction:
+                self._mqtt_transactions.arm(transaction, self.DEFAULT_RESPONSE_TIMEOUT)
                 try:
-                    return await asyncio.wait_for(
-                        transaction.response_future, self.DEFAULT_RESPONSE_TIMEOUT
-                    )
+                    # timeout is managed by the transaction manager (wheel)
+                    return await transaction.response_future
                 except Exception as exception:
                     self.log_exception(
                         self.DEBUG,
@@ -376,9 +543,15 @@ class MQTTConnection(Loggable):
                         request.messageid,
                     )
                 finally:
-                    self._mqtt_transactions.pop(transaction.messageid, None)
+                    self._mqtt_transactions.pop(transaction.messageid)
             return None
 
+        except asyncio.CancelledError:
+            # likely while waiting the rate limiter: don't leak the transaction
+            if transaction:
+                self._mqtt_transactions.pop(transaction.messageid)
+            raise
+
         except MerossMQTTRateLimitException:
             if sensor_connection := self.sensor_connection:
                 sensor_connection.inc_counter_with_state(
@@ -415,26 +588,31 @@ class MQTTConnection(Loggable):
         with self.exception_warning("async_mqtt_message"):
             if sensor_connection := self.sensor_connection:
                 sensor_connection.inc_counter(ConnectionSensor.ATTR_RECEIVED)
-            mqtt_payload = mqtt_msg.payload
-            message = MerossResponse(
-                mqtt_payload
-                if type(mqtt_payload) is str
-                else mqtt_payload.decode("utf-8")  # type: ignore
-            )
+            # device publishes carry the uuid in the topic so that we can
+            # drop unwanted traffic without even touching the payload
+            device_id = get_topic_uuid(mqtt_msg.topic)
+            if device_id and (device_id in self.mqttignored):
+                if self._mqtt_filter(device_id):
+                    return
+            # payload could be either str or bytes (paho) and the
+            # json codec is able to directly decode both. We're only
+            # decoding the header here since the payload might not be needed
+            # (discovery in progress, ignored devices, ...)
+            message = MerossLazyResponse(mqtt_msg.payload)  # type: ignore
             header = message[mc.KEY_HEADER]
-            device_id = get_message_uuid(header)
+            if not device_id:
+                device_id = get_message_uuid(header)
+                if device_id in self.mqttignored:
+                    if self._mqtt_filter(device_id):
+                        return
             namespace = header[mc.KEY_NAMESPACE]
             messageid = header[mc.KEY_MESSAGEID]
-            payload = message[mc.KEY_PAYLOAD]
 
             profile = self.profile
             profile.trace_or_log(self, device_id, message, ApiProfile.TRACE_RX)
 
-            if messageid in self._mqtt_transactions:
-                mqtt_transaction = self._mqtt_transactions[messageid]
-                if mqtt_transaction.namespace == namespace:
-                    self._mqtt_transactions.pop(messageid, None)
-                    mqtt_transaction.response_future.set_result(message)
+            if messageid in self._mqtt_transactions.transactions:
+                self._mqtt_transactions.resolve(messageid, namespace, message)
             else:
                 # special session management: cloud connections would
                 # behave differently than the local MQTT. Their behavior
@@ -442,13 +620,13 @@ class MQTTConnection(Loggable):
                 # implemented in the derived MQTTConnections
                 if namespace in self.namespace_handlers:
                     if await self.namespace_handlers[namespace](
-                        self, device_id, header, payload
+                        self, device_id, header, message[mc.KEY_PAYLOAD]
                     ):
                         # session management has already taken care of everything
                         return
 
             try:
-                self.mqttdevices[device_id].mqtt_receive(message)
+                self.mqttdevices[device_id].mqtt_receive(message, self)
                 return
             except KeyError:
                 # device is not binded to this MQTTConnection
@@ -462,7 +640,13 @@ class MQTTConnection(Loggable):
                         )
                         return
                     if device._profile == profile:
-                        self.attach(device)
+                        mqtt_connection = device._mqtt_connection
+                        if not (
+                            mqtt_connection and (mqtt_connection.broker == self.broker)
+                        ):
+                            self.attach(device)
+                        # else the device is served by another connection
+                        # in the same pool (see MerossCloudProfile.attach_mqtt)
                     else:
                         if (device.key != profile.key) or (
                             device.descriptor.userId != profile.id
@@ -483,7 +667,7 @@ class MQTTConnection(Loggable):
                         if device._mqtt_connection != self:
                             self.attach(device)
 
-                    device.mqtt_receive(message)
+                    device.mqtt_receive(message, self)
                     return
 
             # the device is not configured: proceed to discovery in case
@@ -521,6 +705,7 @@ class MQTTConnection(Loggable):
                     ),
                     timeout=28800,  # type: ignore
                 )
+                self.mqtt_ignore(device_id, mlc.PARAM_MQTT_IGNORE_TIMEOUT)
                 return
 
             # also skip discovered integrations waiting in HA queue
@@ -531,6 +716,7 @@ class MQTTConnection(Loggable):
                     profile.loggable_device_id(device_id),
                     timeout=14400,  # type: ignore
                 )
+                self.mqtt_ignore(device_id, mlc.PARAM_MQTT_IGNORE_TIMEOUT)
                 return
 
             key = profile.key
@@ -542,6 +728,7 @@ class MQTTConnection(Loggable):
                     timeout=300,
                 )
                 if key is not None:
+                    self.mqtt_ignore(device_id, mlc.PARAM_MQTT_IGNORE_TIMEOUT)
                     return
 
             self.profile.async_create_task(
@@ -549,14 +736,17 @@ class MQTTConnection(Loggable):
                 f".async_try_discovery({device_id})",
             )
 
-    async def async_identify_device(self, device_id: str, key: str) -> DeviceConfigType:
+    async def async_identify_device(
+        self, device_id: str, key: str, packed: bool = False
+    ) -> DeviceConfigType:
         """
-        Sends an ns_all and ns_ability GET requests encapsulated in an ns_multiple
-        to speed up things. Raises exception in case of error
+        Sends an ns_all and ns_ability GET requests (encapsulated in an ns_multiple
+        when packed to speed up things). Raises exception in case of error
         """
         topic_response = self.topic_response
-        if False:
-            # 1-step identification disabled since it proves a bit unreliable on my msl320
+        if packed:
+            # 1-step identification proves a bit unreliable on my msl320 so
+            # it is only used by (bulk) discovery while falling back to 2-steps
             self.log(
                 self.DEBUG,
                 "Initiating 1-step identification for uuid:%s",
@@ -670,18 +860,29 @@ class MQTTConnection(Loggable):
             result = await self.hass.config_entries.flow.async_init(
                 DOMAIN,
                 context={"source": SOURCE_INTEGRATION_DISCOVERY},
-                data=await self.async_identify_device(device_id, self.profile.key),
+                data=await self.api.discovery.async_identify_mqtt(
+                    self, device_id, self.profile.key  # type: ignore
+                ),
             )
         self.mqttdiscovering.remove(device_id)
+        # rate-limit discovery: any further message from this uuid will be dropped
+        # for a while (unless the device gets configured in the meantime)
+        self.mqtt_ignore(device_id, mlc.PARAM_MQTT_DISCOVERY_RETRY_TIMEOUT)
         return result
 
-    def _mqtt_transactions_clean(self):
-        if self._mqtt_transactions:
-            # check and cleanup stale transactions
-            epoch = time()
-            for transaction in list(self._mqtt_transactions.values()):
-                if (epoch - transaction.request_time) > 15:
-                    transaction.cancel()
+    def _mqtt_filter(self, device_id: str):
+        """Returns True if the message from the (ignored) device_id has to be dropped"""
+        # ApiProfile.devices also carries (None) placeholders for not loaded
+        # (or ignored) entries: only a loaded device lifts the filter
+        if (self.mqttignored[device_id] > time()) and (
+            not ApiProfile.devices.get(device_id)
+        ):
+            self.mqttfiltered += 1
+            if sensor_connection := self.sensor_connection:
+                sensor_connection.inc_counter(ConnectionSensor.ATTR_FILTERED)
+            return True
+        del self.mqttignored[device_id]
+        return False
 
     @abc.abstractmethod
     async def _async_mqtt_publish(
@@ -747,33 +948,71 @@ class MQTTConnection(Loggable):
 
 class MerossMQTTConnection(MQTTConnection, MerossMQTTAppClient):
 
+    POOL_STALL_TIMEOUTS: typing.ClassVar = 3
+    """consecutive timeouts after which a pooled connection is considered stalled"""
+    POOL_RECONNECT_GRACE: typing.ClassVar = 60
+    """time allowed to (re)connect before a pooled connection is considered stalled"""
+
     # here we're acrobatically slottizing MerossMQTTAppClient
     # since it cannot be slotted itself leading to multiple inheritance
     # "forbidden" slots
 
     __slots__ = (
+        "pool_index",
+        "_pool_disconnected_epoch",
         "_asyncio_loop",
         "_future_connected",
-        "_tasks",
+        "_lock_ingest",
+        "_ingest_queue",
+        "_ingest_scheduled",
+        "_ingest_task",
+        "_ingest_dropped",
+        "_aio_transport",
+        "_aio_thread_id",
+        "_aio_connect_task",
+        "_aio_misc_timer",
         "_lock_state",
-        "_lock_queue",
         "_rl_dropped",
+        "_rl_deferred",
         "_rl2_queues",
         "_stateext",
         "_subscribe_topics",
         "_unsub_random_disconnect",
     )
 
-    def __init__(self, profile: "MerossCloudProfile", broker: "HostAddress"):
+    def __init__(
+        self,
+        profile: "MerossCloudProfile",
+        broker: "HostAddress",
+        pool_index: int = 0,
+    ):
+        """
+        pool_index: when the profile is configured to spread its devices over
+        more connections (to the same broker) every connection but the 'primary'
+        (pool_index == 0) uses its own app_id and doesn't subscribe the
+        account PUSH topic (the primary receives them for every device).
+        """
+        self.pool_index: typing.Final = pool_index
+        self._pool_disconnected_epoch = time()
+        if pool_index:
+            app_id = md5(f"{profile.app_id}{pool_index}".encode("utf-8")).hexdigest()
+            connection_id = f"{broker}#{pool_index}"
+        else:
+            app_id = profile.app_id
+            connection_id = None
         MerossMQTTAppClient.__init__(
             self,
             profile.key,
             profile.userid,
-            app_id=profile.app_id,
+            app_id=app_id,
             loop=self.hass.loop,
             sslcontext=get_default_ssl_context(),
+            subscribe_push=not pool_index,
+            asyncio_transport=profile.mqtt_asyncio_transport,
+        )
+        MQTTConnection.__init__(
+            self, profile, broker, self.topic_command, connection_id
         )
-        MQTTConnection.__init__(self, profile, broker, self.topic_command)
         if profile.isEnabledFor(profile.VERBOSE):
             self.enable_logger(self)  # type: ignore (Loggable is duck-compatible with Logger)
 
@@ -821,31 +1060,95 @@ class MerossMQTTConnection(MQTTConnection, MerossMQTTAppClient):
     def get_rl_safe_delay(self, uuid: str):
         return MerossMQTTAppClient.get_rl_safe_delay(self, uuid)
 
+    # interface: self
+    @property
+    def pool_healthy(self):
+        """
+        A connection is healthy unless requests keep timing out or it cannot
+        (re)connect in a reasonable time. An inactive (not started or stopped)
+        connection is considered 'healthy' since it will be (re)started when needed.
+        """
+        if self.state_inactive:
+            return True
+        if (
+            self._mqtt_transactions.timeouts_consecutive
+            >= MerossMQTTConnection.POOL_STALL_TIMEOUTS
+        ):
+            return False
+        return self._mqtt_is_connected or (
+            (time() - self._pool_disconnected_epoch)
+            < MerossMQTTConnection.POOL_RECONNECT_GRACE
+        )
+
+    @property
+    def pool_backlog(self):
+        """Requests waiting for a reply (or to be sent) and messages to be processed."""
+        return (
+            len(self._mqtt_transactions)
+            + sum(len(_rl2.deferred) for _rl2 in self._rl2_queues.values())
+            + self.ingest_queue_depth
+        )
+
+    def get_pool_diagnostics(self):
+        return {
+            "index": self.pool_index,
+            "state": self.stateext,
+            "healthy": self.pool_healthy,
+            "devices": len(self.mqttdevices),
+            "backlog": self.pool_backlog,
+            "rl_dropped": self.rl_dropped,
+            "rl_deferred": self.rl_deferred,
+            "ingest_dropped": self.ingest_dropped,
+        }
+
     async def _async_mqtt_publish(
         self,
         device_id: str,
         request: "MerossMessage",
     ):
+        if await self.async_rl_acquire(device_id, request):
+            # the request was held back by the rate-limiter: re-sign it
+            # so that the device doesn't reject it as being too old
+            device = self.mqttdevices.get(device_id)
+            request.sign(device.key if device else self.profile.key)
+        if self._aio_transport:
+            # paho is just queueing the packet: the socket is managed in the loop
+            return self.rl_publish(device_id, request)
         return await self.hass.async_add_executor_job(
             self.rl_publish, device_id, request
         )
 
     @callback
     def _mqtt_connected(self):
+        self._mqtt_transactions.timeouts_consecutive = 0
         MerossMQTTAppClient._mqtt_connected(self)
         MQTTConnection._mqtt_connected(self)
 
+    @callback
+    def _mqtt_disconnected(self):
+        self._pool_disconnected_epoch = time()
+        MQTTConnection._mqtt_disconnected(self)
+
     @callback
     def _mqtt_published(self):
         if sensor_connection := self.sensor_connection:
             attrs = sensor_connection.extra_state_attributes
             attrs[ConnectionSensor.ATTR_DROPPED] = self.rl_dropped
+            attrs[ConnectionSensor.ATTR_DEFERRED] = self.rl_deferred
             attrs[ConnectionSensor.ATTR_PUBLISHED] += 1
             if self.mqtt_is_connected:
                 # enforce the state eventually cancelling queued, dropped...
                 sensor_connection.native_value = ConnectionSensor.STATE_CONNECTED
             sensor_connection.flush_state()
 
+    @callback
+    def _mqtt_ingested(self):
+        if sensor_connection := self.sensor_connection:
+            attrs = sensor_connection.extra_state_attributes
+            attrs[ConnectionSensor.ATTR_QUEUED] = self.ingest_queue_depth
+            attrs[ConnectionSensor.ATTR_QUEUE_DROPPED] = self.ingest_dropped
+            sensor_connection.flush_state()
+
 
 MerossMQTTConnection.SESSION_HANDLERS = {
     mn.Appliance_System_Online.name: MQTTConnection._handle_Appliance_System_Online,
@@ -896,6 +1199,7 @@ class MerossCloudProfile(ApiProfile):
         "_data",
         "_store",
         "_unsub_polling_query_device_info",
+        "_unsub_mqtt_pool_rebalance",
         "_device_info_time",
     )
 
@@ -912,6 +1216,7 @@ class MerossCloudProfile(ApiProfile):
         self.apiclient = CloudApiClient(self, self.config)
         self._store = MerossCloudProfileStore(profile_id)
         self._unsub_polling_query_device_info: asyncio.TimerHandle | None = None
+        self._unsub_mqtt_pool_rebalance: asyncio.TimerHandle | None = None
 
     async def async_init(self):
         """
@@ -962,6 +1267,12 @@ class MerossCloudProfile(ApiProfile):
             mqttconnection = MerossMQTTConnection(self, broker)
             mqttconnection.schedule_connect(broker)
 
+        if self.mqtt_pool_size > 1:
+            self._unsub_mqtt_pool_rebalance = self.schedule_callback(
+                mlc.PARAM_CLOUDPROFILE_MQTT_POOL_REBALANCE_PERIOD,
+                self._mqtt_pool_rebalance,
+            )
+
         # compute the next cloud devlist query and setup the scheduled callback
         next_query_epoch = (
             self._device_info_time + mlc.PARAM_CLOUDPROFILE_QUERY_DEVICELIST_TIMEOUT
@@ -1007,6 +1318,9 @@ class MerossCloudProfile(ApiProfile):
         if self._unsub_polling_query_device_info:
             self._unsub_polling_query_device_info.cancel()
             self._unsub_polling_query_device_info = None
+        if self._unsub_mqtt_pool_rebalance:
+            self._unsub_mqtt_pool_rebalance.cancel()
+            self._unsub_mqtt_pool_rebalance = None
         await super().async_shutdown()
         ApiProfile.profiles[self.id] = None
 
@@ -1026,7 +1340,14 @@ class MerossCloudProfile(ApiProfile):
                 self._data[mc.KEY_TOKEN] = config[mc.KEY_TOKEN]
                 await self._store.async_save(self._data)
 
-        if self.config.get(mc.KEY_MQTTDOMAIN) != config.get(mc.KEY_MQTTDOMAIN):
+        if (
+            (self.config.get(mc.KEY_MQTTDOMAIN) != config.get(mc.KEY_MQTTDOMAIN))
+            or (self.config.get(CONF_MQTT_POOL_SIZE) != config.get(CONF_MQTT_POOL_SIZE))
+            or (
+                self.config.get(CONF_MQTT_ASYNCIO_TRANSPORT)
+                != config.get(CONF_MQTT_ASYNCIO_TRANSPORT)
+            )
+        ):
             self.schedule_entry_reload()
         else:
             await super().entry_update_listener(hass, config_entry)
@@ -1083,7 +1404,7 @@ class MerossCloudProfile(ApiProfile):
             except:
                 return
 
-        mqttconnection = self._get_mqttconnection(broker)
+        mqttconnection = self._get_pool_mqttconnection(broker, device.id)
         mqttconnection.attach(device)
         if mqttconnection.state_inactive:
             mqttconnection.schedule_connect(broker)
@@ -1093,6 +1414,14 @@ class MerossCloudProfile(ApiProfile):
     def app_id(self):
         return self._data[self.KEY_APP_ID]
 
+    @property
+    def mqtt_pool_size(self) -> int:
+        return self.config.get(CONF_MQTT_POOL_SIZE) or 1
+
+    @property
+    def mqtt_asyncio_transport(self) -> bool:
+        return self.config.get(CONF_MQTT_ASYNCIO_TRANSPORT, False)
+
     @property
     def token_is_valid(self):
         return bool(self._data.get(mc.KEY_TOKEN))
@@ -1241,15 +1570,86 @@ class MerossCloudProfile(ApiProfile):
 
         return mqttconnections
 
-    def _get_mqttconnection(self, broker: HostAddress) -> MerossMQTTConnection:
+    def _get_mqttconnection(
+        self, broker: HostAddress, pool_index: int = 0
+    ) -> MerossMQTTConnection:
         """
         Returns an existing connection from the managed pool or create one and add
         to the mqttconnections pool. The connection state is not ensured.
         """
-        connection_id = str(broker)
+        connection_id = f"{broker}#{pool_index}" if pool_index else str(broker)
         if connection_id in self.mqttconnections:
             return self.mqttconnections[connection_id]  # type: ignore
-        return MerossMQTTConnection(self, broker)
+        return MerossMQTTConnection(self, broker, pool_index)
+
+    def _get_pool_mqttconnection(self, broker: HostAddress, device_id: str):
+        """
+        Returns the connection (to the broker) the device should be attached to.
+        When mqtt_pool_size > 1 devices are spread over the pool by rendezvous
+        hashing so that every device consistently maps to the same connection
+        and only the devices of a stalled connection are moved around.
+        """
+        pool_size = self.mqtt_pool_size
+        if pool_size == 1:
+            return self._get_mqttconnection(broker)
+        mqttconnections = self.mqttconnections
+        best_weight = -1
+        best_index = 0
+        for pool_index in range(pool_size):
+            mqttconnection = mqttconnections.get(
+                f"{broker}#{pool_index}" if pool_index else str(broker)
+            )
+            if mqttconnection and not mqttconnection.pool_healthy:  # type: ignore
+                continue
+            weight = crc32(f"{device_id}:{pool_index}".encode("utf-8"))
+            if weight > best_weight:
+                best_weight = weight
+                best_index = pool_index
+        return self._get_mqttconnection(broker, best_index)
+
+    @callback
+    def _mqtt_pool_rebalance(self):
+        """
+        Periodically moves the devices away from unhealthy (stalled) connections
+        and back to their preferred one when it recovers. An emptied stalled
+        connection (but the primary which carries the PUSHes) is stopped so that
+        it gets a fresh start when needed again.
+        """
+        self._unsub_mqtt_pool_rebalance = self.schedule_callback(
+            mlc.PARAM_CLOUDPROFILE_MQTT_POOL_REBALANCE_PERIOD,
+            self._mqtt_pool_rebalance,
+        )
+        for mqttconnection in list(self.mqttconnections.values()):
+            if not isinstance(mqttconnection, MerossMQTTConnection):
+                continue
+            broker = mqttconnection.broker
+            for device in list(mqttconnection.mqttdevices.values()):
+                target = self._get_pool_mqttconnection(broker, device.id)
+                if target is not mqttconnection:
+                    self.log(
+                        self.DEBUG,
+                        "Moving device uuid:%s from MQTT connection %s to %s",
+                        self.loggable_device_id(device.id),
+                        self.loggable_broker(mqttconnection.id),
+                        self.loggable_broker(target.id),
+                    )
+                    target.attach(device)
+                    if target.state_inactive:
+                        target.schedule_connect(broker)
+            if (
+                mqttconnection.pool_index
+                and not mqttconnection.mqttdevices
+                and not mqttconnection.pool_healthy
+            ):
+                self.log(
+                    self.DEBUG,
+                    "Stopping stalled MQTT connection %s",
+                    self.loggable_broker(mqttconnection.id),
+                )
+                mqttconnection._mqtt_transactions.timeouts_consecutive = 0
+                self.async_create_task(
+                    mqttconnection.async_disconnect(), ".mqtt_pool_rebalance"
+                )
 
     async def _async_get_mqttconnection(self, broker: HostAddress):
         """
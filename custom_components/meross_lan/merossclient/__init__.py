@@ -97,14 +97,82 @@ JSON_ENCODER = json.JSONEncoder(
 JSON_DECODER = json.JSONDecoder()
 
 
-def json_dumps(obj):
-    """Slightly optimized json.dumps with pre-configured encoder"""
-    return JSON_ENCODER.encode(obj)
+def _json_str(s: str | bytes) -> str:
+    return s if type(s) is str else s.decode("utf-8")  # type: ignore
 
 
-def json_loads(s: str):
-    """Slightly optimized json.loads with pre-configured decoder"""
-    return JSON_DECODER.raw_decode(s)[0]
+# When available, we'll use a faster (native) json library. Both the
+# fast paths fallback to the standard library when failing so that
+# we preserve the behavior (JSONDecodeError reporting, lenient parsing)
+# the code relies on.
+try:
+    import orjson
+
+    JSON_CODEC = "orjson"
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def json_dumps(obj) -> str:
+        """Serializes to (compact) json using orjson"""
+        try:
+            return orjson.dumps(obj, option=_ORJSON_OPTIONS).decode("utf-8")
+        except TypeError:
+            return JSON_ENCODER.encode(obj)
+
+    def json_loads(s: str | bytes):
+        """Deserializes a json (str or bytes) using orjson"""
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            return JSON_DECODER.raw_decode(_json_str(s))[0]
+
+    def json_decode(s: str | bytes):
+        """Strict json deserialization: raises json.JSONDecodeError"""
+        return orjson.loads(s)
+
+except ImportError:
+    try:
+        import msgspec.json
+
+        JSON_CODEC = "msgspec"
+        _MSGSPEC_ENCODER = msgspec.json.Encoder()
+        _MSGSPEC_DECODER = msgspec.json.Decoder()
+
+        def json_dumps(obj) -> str:
+            """Serializes to (compact) json using msgspec"""
+            try:
+                return _MSGSPEC_ENCODER.encode(obj).decode("utf-8")
+            except TypeError:
+                return JSON_ENCODER.encode(obj)
+
+        def json_loads(s: str | bytes):
+            """Deserializes a json (str or bytes) using msgspec"""
+            try:
+                return _MSGSPEC_DECODER.decode(s)
+            except msgspec.DecodeError:
+                return JSON_DECODER.raw_decode(_json_str(s))[0]
+
+        def json_decode(s: str | bytes):
+            """Strict json deserialization: raises json.JSONDecodeError"""
+            try:
+                return _MSGSPEC_DECODER.decode(s)
+            except msgspec.DecodeError:
+                # let the standard library raise the (expected) JSONDecodeError
+                return JSON_DECODER.decode(_json_str(s))
+
+    except ImportError:
+        JSON_CODEC = "json"
+
+        def json_dumps(obj) -> str:
+            """Slightly optimized json.dumps with pre-configured encoder"""
+            return JSON_ENCODER.encode(obj)
+
+        def json_loads(s: str | bytes):
+            """Slightly optimized json.loads with pre-configured decoder"""
+            return JSON_DECODER.raw_decode(_json_str(s))[0]
+
+        def json_decode(s: str | bytes):
+            """Strict json deserialization: raises json.JSONDecodeError"""
+            return JSON_DECODER.decode(_json_str(s))
 
 
 #
@@ -354,6 +422,21 @@ def get_message_uuid(header: MerossHeaderType):
     return header.get(mc.KEY_UUID) or mc.RE_PATTERN_TOPIC_UUID.match(header[mc.KEY_FROM]).group(1)  # type: ignore
 
 
+_TOPIC_RESPONSE_PREFIX, _TOPIC_RESPONSE_SUFFIX = mc.TOPIC_RESPONSE.split("{}")
+
+
+def get_topic_uuid(topic: str):
+    """
+    Extracts the uuid from a device publishing topic ('/appliance/{uuid}/publish')
+    without decoding the message. Returns None for any other topic.
+    """
+    if topic.startswith(_TOPIC_RESPONSE_PREFIX) and topic.endswith(
+        _TOPIC_RESPONSE_SUFFIX
+    ):
+        return topic[len(_TOPIC_RESPONSE_PREFIX) : -len(_TOPIC_RESPONSE_SUFFIX)] or None
+    return None
+
+
 def get_replykey(header: MerossHeaderType, key: KeyType) -> KeyType:
     """
     checks header signature against key:
@@ -478,25 +561,138 @@ class MerossMessage(dict):
         "_json_str",
     )
 
-    def __init__(self, message: dict, json_str: str | None = None):
+    def __init__(self, message: dict, json_str: str | bytes | None = None):
+        # json_str could be carried as (utf-8) bytes (as received from MQTT)
+        # and we'll lazy decode it only if/when needed
         self._json_str = json_str
         super().__init__(message)
 
-    def json(self):
-        if not self._json_str:
-            self._json_str = JSON_ENCODER.encode(self)
-        return self._json_str
+    def json(self) -> str:
+        json_str = self._json_str
+        if not json_str:
+            self._json_str = json_str = json_dumps(self)
+        elif type(json_str) is bytes:
+            self._json_str = json_str = json_str.decode("utf-8")
+        return json_str  # type: ignore
+
+    def json_size(self):
+        """Size of the json representation without decoding it when carried as bytes."""
+        json_str = self._json_str
+        return len(json_str) if json_str else len(self.json())
+
+    def sign(self, key: str):
+        """Refreshes timestamp and signature (i.e. when the request was held back)."""
+        header = self[mc.KEY_HEADER]
+        header[mc.KEY_TIMESTAMP] = timestamp = int(time())
+        header[mc.KEY_SIGN] = compute_message_signature(self.messageid, key, timestamp)
+        self._json_str = None
 
     @staticmethod
-    def decode(json_str: str):
-        return MerossMessage(JSON_DECODER.decode(json_str), json_str)
+    def decode(json_str: str | bytes):
+        return MerossMessage(json_decode(json_str), json_str)
 
 
 class MerossResponse(MerossMessage):
     """Helper for messages received from a device"""
 
-    def __init__(self, json_str: str):
-        super().__init__(JSON_DECODER.decode(json_str), json_str)
+    def __init__(self, json_str: str | bytes):
+        super().__init__(json_decode(json_str), json_str)
+
+
+class MerossLazyResponse(MerossResponse):
+    """
+    Response message where only the header is decoded upfront while the payload
+    is decoded on first access. This is used on the MQTT receive path where
+    a lot of messages might be just dropped (or routed) by only inspecting the header.
+    This relies on the 'canonical' compact layout {"header":{...},"payload":...}
+    and, if the message doesn't match it, we'll just fully decode it. The payload
+    decoding errors (if any) are then raised when accessing it.
+    Since dict internals are not aware of the lazy payload, the (python level)
+    dict accessors are overriden to ensure the full message is available but
+    C level accessors (like orjson serializing the dict) would skip the payload:
+    use json() to get the message serialization.
+    """
+
+    _PREFIXES = ('{"header":', ',"payload":', "}")
+    _PREFIXES_BYTES = tuple(prefix.encode("utf-8") for prefix in _PREFIXES)
+
+    __slots__ = ("_payload_slice",)
+
+    def __init__(self, json_str: str | bytes):
+        self._json_str = json_str
+        self._payload_slice = None
+        header_prefix, payload_prefix, close = (
+            self._PREFIXES if type(json_str) is str else self._PREFIXES_BYTES
+        )
+        if json_str.startswith(header_prefix) and json_str.endswith(close):  # type: ignore
+            header_start = len(header_prefix)
+            # the header is a flat object: the first '}' closes it. If this is not
+            # the case (nested objects or '}' in strings) the slice will not decode.
+            header_end = json_str.find(close, header_start) + 1  # type: ignore
+            if header_end and json_str.startswith(payload_prefix, header_end):  # type: ignore
+                try:
+                    header = json_decode(json_str[header_start:header_end])
+                except ValueError:
+                    header = None
+                if type(header) is dict:
+                    self._payload_slice = slice(
+                        header_end + len(payload_prefix), len(json_str) - 1
+                    )
+                    dict.__init__(self, {mc.KEY_HEADER: header})
+                    return
+        dict.__init__(self, json_decode(json_str))
+
+    def __missing__(self, key):
+        self._load()
+        return dict.__getitem__(self, key)
+
+    def _load(self):
+        if payload_slice := self._payload_slice:
+            self._payload_slice = None
+            json_str = self._json_str
+            try:
+                payload = json_decode(json_str[payload_slice])  # type: ignore
+                dict.__setitem__(self, mc.KEY_PAYLOAD, payload)
+            except ValueError:
+                # the message layout is not as expected (more keys following?)
+                # or it is malformed: let the full decode sort it out
+                self.update(json_decode(json_str))  # type: ignore
+
+    @property
+    def is_loaded(self):
+        return self._payload_slice is None
+
+    def get(self, key, default=None):
+        self._load()
+        return dict.get(self, key, default)
+
+    def __contains__(self, key):
+        self._load()
+        return dict.__contains__(self, key)
+
+    def __iter__(self):
+        self._load()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self._load()
+        return dict.__len__(self)
+
+    def keys(self):
+        self._load()
+        return dict.keys(self)
+
+    def values(self):
+        self._load()
+        return dict.values(self)
+
+    def items(self):
+        self._load()
+        return dict.items(self)
+
+    def copy(self):
+        self._load()
+        return dict.copy(self)
 
 
 class MerossRequest(MerossMessage):
@@ -0,0 +1,69 @@
+"""
+    Message encryption codec for devices supporting Appliance.Encrypt.ECDHE.
+    These devices expect (and reply with) the json message encrypted with
+    AES-CBC (fixed IV, zero padded) and then base64 encoded.
+"""
+
+import binascii
+
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+
+class MerossEncryptionCodec:
+    """
+    Encrypts/decrypts messages by reusing the same Cipher and
+    preallocated (growing) buffers so that the padding and the cipher output
+    don't need to allocate intermediate bytes objects on every message.
+    CBC chaining doesn't allow to reuse the encryptor/decryptor contexts
+    across messages (every message restarts from the fixed IV) so these are
+    still built per message but the Cipher (key schedule) is shared.
+    This is not thread-safe: use a dedicated instance (or a lock) per thread.
+    """
+
+    BLOCK_SIZE = 16
+    IV = "0000000000000000".encode("utf8")
+    BUFFER_SIZE_INIT = 4096
+
+    __slots__ = (
+        "_cipher",
+        "_buffer_in",
+        "_buffer_out",
+    )
+
+    def __init__(self, key: bytes):
+        self._cipher = Cipher(algorithms.AES(key), modes.CBC(self.IV))
+        self._buffer_in = bytearray(self.BUFFER_SIZE_INIT)
+        # cryptography update_into needs (block_size - 1) bytes of extra room
+        self._buffer_out = bytearray(self.BUFFER_SIZE_INIT + self.BLOCK_SIZE - 1)
+
+    def _ensure_buffers(self, size: int):
+        if size > len(self._buffer_in):
+            buffer_size = len(self._buffer_in)
+            while buffer_size < size:
+                buffer_size *= 2
+            self._buffer_in = bytearray(buffer_size)
+            self._buffer_out = bytearray(buffer_size + self.BLOCK_SIZE - 1)
+
+    def encrypt(self, message: str) -> str:
+        message_bytes = message.encode("utf-8")
+        message_len = len(message_bytes)
+        padded_len = (message_len + self.BLOCK_SIZE - 1) & -self.BLOCK_SIZE
+        self._ensure_buffers(padded_len)
+        buffer_in = memoryview(self._buffer_in)
+        buffer_in[:message_len] = message_bytes
+        # zero padding
+        buffer_in[message_len:padded_len] = bytes(padded_len - message_len)
+        encryptor = self._cipher.encryptor()
+        output_len = encryptor.update_into(buffer_in[:padded_len], self._buffer_out)
+        encryptor.finalize()
+        return binascii.b2a_base64(
+            memoryview(self._buffer_out)[:output_len], newline=False
+        ).decode("ascii")
+
+    def decrypt(self, message: str | bytes) -> str:
+        message_bytes = binascii.a2b_base64(message)
+        self._ensure_buffers(len(message_bytes))
+        decryptor = self._cipher.decryptor()
+        output_len = decryptor.update_into(message_bytes, self._buffer_out)
+        decryptor.finalize()
+        return str(memoryview(self._buffer_out)[:output_len], "utf-8").rstrip("\0")
@@ -4,18 +4,17 @@
 """
 
 import asyncio
-from base64 import b64decode, b64encode
+import heapq
 import logging
 import socket
 import sys
+from time import monotonic
 import typing
 
 import aiohttp
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from yarl import URL
 
 from . import (
-    JSON_ENCODER,
     MEROSSDEBUG,
     KeyType,
     MerossKeyError,
@@ -24,7 +23,9 @@ from . import (
     build_message,
     check_message_strict,
     const as mc,
+    json_dumps,
 )
+from .encryption import MerossEncryptionCodec
 
 
 class TerminatedException(Exception):
@@ -32,6 +33,13 @@ class TerminatedException(Exception):
 
 
 class MerossHttpClient:
+    # request priorities for the (per host) request queue
+    PRIORITY_HIGH: typing.Final = 0
+    """used for commands (SET) so they overtake any queued poll"""
+    PRIORITY_DEFAULT: typing.Final = 1
+    PRIORITY_LOW: typing.Final = 2
+    """used for polls (GET or packed NS_MULTIPLE)"""
+
     SESSION_MAXIMUM_CONNECTIONS: typing.ClassVar = 50
     SESSION_MAXIMUM_CONNECTIONS_PER_HOST: typing.ClassVar = 1
     SESSION_TIMEOUT: typing.ClassVar = aiohttp.ClientTimeout(total=10, connect=5)
@@ -81,7 +89,13 @@ class MerossHttpClient:
         "_log_level_dump",
         "_terminate",
         "_terminate_guard",
-        "_encryption_cipher",
+        "_encryption_codec",
+        "_queue",
+        "_queue_seq",
+        "_queue_busy",
+        "stats_requests",
+        "stats_queue_wait_total",
+        "stats_queue_wait_max",
     )
 
     def __init__(
@@ -110,7 +124,14 @@ class MerossHttpClient:
         self._log_level_dump = log_level_dump
         self._terminate = False
         self._terminate_guard = 0
-        self._encryption_cipher: Cipher | None = None
+        self._encryption_codec: MerossEncryptionCodec | None = None
+        self._queue: list[tuple[int, int, asyncio.Future]] = []
+        """heap of (priority, seq, future) waiting for the connection"""
+        self._queue_seq = 0
+        self._queue_busy = False
+        self.stats_requests = 0
+        self.stats_queue_wait_total = 0.0
+        self.stats_queue_wait_max = 0.0
 
     @property
     def host(self):
@@ -123,12 +144,9 @@ class MerossHttpClient:
 
     def set_encryption(self, encryption_key: bytes | None):
         if encryption_key:
-            self._encryption_cipher = Cipher(
-                algorithms.AES(encryption_key),
-                modes.CBC("0000000000000000".encode("utf8")),
-            )
+            self._encryption_codec = MerossEncryptionCodec(encryption_key)
         else:
-            self._encryption_cipher = None
+            self._encryption_codec = None
 
     def _check_terminated(self):
         if self._terminate:
@@ -149,7 +167,57 @@ class MerossHttpClient:
         while self._terminate_guard:
             await asyncio.sleep(0.5)
 
-    async def async_request_raw(self, request: str) -> MerossResponse:
+    async def async_request_raw(
+        self, request: str, priority: int = PRIORITY_DEFAULT
+    ) -> MerossResponse:
+        """
+        Requests are serialized per host (the device http server is not able
+        to manage concurrency anyway) through a priority queue so that high priority
+        ones (commands) are sent before lower priority ones (polls) when the
+        connection is busy. Identical requests are not coalesced here: this is
+        done (for GETs) at the device level (see MerossDevice.async_request).
+        """
+        self._check_terminated()
+        if not self._queue_busy:
+            self._queue_busy = True
+            self.stats_requests += 1
+            try:
+                return await self._async_request_raw(request)
+            finally:
+                self._queue_next()
+
+        self._queue_seq += 1
+        turn = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, self._queue_seq, turn))
+        queue_wait = monotonic()
+        try:
+            await turn
+        except asyncio.CancelledError:
+            if turn.done() and not turn.cancelled():
+                # we were given the turn but we're not going to use it
+                self._queue_next()
+            raise
+        queue_wait = monotonic() - queue_wait
+        self.stats_requests += 1
+        self.stats_queue_wait_total += queue_wait
+        if queue_wait > self.stats_queue_wait_max:
+            self.stats_queue_wait_max = queue_wait
+        try:
+            return await self._async_request_raw(request)
+        finally:
+            self._queue_next()
+
+    def _queue_next(self):
+        """Pass the connection to the next (non cancelled) queued request."""
+        queue = self._queue
+        while queue:
+            turn = heapq.heappop(queue)[2]
+            if not turn.done():
+                turn.set_result(None)
+                return
+        self._queue_busy = False
+
+    async def _async_request_raw(self, request: str) -> MerossResponse:
         self._check_terminated()
         logger = self._logger
         logid = None
@@ -167,14 +235,8 @@ class MerossHttpClient:
             if MEROSSDEBUG:
                 MEROSSDEBUG.http_random_timeout()
 
-            if _cipher := self._encryption_cipher:
-                request_bytes = request.encode("utf-8")
-                if pad_length := (len(request_bytes) % 16):
-                    request_bytes += bytes([0] * (16 - pad_length))
-                encryptor = _cipher.encryptor()
-                request = b64encode(
-                    encryptor.update(request_bytes) + encryptor.finalize()
-                ).decode("utf-8")
+            if _codec := self._encryption_codec:
+                request = _codec.encrypt(request)
                 headers = {
                     aiohttp.hdrs.CONTENT_TYPE: "application/octet-stream",
                 }
@@ -209,14 +271,11 @@ class MerossHttpClient:
 
             self._check_terminated()
             response.raise_for_status()
-            response = await response.text()
-            if _cipher:
-                decryptor = _cipher.decryptor()
-                response = (
-                    (decryptor.update(b64decode(response)) + decryptor.finalize())
-                    .decode("utf8")
-                    .rstrip("\0")
-                )
+            if _codec:
+                # base64 payload: no need to text decode it
+                response = _codec.decrypt(await response.read())
+            else:
+                response = await response.text()
 
             if logger:
                 logger.log(
@@ -251,7 +310,7 @@ class MerossHttpClient:
             self.replykey if key is None else key,
             mc.MANUFACTURER,
         )
-        response = await self.async_request_raw(JSON_ENCODER.encode(request))
+        response = await self.async_request_raw(json_dumps(request))
         if (
             response.get(mc.KEY_PAYLOAD, {}).get(mc.KEY_ERROR, {}).get(mc.KEY_CODE)
             == mc.ERROR_INVALIDKEY
@@ -273,7 +332,7 @@ class MerossHttpClient:
             req_header[mc.KEY_TIMESTAMP] = resp_header[mc.KEY_TIMESTAMP]
             req_header[mc.KEY_SIGN] = resp_header[mc.KEY_SIGN]
             try:
-                response = await self.async_request_raw(JSON_ENCODER.encode(request))
+                response = await self.async_request_raw(json_dumps(request))
             except TerminatedException as e:
                 raise e
             except Exception:
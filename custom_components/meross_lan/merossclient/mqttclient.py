@@ -11,7 +11,12 @@ from uuid import uuid4
 
 import paho.mqtt.client as mqtt
 
-from . import HostAddress, const as mc, get_macaddress_from_uuid
+from . import (
+    HostAddress,
+    MerossLazyResponse,
+    const as mc,
+    get_macaddress_from_uuid,
+)
 
 if typing.TYPE_CHECKING:
     from . import MerossMessage
@@ -29,10 +34,8 @@ class MerossMQTTRateLimitException(Exception):
 class _MQTTRateLimiter:
     """
     MQTT publishing rate-limiter x device (in order to prevent Meross account ban):
-    The algorithm tries to limit the rate of publish to
-    less than MAXQUEUE over a period of DURATION for every single device.
-    If a new publish request is submitted when more than MAXQUEUE
-    messages have been sent over DURATION, it gets discarded.
+    This is a token bucket allowing bursts of MAXQUEUE messages while refilling
+    at a rate of MAXQUEUE over a period of DURATION for every single device.
     This algorithm has been put in place in 5.1.0 upgrading the previous
     'hard' rate-limiting which set the rate-limiting x connection (so all of
     the devices shared the same timings). Also, the previous algorithm was
@@ -40,19 +43,53 @@ class _MQTTRateLimiter:
     quick burst but this seemed to lead to message rejection at the device
     (at least on a recent msl320) and my guess is the device is trying to prevent
     message spoofing by rejecting messages too old in time (a few seconds for that msl320)
+    For this reason, only GET requests are now deferred (up to DEFERRED_MAX) when
+    the bucket is empty and they need to be re-signed when finally sent
+    (see async_rl_acquire). Any other request is discarded.
+    The rate-limiter is only accessed from the asyncio loop so it doesn't need locking.
     """
 
     DURATION: typing.Final = 60
     MAXQUEUE: typing.Final = 6
+    RATE: typing.Final = MAXQUEUE / DURATION
+    """tokens refilled per second"""
+    DEFERRED_MAX: typing.Final = 4
+    """max number of GET requests waiting for a token"""
 
     __slots__ = (
         "dropped",
-        "t_queue",
+        "tokens",
+        "t_update",
+        "deferred",
+        "deferred_timer",
     )
 
     def __init__(self) -> None:
         self.dropped: int = 0
-        self.t_queue: deque[float] = deque()
+        self.tokens: float = _MQTTRateLimiter.MAXQUEUE
+        self.t_update = monotonic()
+        self.deferred: dict[str, asyncio.Future] = {}
+        """GET requests (x namespace) waiting for a token"""
+        self.deferred_timer: asyncio.TimerHandle | None = None
+
+    def refill(self):
+        t_now = monotonic()
+        self.tokens = min(
+            self.tokens + (t_now - self.t_update) * _MQTTRateLimiter.RATE,
+            _MQTTRateLimiter.MAXQUEUE,
+        )
+        self.t_update = t_now
+
+    def acquire(self):
+        self.refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def get_delay(self, tokens: int = 1):
+        """Time to wait (after refill) for the bucket to hold 'tokens'."""
+        return max(tokens - self.tokens, 0) / _MQTTRateLimiter.RATE
 
 
 class _MerossMQTTClient(mqtt.Client):
@@ -69,19 +106,37 @@ class _MerossMQTTClient(mqtt.Client):
     STATE_DISCONNECTING = "disconnecting"
     STATE_DISCONNECTED = "disconnected"
 
+    INGEST_QUEUE_SIZE: typing.ClassVar = 256
+    """max number of received messages waiting to be processed in the asyncio loop"""
+    INGEST_BATCH_SIZE: typing.ClassVar = 16
+    """number of messages processed before yielding to the asyncio loop"""
+
+    AIO_READ_PACKETS: typing.ClassVar = 64
+    """max packets read at once when the socket is readable (asyncio transport)"""
+    AIO_MISC_PERIOD: typing.ClassVar = 1
+    """period of paho 'loop_misc' (keepalive) calls (asyncio transport)"""
+    AIO_RECONNECT_DELAY_MIN: typing.ClassVar = 1
+    AIO_RECONNECT_DELAY_MAX: typing.ClassVar = 120
+
     def __init__(
         self,
         client_id: str,
         subscribe_topics: list[tuple[str, int]],
         *,
         loop: asyncio.AbstractEventLoop | None = None,
+        asyncio_transport: bool = False,
     ):
+        """
+        loop: when set, the client notifies its owner in the asyncio loop
+        asyncio_transport: (requires loop) instead of running the paho network
+        thread the socket is managed by the asyncio loop (through paho 'external
+        loop' api) and only the (blocking) connection is run in an executor.
+        """
         super().__init__(client_id, protocol=mqtt.MQTTv311)
         self._lock_state = threading.Lock()
         """synchronize connect/disconnect (not contended by the mqtt thread)"""
-        self._lock_queue = threading.Lock()
-        """synchronize access to the transmit queue. Might be contended by the mqtt thread"""
         self._rl_dropped = 0
+        self._rl_deferred = 0
         self._rl2_queues: dict[str, _MQTTRateLimiter] = {}
         self._stateext = self.STATE_DISCONNECTED
         self._subscribe_error = None
@@ -96,11 +151,33 @@ class _MerossMQTTClient(mqtt.Client):
             # a non null value
             self._asyncio_loop = loop
             self._future_connected = None
-            self._tasks: list[asyncio.Task] = []
-            self.on_subscribe = self._mqttc_subscribe_loop
-            self.on_disconnect = self._mqttc_disconnect_loop
-            self.on_publish = self._mqttc_publish_loop
-            self.on_message = self._mqttc_message_loop
+            self._lock_ingest = threading.Lock()
+            """synchronize access to the receive queue (fed by the mqtt thread)"""
+            self._ingest_queue: deque[list] = deque()
+            """[msg, drop_key] entries waiting to be processed in the asyncio loop"""
+            self._ingest_scheduled = False
+            self._ingest_task: asyncio.Task | None = None
+            self._ingest_dropped = 0
+            self._aio_transport = asyncio_transport
+            if asyncio_transport:
+                self._aio_thread_id = None
+                self._aio_connect_task: asyncio.Task | None = None
+                self._aio_misc_timer: asyncio.TimerHandle | None = None
+                self.on_subscribe = self._mqttc_subscribe_aio
+                self.on_disconnect = self._mqttc_disconnect_aio
+                self.on_publish = self._mqttc_publish_aio
+                self.on_message = self._mqttc_message_aio
+                self.on_socket_open = self._mqttc_socket_open_aio
+                self.on_socket_close = self._mqttc_socket_close_aio
+                self.on_socket_register_write = self._mqttc_socket_register_write_aio
+                self.on_socket_unregister_write = (
+                    self._mqttc_socket_unregister_write_aio
+                )
+            else:
+                self.on_subscribe = self._mqttc_subscribe_loop
+                self.on_disconnect = self._mqttc_disconnect_loop
+                self.on_publish = self._mqttc_publish_loop
+                self.on_message = self._mqttc_message_loop
         else:
             self.on_subscribe = self._mqttc_subscribe
             self.on_disconnect = self._mqttc_disconnect
@@ -108,14 +185,39 @@ class _MerossMQTTClient(mqtt.Client):
         self.suppress_exceptions = True
 
     async def async_shutdown(self):
+        for _rl2 in self._rl2_queues.values():
+            if _rl2.deferred_timer:
+                _rl2.deferred_timer.cancel()
+                _rl2.deferred_timer = None
+            for future in _rl2.deferred.values():
+                if not future.done():
+                    # the callers are not cancelled: let them see a (handled) drop
+                    future.set_exception(MerossMQTTRateLimitException())
+            _rl2.deferred.clear()
         await self.async_disconnect()
-        for task in self._tasks:
-            await task
+        if self._ingest_task:
+            await self._ingest_task
 
     @property
     def rl_dropped(self):
         return self._rl_dropped
 
+    @property
+    def rl_deferred(self):
+        return self._rl_deferred
+
+    @property
+    def ingest_queue_depth(self):
+        return len(self._ingest_queue)
+
+    @property
+    def ingest_dropped(self):
+        return self._ingest_dropped
+
+    @property
+    def asyncio_transport(self):
+        return self._aio_transport
+
     @property
     def stateext(self):
         return self._stateext
@@ -133,7 +235,10 @@ class _MerossMQTTClient(mqtt.Client):
         future = self._future_connected
         if not future:
             self._future_connected = future = loop.create_future()
-        await loop.run_in_executor(None, self.safe_start, broker)
+        if self._aio_transport:
+            self._aio_start(broker)
+        else:
+            await loop.run_in_executor(None, self.safe_start, broker)
         return future
 
     async def async_disconnect(self):
@@ -141,9 +246,15 @@ class _MerossMQTTClient(mqtt.Client):
             self._future_connected.cancel()
             self._future_connected = None
         if self.state_active:
-            await self._asyncio_loop.run_in_executor(None, self.safe_stop)
+            if self._aio_transport:
+                self._aio_stop()
+            else:
+                await self._asyncio_loop.run_in_executor(None, self.safe_stop)
 
     def schedule_connect(self, broker: HostAddress):
+        if self._aio_transport:
+            self._aio_start(broker)
+            return
         # even if safe_connect should be as fast as possible and thread-safe
         # we still might incur some contention with thread stop/restart
         # so we delegate its call to an executor
@@ -176,75 +287,189 @@ class _MerossMQTTClient(mqtt.Client):
             self.loop_stop()
             self._stateext = self.STATE_DISCONNECTED
 
+    def _aio_start(self, broker: HostAddress):
+        """
+        asyncio transport version of safe_start. Needs to be called in the loop.
+        """
+        self._aio_thread_id = threading.get_ident()
+        if self._aio_connect_task:
+            self._aio_connect_task.cancel()
+        if self.socket():
+            # flush a DISCONNECT so that paho closes the current socket
+            self.disconnect()
+            self.loop_write()
+        self.connect_async(broker.host, broker.port)
+        self._stateext = self.STATE_CONNECTING
+        self._aio_connect_task = self._asyncio_loop.create_task(
+            self._async_aio_connect(0)
+        )
+
+    def _aio_stop(self):
+        """
+        asyncio transport version of safe_stop. The socket will be closed
+        (by paho) as soon as the DISCONNECT packet is flushed.
+        """
+        self._stateext = self.STATE_DISCONNECTING
+        if self._aio_connect_task:
+            self._aio_connect_task.cancel()
+            self._aio_connect_task = None
+        if self._aio_misc_timer:
+            self._aio_misc_timer.cancel()
+            self._aio_misc_timer = None
+        self.disconnect()
+        self._stateext = self.STATE_DISCONNECTED
+
+    async def _async_aio_connect(self, delay: float):
+        loop = self._asyncio_loop
+        try:
+            while True:
+                if delay:
+                    await asyncio.sleep(delay)
+                try:
+                    # socket connection (and tls handshake) are blocking
+                    await loop.run_in_executor(None, self.reconnect)
+                    break
+                except Exception:
+                    delay = min(
+                        delay * 2 or self.AIO_RECONNECT_DELAY_MIN,
+                        self.AIO_RECONNECT_DELAY_MAX,
+                    )
+        finally:
+            if self._aio_connect_task is asyncio.current_task():
+                self._aio_connect_task = None
+        if not self._aio_misc_timer:
+            self._aio_misc_timer = loop.call_later(self.AIO_MISC_PERIOD, self._aio_misc)
+
+    def _aio_call(self, callback: typing.Callable, *args):
+        """Runs callback in the loop (paho socket callbacks could be invoked in
+        the executor running the connection)."""
+        if threading.get_ident() == self._aio_thread_id:
+            callback(*args)
+        else:
+            self._asyncio_loop.call_soon_threadsafe(callback, *args)
+
+    def _aio_misc(self):
+        if self.state_inactive:
+            self._aio_misc_timer = None
+            return
+        self.loop_misc()
+        self._aio_misc_timer = self._asyncio_loop.call_later(
+            self.AIO_MISC_PERIOD, self._aio_misc
+        )
+
+    def _aio_read(self):
+        self.loop_read(self.AIO_READ_PACKETS)
+        sock = self.socket()
+        if sock and hasattr(sock, "pending") and sock.pending():  # type: ignore
+            # tls could have buffered data the selector doesn't know about
+            self._asyncio_loop.call_soon(self._aio_read)
+
+    def _aio_write(self):
+        self.loop_write()
+
+    def _aio_socket_open(self, fd: int):
+        self._asyncio_loop.add_reader(fd, self._aio_read)
+        if self.state_inactive:
+            # stopped while the connection was in progress
+            self.disconnect()
+
+    def _aio_socket_close(self, fd: int):
+        self._asyncio_loop.remove_reader(fd)
+        self._asyncio_loop.remove_writer(fd)
+
+    def _aio_disconnected(self):
+        if self.state_inactive:
+            self._stateext = self.STATE_DISCONNECTED
+        else:
+            self._stateext = self.STATE_RECONNECTING
+            if not self._aio_connect_task:
+                self._aio_connect_task = self._asyncio_loop.create_task(
+                    self._async_aio_connect(self.AIO_RECONNECT_DELAY_MIN)
+                )
+        self._asyncio_loop.call_soon(self._mqtt_disconnected)
+
+    def _get_rl(self, uuid: str):
+        try:
+            return self._rl2_queues[uuid]
+        except KeyError:
+            self._rl2_queues[uuid] = _rl2 = _MQTTRateLimiter()
+            return _rl2
+
     def get_rl_safe_delay(self, uuid: str):
         """
         Returns the 'safe delay' after which we should not incur rate-limiting.
         This is useful to 'plan' mqtt send when these could/should be delayed
         and has a rather stochastic connotation.
         """
-        with self._lock_queue:
-            try:
-                _rl2 = self._rl2_queues[uuid]
-            except KeyError:
-                # useless maybe but if we're probing this uuid it'll
-                # be likely used again
-                self._rl2_queues[uuid] = _MQTTRateLimiter()
-                return 0.0
-
-            t_now = monotonic()
-            t_duration_back = t_now - _MQTTRateLimiter.DURATION
-            t_queue = _rl2.t_queue
-            t_queue_len = len(t_queue)
-            while t_queue_len:
-                if t_queue[0] <= t_duration_back:
-                    # discard in case
-                    t_queue.popleft()
-                    t_queue_len -= 1
-                    continue
-                if t_queue_len >= _MQTTRateLimiter.MAXQUEUE:
-                    # queue full..any send before expiration
-                    # of oldest send will be dropped
-                    t_oldest_exp = t_queue[0] + _MQTTRateLimiter.DURATION
-                    return t_oldest_exp - t_now  # assert > 0 ?
-                # queue not full but we want to 'weigh-in' the queue length
-                return _MQTTRateLimiter.DURATION / (
-                    _MQTTRateLimiter.MAXQUEUE - t_queue_len
+        _rl2 = self._get_rl(uuid)
+        _rl2.refill()
+        # account for the already deferred requests too
+        return _rl2.get_delay(len(_rl2.deferred) + 1)
+
+    async def async_rl_acquire(self, uuid: str, request: "MerossMessage"):
+        """
+        Checks the rate-limiter for the device before publishing. Returns False
+        when the request can be published right away or True when it was
+        deferred (and it is now its turn) so that it needs a fresh signature.
+        Raises MerossMQTTRateLimitException when the request is discarded.
+        Only GETs are deferred since they're idempotent: a newer GET for the
+        same namespace supersedes the one already waiting (which is discarded).
+        Commands are never deferred so they're either sent 'fresh' or dropped.
+        """
+        _rl2 = self._get_rl(uuid)
+        is_get = request.method == mc.METHOD_GET
+        # commands overtake any deferred GET
+        if not (is_get and _rl2.deferred) and _rl2.acquire():
+            return False
+
+        deferred = _rl2.deferred
+        namespace = request.namespace
+        if is_get and (namespace in deferred or len(deferred) < _rl2.DEFERRED_MAX):
+            if (future := deferred.get(namespace)) and not future.done():
+                # superseded
+                self._rl_dropped += 1
+                _rl2.dropped += 1
+                future.set_exception(MerossMQTTRateLimitException())
+            # replacing the value keeps the (oldest) position in the queue
+            deferred[namespace] = future = self._asyncio_loop.create_future()
+            self._rl_deferred += 1
+            if not _rl2.deferred_timer:
+                _rl2.deferred_timer = self._asyncio_loop.call_later(
+                    _rl2.get_delay(), self._rl_release, _rl2
+                )
+            await future
+            return True
+
+        self._rl_dropped += 1
+        _rl2.dropped += 1
+        raise MerossMQTTRateLimitException()
+
+    def _rl_release(self, _rl2: _MQTTRateLimiter):
+        """Timer callback releasing the deferred GETs as tokens become available."""
+        _rl2.deferred_timer = None
+        deferred = _rl2.deferred
+        while deferred:
+            namespace, future = next(iter(deferred.items()))
+            if future.done():
+                # cancelled by the caller
+                del deferred[namespace]
+                continue
+            if not _rl2.acquire():
+                _rl2.deferred_timer = self._asyncio_loop.call_later(
+                    _rl2.get_delay(), self._rl_release, _rl2
                 )
-            # queue empty
-            return 0.0
+                return
+            del deferred[namespace]
+            future.set_result(None)
 
     def rl_publish(self, uuid: str, request: "MerossMessage"):
-        with self._lock_queue:
-
-            try:
-                _rl2 = self._rl2_queues[uuid]
-            except KeyError:
-                self._rl2_queues[uuid] = _rl2 = _MQTTRateLimiter()
-
-            t_now = monotonic()
-            # implementing a rate-limiter trying to keep the send rate to lower than
-            # 1 MQTT publish every 10 seconds (on average x device). This is accomplished
-            # by keeping the count (and times) of sent messages in the last minute
-            t_duration_back = t_now - _MQTTRateLimiter.DURATION
-            t_queue = _rl2.t_queue
-            t_queue_len = len(t_queue)
-            while t_queue_len:
-                if t_queue[0] <= t_duration_back:
-                    t_queue.popleft()
-                    t_queue_len -= 1
-                    continue
-                if t_queue_len >= _MQTTRateLimiter.MAXQUEUE:
-                    self._rl_dropped += 1
-                    _rl2.dropped += 1
-                    raise MerossMQTTRateLimitException()
-                break
-
-            t_queue.append(t_now)
-            return mqtt.Client.publish(
-                self,
-                mc.TOPIC_REQUEST.format(uuid),
-                request.json(),
-            )
+        """Publishes the request to the device topic. Rate-limiting must have
+        been checked before (see async_rl_acquire)."""
+        return mqtt.Client.publish(
+            self,
+            mc.TOPIC_REQUEST.format(uuid),
+            request.json(),
+        )
 
     def _mqtt_connected(self):
         """
@@ -269,15 +494,89 @@ class _MerossMQTTClient(mqtt.Client):
         """
         pass
 
-    def mqtt_message(self, msg: mqtt.MQTTMessage):
+    def _mqtt_ingested(self):
         """
         This is a placeholder method called by the asyncio implementation in the
-        main thread when the mqtt client receives a message. Defaults to creating
-        a task for processing the message in async_mqtt_message
+        main thread after a batch of received messages has been processed
         """
-        task = self._asyncio_loop.create_task(self.async_mqtt_message(msg))
-        self._tasks.append(task)
-        task.add_done_callback(self._tasks.remove)
+        pass
+
+    def _ingest_start(self):
+        """Called in the main thread to start consuming the receive queue."""
+        self._ingest_task = self._asyncio_loop.create_task(self._async_ingest())
+
+    async def _async_ingest(self):
+        """
+        Consumes the receive queue in batches so that we don't need a task
+        for every message. Runs until the queue is empty and will be restarted
+        by the mqtt thread (see _mqttc_message_loop) when new messages arrive.
+        """
+        queue = self._ingest_queue
+        lock = self._lock_ingest
+        batch_size = self.INGEST_BATCH_SIZE
+        try:
+            while True:
+                with lock:
+                    if not queue:
+                        self._ingest_scheduled = False
+                        self._ingest_task = None
+                        return
+                    batch = [
+                        queue.popleft()[0] for _ in range(min(len(queue), batch_size))
+                    ]
+                for msg in batch:
+                    await self.async_mqtt_message(msg)
+                self._mqtt_ingested()
+                # let the loop breathe in case of message bursts
+                await asyncio.sleep(0)
+        except BaseException:
+            with lock:
+                self._ingest_scheduled = False
+                self._ingest_task = None
+            raise
+
+    @staticmethod
+    def _ingest_drop_key(msg: mqtt.MQTTMessage):
+        """
+        Returns the 'identity' (device, namespace) of a PUSH message so that
+        we can discard stale ones when the receive queue overflows.
+        """
+        try:
+            header = MerossLazyResponse(msg.payload)[mc.KEY_HEADER]
+            if header[mc.KEY_METHOD] == mc.METHOD_PUSH:
+                return (header[mc.KEY_FROM], header[mc.KEY_NAMESPACE])
+        except Exception:
+            pass
+        return None
+
+    def _ingest_drop(self, msg: mqtt.MQTTMessage):
+        """
+        Called (in the mqtt thread) with the queue lock held when the
+        receive queue is full. We'll discard the oldest PUSH for the same
+        device and namespace of the incoming message since this is superseded
+        anyway, else the oldest PUSH at all, else the oldest message.
+        Drop keys are computed lazily and cached in the queue entries so that
+        the normal (not overflowing) flow doesn't need to decode anything here.
+        """
+        self._ingest_dropped += 1
+        queue = self._ingest_queue
+        drop_key = self._ingest_drop_key(msg)
+        index_push = None
+        for index, entry in enumerate(queue):
+            entry_key = entry[1]
+            if entry_key is False:
+                entry[1] = entry_key = self._ingest_drop_key(entry[0])
+            if entry_key:
+                if entry_key == drop_key:
+                    del queue[index]
+                    return drop_key
+                if index_push is None:
+                    index_push = index
+        if index_push is None:
+            queue.popleft()
+        else:
+            del queue[index_push]
+        return drop_key
 
     async def async_mqtt_message(self, msg: mqtt.MQTTMessage):
         """
@@ -314,8 +613,56 @@ class _MerossMQTTClient(mqtt.Client):
     def _mqttc_publish_loop(self, client, userdata, mid):
         self._asyncio_loop.call_soon_threadsafe(self._mqtt_published)
 
+    def _mqttc_subscribe_aio(self, client, userdata, mid, granted_qos):
+        """asyncio transport version of the callback: we're already in the loop"""
+        self._stateext = self.STATE_CONNECTED
+        self._asyncio_loop.call_soon(self._mqtt_connected)
+
+    def _mqttc_disconnect_aio(self, client: mqtt.Client, userdata, rc):
+        self._aio_call(self._aio_disconnected)
+
+    def _mqttc_publish_aio(self, client, userdata, mid):
+        self._asyncio_loop.call_soon(self._mqtt_published)
+
+    def _mqttc_message_aio(self, client, userdata, msg: mqtt.MQTTMessage):
+        """asyncio transport version of _mqttc_message_loop (we're in the loop)"""
+        with self._lock_ingest:
+            if len(self._ingest_queue) >= self.INGEST_QUEUE_SIZE:
+                drop_key = self._ingest_drop(msg)
+            else:
+                drop_key = False
+            self._ingest_queue.append([msg, drop_key])
+            if not self._ingest_scheduled:
+                self._ingest_scheduled = True
+                self._ingest_start()
+
+    def _mqttc_socket_open_aio(self, client, userdata, sock):
+        self._aio_call(self._aio_socket_open, sock.fileno())
+
+    def _mqttc_socket_close_aio(self, client, userdata, sock):
+        # the socket is closed right after this returns
+        self._aio_call(self._aio_socket_close, sock.fileno())
+
+    def _mqttc_socket_register_write_aio(self, client, userdata, sock):
+        self._aio_call(self._asyncio_loop.add_writer, sock.fileno(), self._aio_write)
+
+    def _mqttc_socket_unregister_write_aio(self, client, userdata, sock):
+        self._aio_call(self._asyncio_loop.remove_writer, sock.fileno())
+
     def _mqttc_message_loop(self, client, userdata, msg: mqtt.MQTTMessage):
-        self._asyncio_loop.call_soon_threadsafe(self.mqtt_message, msg)
+        """
+        Messages are queued (bounded) and the asyncio loop is only woken up
+        when the queue consumer is not already running.
+        """
+        with self._lock_ingest:
+            if len(self._ingest_queue) >= self.INGEST_QUEUE_SIZE:
+                drop_key = self._ingest_drop(msg)
+            else:
+                drop_key = False
+            self._ingest_queue.append([msg, drop_key])
+            if not self._ingest_scheduled:
+                self._ingest_scheduled = True
+                self._asyncio_loop.call_soon_threadsafe(self._ingest_start)
 
 
 class MerossMQTTAppClient(_MerossMQTTClient):
@@ -336,14 +683,28 @@ class MerossMQTTAppClient(_MerossMQTTClient):
         app_id: str | None = None,
         loop: asyncio.AbstractEventLoop | None = None,
         sslcontext: ssl.SSLContext | None = None,
+        subscribe_push: bool = True,
+        asyncio_transport: bool = False,
     ):
+        """
+        subscribe_push: set to False when another client (with the same userid)
+        is already receiving the account PUSHes so that this one only carries
+        the replies to its own requests.
+        """
         if not app_id:
             app_id = generate_app_id()
         self.app_id = app_id
         self.topic_command = f"/app/{userid}-{app_id}/subscribe"
         self.topic_push = f"/app/{userid}/subscribe"
         super().__init__(
-            f"app:{app_id}", [(self.topic_push, 1), (self.topic_command, 1)], loop=loop
+            f"app:{app_id}",
+            (
+                [(self.topic_push, 1), (self.topic_command, 1)]
+                if subscribe_push
+                else [(self.topic_command, 1)]
+            ),
+            loop=loop,
+            asyncio_transport=asyncio_transport,
         )
         self.username_pw_set(userid, md5(f"{userid}{key}".encode("utf8")).hexdigest())
         if sslcontext:
@@ -333,6 +333,75 @@ class ProtocolSensor(me.MEAlwaysAvailableMixin, MLEnumSensor):
             self.flush_state()
 
 
+class MLMetricsSensor(me.MEAlwaysAvailableMixin, MLNumericSensor):
+    """
+    Diagnostic sensor exposing the transport metrics (see helpers.metrics)
+    for a protocol: the state is the average request latency (ms).
+    """
+
+    ATTR_REQUESTS: typing.Final = "requests"
+    ATTR_TIMEOUTS: typing.Final = "timeouts"
+    ATTR_ERRORS: typing.Final = "errors"
+    ATTR_BYTES_OUT: typing.Final = "bytes_out"
+    ATTR_BYTES_IN: typing.Final = "bytes_in"
+    ATTR_LATENCY_P90: typing.Final = "latency_p90"
+    ATTR_LATENCY_MAX: typing.Final = "latency_max"
+
+    is_diagnostic: typing.Final = True
+
+    manager: "MerossDevice"
+
+    # HA core entity attributes:
+    entity_category = me.EntityCategory.DIAGNOSTIC
+    _unrecorded_attributes = frozenset(
+        {
+            ATTR_REQUESTS,
+            ATTR_TIMEOUTS,
+            ATTR_ERRORS,
+            ATTR_BYTES_OUT,
+            ATTR_BYTES_IN,
+            ATTR_LATENCY_P90,
+            ATTR_LATENCY_MAX,
+            *MLNumericSensor._unrecorded_attributes,
+        }
+    )
+
+    __slots__ = ("protocol",)
+
+    def __init__(self, manager: "MerossDevice", protocol: str):
+        self.protocol = protocol
+        self.extra_state_attributes = {}
+        super().__init__(
+            manager,
+            None,
+            f"latency_{protocol}",
+            MLNumericSensor.DeviceClass.DURATION,
+            native_unit_of_measurement=me.MerossEntity.hac.UnitOfTime.MILLISECONDS,
+            suggested_display_precision=0,
+        )
+
+    def update_metrics(self):
+        if not (protocol_metrics := self.manager.metrics.protocols.get(self.protocol)):
+            return
+        latency = protocol_metrics.latency
+        # latencies are recorded in seconds but exposed in ms like the state
+        latency_p90 = latency.percentile(90)
+        self.extra_state_attributes = {
+            self.ATTR_REQUESTS: protocol_metrics.requests,
+            self.ATTR_TIMEOUTS: protocol_metrics.timeouts,
+            self.ATTR_ERRORS: protocol_metrics.errors,
+            self.ATTR_BYTES_OUT: protocol_metrics.bytes_out,
+            self.ATTR_BYTES_IN: protocol_metrics.bytes_in,
+            self.ATTR_LATENCY_P90: (
+                None if latency_p90 is None else round(latency_p90 * 1000)
+            ),
+            self.ATTR_LATENCY_MAX: round(latency.max * 1000),
+        }
+        average = latency.average
+        self.native_value = None if average is None else round(average * 1000)
+        self.flush_state()
+
+
 class MLSignalStrengthSensor(EntityNamespaceMixin, MLNumericSensor):
 
     ns = mn.Appliance_System_Runtime
@@ -49,6 +49,7 @@ from aiohttp import web
 # so I've changed a bit the import sequence in meross_lan
 # to have the homeassistant.core imported (initialized) before
 # homeassistant.helpers.storage
+from custom_components.meross_lan.helpers import tracing
 from custom_components.meross_lan.merossclient import const as mc, namespaces as mn
 
 from .mixins import MerossEmulator, MerossEmulatorDescriptor
@@ -153,10 +154,10 @@ def generate_emulators(
     uuidsub = 0
     for f in os.listdir(tracespath):
         fullpath = os.path.join(tracespath, f)
-        # expect only valid csv or json files
-        f = f.split(".")
-        if f[-1] not in ("csv", "txt", "json"):
+        # expect only valid csv, json or (compact) meross_lan traces
+        if not (f.endswith((".csv", ".txt", ".json")) or tracing.is_trace_file(f)):
             continue
+        f = f.split(".")
 
         # filename could be formatted to carry device definitions parameters:
         # format the filename like 'xxxwhatever-Kdevice_key-Udevice_id'
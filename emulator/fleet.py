@@ -0,0 +1,429 @@
+"""
+    Emulator fleet: a load generator hosting a lot of MerossEmulator(s)
+    (cloned from the traces in a path with synthetic uuids and keys) behind
+    a single asyncio loop. The fleet is served through:
+    - a single aiohttp route ('/{uuid}/config') so that each emulated device
+    can be configured in meross_lan with host '{ip}:{port}/{uuid}'
+    - a minimal MQTT 3.1.1 broker stand-in where PUBLISH(es) to the device
+    topics ('/appliance/{uuid}/subscribe') are served by the emulators while
+    anything else is routed to the subscribed clients (i.e. meross_lan)
+    PUSHes are injected at a configurable rate (per device) by querying the
+    state of 'pushable' namespaces so that the client side can be stressed
+    with a realistic mix of traffic.
+    The timestampMs of the injected PUSHes carries the millisecond part of the
+    time of injection so that clients can measure the delivery latency.
+
+    Command line invocation:
+    'python -m aiohttp.web -H localhost -P 80 emulator.fleet:run -count1000 -push0.1 -mqtt1883 tracespath'
+"""
+
+import asyncio
+import os
+import struct
+from time import perf_counter, time
+from uuid import uuid4
+
+from aiohttp import web
+
+from custom_components.meross_lan.helpers import tracing
+from custom_components.meross_lan.merossclient import (
+    MerossMessage,
+    compute_message_signature,
+    const as mc,
+    json_dumps,
+    namespaces as mn,
+)
+
+from . import build_emulator
+from .mixins import MerossEmulator
+
+
+def _encode_length(length: int):
+    encoded = bytearray()
+    while True:
+        digit = length % 128
+        length //= 128
+        encoded.append(digit | 0x80 if length else digit)
+        if not length:
+            return bytes(encoded)
+
+
+def topic_matches(topic_filter: str, topic: str):
+    """MQTT topic filter matching ('+' and '#' wildcards)."""
+    filter_levels = topic_filter.split("/")
+    topic_levels = topic.split("/")
+    for index, level in enumerate(filter_levels):
+        if level == "#":
+            return True
+        if index >= len(topic_levels):
+            return False
+        if (level != "+") and (level != topic_levels[index]):
+            return False
+    return len(filter_levels) == len(topic_levels)
+
+
+class FleetBroker:
+    """
+    Just enough of an MQTT 3.1.1 broker to serve the fleet: qos 0/1 PUBLISH
+    (outgoing ones are always qos 0), wildcard SUBSCRIBE, UNSUBSCRIBE and
+    keepalive. No authentication, no retained messages, no persistent sessions.
+    """
+
+    __slots__ = (
+        "fleet",
+        "server",
+        "sessions",
+    )
+
+    def __init__(self, fleet: "EmulatorFleet"):
+        self.fleet = fleet
+        self.server: asyncio.Server = None  # type: ignore
+        self.sessions: dict[asyncio.StreamWriter, list[str]] = {}
+        """client connection -> topic filters subscribed"""
+
+    async def async_start(self, host: str, port: int):
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def async_stop(self):
+        for writer in self.sessions:
+            writer.close()
+        self.sessions.clear()
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None  # type: ignore
+
+    async def async_drain(self):
+        for writer in list(self.sessions):
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+    def publish(self, topic: str, payload: bytes):
+        packet = None
+        for writer, topic_filters in self.sessions.items():
+            for topic_filter in topic_filters:
+                if topic_matches(topic_filter, topic):
+                    if not packet:
+                        topic_bytes = topic.encode("utf-8")
+                        body = struct.pack("!H", len(topic_bytes)) + topic_bytes
+                        packet = b"\x30" + _encode_length(len(body) + len(payload))
+                        packet = packet + body + payload
+                    writer.write(packet)
+                    break
+
+    def _handle_publish(self, flags: int, body: bytes, writer: asyncio.StreamWriter):
+        topic_length = struct.unpack_from("!H", body)[0]
+        topic = body[2 : 2 + topic_length].decode("utf-8")
+        offset = 2 + topic_length
+        if flags & 0x06:
+            # qos > 0: we're acknowledging qos 2 like qos 1 (not really compliant)
+            writer.write(b"\x40\x02" + body[offset : offset + 2])
+            offset += 2
+        payload = body[offset:]
+        match topic.split("/"):
+            case ("", "appliance", uuid, "subscribe"):
+                if emulator := self.fleet.emulators.get(uuid):
+                    self.fleet.mqtt_requests += 1
+                    try:
+                        request = MerossMessage.decode(payload)
+                        if response := self.fleet.handle(emulator, request):
+                            self.publish(
+                                request[mc.KEY_HEADER][mc.KEY_FROM],
+                                response.encode("utf-8"),
+                            )
+                    except Exception as exception:
+                        emulator._log_message(
+                            exception.__class__.__name__, str(exception)
+                        )
+                    return
+        self.publish(topic, payload)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        topic_filters = self.sessions[writer] = []
+        try:
+            while True:
+                header = (await reader.readexactly(1))[0]
+                length = 0
+                multiplier = 1
+                while True:
+                    digit = (await reader.readexactly(1))[0]
+                    length += (digit & 0x7F) * multiplier
+                    multiplier *= 128
+                    if not digit & 0x80:
+                        break
+                body = await reader.readexactly(length)
+                match header & 0xF0:
+                    case 0x30:  # PUBLISH
+                        self._handle_publish(header & 0x0F, body, writer)
+                    case 0x10:  # CONNECT
+                        writer.write(b"\x20\x02\x00\x00")
+                    case 0x80:  # SUBSCRIBE
+                        offset = 2
+                        granted = bytearray()
+                        while offset < length:
+                            topic_length = struct.unpack_from("!H", body, offset)[0]
+                            offset += 2
+                            topic_filters.append(
+                                body[offset : offset + topic_length].decode("utf-8")
+                            )
+                            offset += topic_length + 1
+                            granted.append(0)
+                        writer.write(
+                            b"\x90"
+                            + _encode_length(2 + len(granted))
+                            + body[0:2]
+                            + granted
+                        )
+                    case 0xA0:  # UNSUBSCRIBE
+                        offset = 2
+                        while offset < length:
+                            topic_length = struct.unpack_from("!H", body, offset)[0]
+                            offset += 2
+                            topic_filter = body[offset : offset + topic_length]
+                            offset += topic_length
+                            try:
+                                topic_filters.remove(topic_filter.decode("utf-8"))
+                            except ValueError:
+                                pass
+                        writer.write(b"\xb0\x02" + body[0:2])
+                    case 0xC0:  # PINGREQ
+                        writer.write(b"\xd0\x00")
+                    case 0xE0:  # DISCONNECT
+                        break
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        self.sessions.pop(writer, None)
+        writer.close()
+
+
+class EmulatorFleet:
+    """
+    Builds 'count' emulators cloning (round-robin) the traces found in tracespath.
+    When key is None every emulator gets its own random key else they all share it.
+    push_rate is the average number of PUSHes per second per device.
+    """
+
+    UUID_PREFIX = "f1ee7"
+    PUSH_TICK = 0.1
+    """interval (seconds) between batches of injected PUSHes"""
+
+    __slots__ = (
+        "emulators",
+        "push_rate",
+        "broker",
+        "http_requests",
+        "mqtt_requests",
+        "pushes",
+        "busy_time",
+        "_push_namespaces",
+        "_push_task",
+        "_runner",
+    )
+
+    def __init__(
+        self,
+        tracespath: str,
+        count: int,
+        *,
+        key: str | None = None,
+        push_rate: float = 0,
+    ):
+        tracefiles = sorted(
+            os.path.join(tracespath, f)
+            for f in os.listdir(tracespath)
+            if f.endswith((".csv", ".txt", ".json")) or tracing.is_trace_file(f)
+        )
+        self.emulators: dict[str, MerossEmulator] = {}
+        self._push_namespaces: dict[str, list[mn.Namespace]] = {}
+        for index in range(count):
+            uuid = f"{self.UUID_PREFIX}{index:027x}"
+            emulator = build_emulator(
+                tracefiles[index % len(tracefiles)],
+                key=uuid4().hex if key is None else key,
+                uuid=uuid,
+            )
+            emulator.LOG_MESSAGES = False
+            self.emulators[uuid] = emulator
+            push_namespaces = []
+            for namespace in emulator.descriptor.ability:
+                ns = mn.NAMESPACES.get(namespace)
+                if ns and ns.has_push and (ns.has_get is not False):
+                    push_namespaces.append(ns)
+            self._push_namespaces[uuid] = push_namespaces
+        self.push_rate = push_rate
+        self.broker = FleetBroker(self)
+        self.http_requests = 0
+        self.mqtt_requests = 0
+        self.pushes = 0
+        self.busy_time = 0.0
+        """time spent (in the loop) by the emulators serving the requests/pushes"""
+        self._push_task: asyncio.Task | None = None
+        self._runner: web.AppRunner | None = None
+
+    def build_app(self):
+        app = web.Application()
+        app.router.add_post("/{uuid}/config", self._async_web_post)
+        return app
+
+    async def async_startup(self, mqtt_host: str, mqtt_port: int):
+        """Starts the emulators, the broker and the PUSH injection."""
+        for emulator in self.emulators.values():
+            await emulator.async_startup(enable_scheduler=True, enable_mqtt=False)
+        mqtt_port = await self.broker.async_start(mqtt_host, mqtt_port)
+        if self.push_rate:
+            self._push_task = asyncio.get_running_loop().create_task(
+                self._async_push_loop()
+            )
+        return mqtt_port
+
+    async def async_shutdown(self):
+        if self._push_task:
+            self._push_task.cancel()
+            self._push_task = None
+        await self.broker.async_stop()
+        for emulator in self.emulators.values():
+            emulator.shutdown()
+
+    async def async_start(
+        self, host: str = "127.0.0.1", http_port: int = 0, mqtt_port: int = 0
+    ):
+        """
+        Runs the whole fleet (HTTP server included) in the current loop.
+        Returns the (actual) HTTP and MQTT ports.
+        """
+        mqtt_port = await self.async_startup(host, mqtt_port)
+        self._runner = web.AppRunner(self.build_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, http_port)
+        await site.start()
+        return self._runner.addresses[0][1], mqtt_port
+
+    async def async_stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+        await self.async_shutdown()
+
+    def handle(self, emulator: MerossEmulator, request: MerossMessage | str):
+        epoch = perf_counter()
+        try:
+            return emulator.handle(request)
+        finally:
+            self.busy_time += perf_counter() - epoch
+
+    def push(self, emulator: MerossEmulator):
+        """Publishes the current state of a (random) pushable namespace."""
+        epoch = perf_counter()
+        uuid = emulator.uuid
+        push_namespaces = self._push_namespaces[uuid]
+        try:
+            ns = push_namespaces[self.pushes % len(push_namespaces)]
+        except ZeroDivisionError:
+            return
+        try:
+            with emulator.lock:
+                response = emulator._handle_message(
+                    {
+                        mc.KEY_MESSAGEID: uuid4().hex,
+                        mc.KEY_NAMESPACE: ns.name,
+                        mc.KEY_METHOD: mc.METHOD_GET,
+                    },
+                    ns.payload_get,
+                )
+            if (not response) or (
+                response[mc.KEY_HEADER][mc.KEY_METHOD] != mc.METHOD_GETACK
+            ):
+                raise Exception(f"{ns.name} state not available")
+            header = response[mc.KEY_HEADER]
+            header[mc.KEY_METHOD] = mc.METHOD_PUSH
+            header[mc.KEY_FROM] = topic = mc.TOPIC_RESPONSE.format(uuid)
+            timestamp = time()
+            header[mc.KEY_TIMESTAMP] = int(timestamp)
+            header[mc.KEY_TIMESTAMPMS] = int((timestamp % 1) * 1000)
+            header[mc.KEY_SIGN] = compute_message_signature(
+                header[mc.KEY_MESSAGEID], emulator.key, int(timestamp)
+            )
+            self.broker.publish(topic, json_dumps(response).encode("utf-8"))
+            self.pushes += 1
+        except Exception:
+            # don't bother anymore with this one
+            push_namespaces.remove(ns)
+        finally:
+            self.busy_time += perf_counter() - epoch
+
+    async def _async_web_post(self, request: web.Request):
+        try:
+            emulator = self.emulators[request.match_info["uuid"]]
+        except KeyError:
+            return web.Response(status=404)
+        self.http_requests += 1
+        try:
+            return web.Response(
+                status=200,
+                text=self.handle(emulator, await request.text()),
+            )
+        except Exception as exception:
+            return web.Response(
+                status=500,
+                reason=str(exception) or exception.__class__.__name__,
+            )
+
+    async def _async_push_loop(self):
+        emulators = list(self.emulators.values())
+        count = len(emulators)
+        pushes_per_tick = self.push_rate * count * self.PUSH_TICK
+        index = 0
+        pending = 0.0
+        while True:
+            await asyncio.sleep(self.PUSH_TICK)
+            pending += pushes_per_tick
+            while pending >= 1:
+                pending -= 1
+                self.push(emulators[index])
+                index = (index + 1) % count
+            await self.broker.async_drain()
+
+
+def run(argv):
+    """
+    self running python app entry point (see module docstring). Arguments:
+    -countN: number of emulated devices (default 100)
+    -keyK: shared device key (default ""). Use '-key' alone for random keys
+    -pushR: PUSHes per second per device (default 0)
+    -mqttP: MQTT broker port (default 1883)
+    """
+    count = 100
+    key = ""
+    push_rate = 0.0
+    mqtt_port = 1883
+    tracespath = "."
+    for arg in argv:
+        arg: str
+        if arg.startswith("-count"):
+            count = int(arg[6:])
+        elif arg.startswith("-key"):
+            key = arg[4:].strip() or None
+        elif arg.startswith("-push"):
+            push_rate = float(arg[5:])
+        elif arg.startswith("-mqtt"):
+            mqtt_port = int(arg[5:])
+        else:
+            tracespath = arg
+
+    fleet = EmulatorFleet(tracespath, count, key=key, push_rate=push_rate)
+    app = fleet.build_app()
+
+    async def _on_startup(app: web.Application):
+        await fleet.async_startup("0.0.0.0", mqtt_port)
+
+    async def _on_shutdown(app: web.Application):
+        await fleet.async_shutdown()
+
+    app.on_startup.append(_on_startup)
+    app.on_shutdown.append(_on_shutdown)
+
+    return app
@@ -1,14 +1,12 @@
 import asyncio
-from base64 import b64decode, b64encode
 from json import JSONDecodeError
 import threading
 from time import time
 import typing
 from zoneinfo import ZoneInfo
 
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-
 from custom_components.meross_lan import const as mlc
+from custom_components.meross_lan.helpers import tracing
 from custom_components.meross_lan.helpers.manager import ConfigEntryManager
 from custom_components.meross_lan.merossclient import (
     HostAddress,
@@ -31,6 +29,7 @@ from custom_components.meross_lan.merossclient import (
     update_dict_strict,
     update_dict_strict_by_key,
 )
+from custom_components.meross_lan.merossclient.encryption import MerossEncryptionCodec
 from custom_components.meross_lan.merossclient.mqttclient import MerossMQTTDeviceClient
 
 if typing.TYPE_CHECKING:
@@ -51,12 +50,17 @@ class MerossEmulatorDescriptor(MerossDeviceDescriptor):
         userId: int | None = None,
     ):
         self.namespaces = {}
-        with open(tracefile, "r", encoding="utf8") as f:
-            if tracefile.endswith(".json.txt"):
-                # HA diagnostics trace
-                self._import_json(f)
-            else:
-                self._import_tsv(f)
+        if tracing.is_trace_file(tracefile):
+            # ndjson/binary (eventually compressed) meross_lan trace
+            for record in tracing.read_records(tracefile):
+                self._import_tracerow(record)
+        else:
+            with open(tracefile, "r", encoding="utf8") as f:
+                if tracefile.endswith(".json.txt"):
+                    # HA diagnostics trace
+                    self._import_json(f)
+                else:
+                    self._import_tsv(f)
 
         super().__init__(
             self.namespaces[mn.Appliance_System_All.name]
@@ -155,6 +159,9 @@ class MerossEmulator:
     """
 
     MAXIMUM_RESPONSE_SIZE = 3000
+    # set to False (per instance) to avoid the (costly) dump of every
+    # message when running a lot of emulators (see emulator.fleet)
+    LOG_MESSAGES = True
 
     __slots__ = (
         "epoch",
@@ -168,7 +175,7 @@ class MerossEmulator:
         "mqtt_connected",
         "_scheduler_unsub",
         "_tzinfo",
-        "_cipher",
+        "_encryption_codec",
         "__dict__",
     )
 
@@ -184,14 +191,11 @@ class MerossEmulator:
         self.mqtt_connected = None
         self._scheduler_unsub = None
         self._tzinfo: ZoneInfo | None = None
-        self._cipher = (
-            Cipher(
-                algorithms.AES(
-                    compute_message_encryption_key(
-                        descriptor.uuid, key, descriptor.macAddress
-                    ).encode("utf-8")
-                ),
-                modes.CBC("0000000000000000".encode("utf8")),
+        self._encryption_codec = (
+            MerossEncryptionCodec(
+                compute_message_encryption_key(
+                    descriptor.uuid, key, descriptor.macAddress
+                ).encode("utf-8")
             )
             if mn.Appliance_Encrypt_ECDHE.name in descriptor.ability
             else None
@@ -255,7 +259,7 @@ class MerossEmulator:
         scenario like for testing (where the web/mqtt environments are likely mocked)
         This method is thread-safe
         """
-        cipher = None
+        codec = None
         if isinstance(request, str):
             # this is typically the path when processing HTTP requests.
             # we're now 'enforcing' encrypted local traffic if device abilities
@@ -263,13 +267,10 @@ class MerossEmulator:
             try:
                 request = MerossMessage.decode(request)
             except JSONDecodeError:
-                if cipher := self._cipher:
-                    decryptor = cipher.decryptor()
-                    request = (
-                        (decryptor.update(b64decode(request)) + decryptor.finalize())
-                        .decode("utf8")
-                        .rstrip("\0")
-                    )
+                if codec := self._encryption_codec:
+                    # the codec buffers are shared so we need to serialize access
+                    with self.lock:
+                        request = codec.decrypt(request)
                     request = MerossMessage.decode(request)
                 else:
                     raise
@@ -277,7 +278,7 @@ class MerossEmulator:
                 # when a non encrypted requested is received the device
                 # actually resets the TCP connection..here we're just raising an
                 # exception in the hope we can emulate a broken connection
-                if self._cipher and (
+                if self._encryption_codec and (
                     request[mc.KEY_HEADER][mc.KEY_NAMESPACE]
                     != mn.Appliance_System_Ability.name
                 ):
@@ -285,7 +286,8 @@ class MerossEmulator:
 
         request_header = request[mc.KEY_HEADER]
         request_payload = request[mc.KEY_PAYLOAD]
-        self._log_message("RX", request.json())
+        if self.LOG_MESSAGES:
+            self._log_message("RX", request.json())
         with self.lock:
             # guarantee thread safety by locking the whole message handling
             self.update_epoch()
@@ -313,13 +315,9 @@ class MerossEmulator:
                 # - mss310:  2.9k
                 response = response[: self.MAXIMUM_RESPONSE_SIZE]
             self._log_message("TX", response)
-            if cipher:
-                response_bytes = response.encode("utf-8")
-                response_bytes += bytes([0] * (16 - (len(response_bytes) % 16)))
-                encryptor = cipher.encryptor()
-                response = b64encode(
-                    encryptor.update(response_bytes) + encryptor.finalize()
-                ).decode("utf-8")
+            if codec:
+                with self.lock:
+                    response = codec.encrypt(response)
             return response
 
         return None
@@ -606,7 +604,8 @@ class MerossEmulator:
         return p_control[key]
 
     def _log_message(self, tag: str, message: str):
-        print(f"Emulator({self.uuid}) {tag}: {message}")
+        if self.LOG_MESSAGES:
+            print(f"Emulator({self.uuid}) {tag}: {message}")
 
     def _scheduler(self):
         """Called by asyncio at (almost) regular intervals to trigger
@@ -724,6 +723,6 @@ class MerossEmulator:
             self.descriptor.online[mc.KEY_STATUS] = mc.STATUS_NOTONLINE
 
     def _mqttc_message(self, client: "mqtt.Client", userdata, msg: "mqtt.MQTTMessage"):
-        request = MerossMessage.decode(msg.payload.decode("utf-8"))
+        request = MerossMessage.decode(msg.payload)
         if response := self.handle(request):
             client.publish(request[mc.KEY_HEADER][mc.KEY_FROM], response)
@@ -0,0 +1,141 @@
+"""
+    Support for the benchmark suite (profile_benchmark.py).
+
+    Every benchmark measures the best (min over 'repeat' runs) time per loop so
+    that the results are as stable as possible on the same machine.
+    Results are compared against a (versioned) baseline json holding the
+    reference results for every recorded environment (machine architecture,
+    python version and json codec) and any benchmark slower than
+    baseline * (1 + threshold) fails the test. The baseline is only written
+    when MEROSS_LAN_BENCHMARK_UPDATE is set: without it, an environment (or a
+    benchmark) missing in the baseline fails the test too so that the check
+    never silently passes. The (slow) benchmarks and load generators
+    (profile_benchmark.py, profile_emulator_fleet.py, profile_mqttclient.py)
+    are skipped in the default test run. Options (environment variables):
+    - MEROSS_LAN_BENCHMARK: when set, enables the benchmarks
+    - MEROSS_LAN_BENCHMARK_BASELINE: baseline path
+      default tests/benchmark_baseline.json
+    - MEROSS_LAN_BENCHMARK_THRESHOLD: allowed slowdown ratio (default 0.25)
+    - MEROSS_LAN_BENCHMARK_UPDATE: when set, records the results as the
+      baseline for the current environment
+"""
+
+import json
+import os
+import platform
+import timeit
+from typing import Awaitable, Callable
+
+from freezegun import api as freezegun_api
+import pytest
+
+from custom_components.meross_lan.merossclient import JSON_CODEC
+
+ENABLED = bool(os.environ.get("MEROSS_LAN_BENCHMARK"))
+requires_benchmark = pytest.mark.skipif(
+    not ENABLED, reason="benchmarks are enabled by MEROSS_LAN_BENCHMARK=1"
+)
+"""module level 'pytestmark' for the benchmark/load test modules"""
+
+BASELINE_PATH = os.environ.get(
+    "MEROSS_LAN_BENCHMARK_BASELINE",
+    os.path.join(os.path.dirname(__file__), "benchmark_baseline.json"),
+)
+THRESHOLD = float(os.environ.get("MEROSS_LAN_BENCHMARK_THRESHOLD", 0.25))
+UPDATE = bool(os.environ.get("MEROSS_LAN_BENCHMARK_UPDATE"))
+REPEAT = 5
+
+ENVIRONMENT = {
+    "machine": platform.machine(),
+    "python": ".".join(platform.python_version_tuple()[:2]),
+    "json_codec": JSON_CODEC,
+}
+ENVIRONMENT_KEY = "-".join(ENVIRONMENT.values())
+"""key of the current environment results in the baseline"""
+
+
+def _timer():
+    """
+    Real perf_counter: the time mocker (freezegun, active in DeviceContext)
+    patches every module reference to the time functions but its own.
+    """
+    return freezegun_api.real_perf_counter()
+
+
+def measure(func: Callable[[], object], number: int, repeat: int = REPEAT):
+    """Returns the best time (seconds) per call of func."""
+    return min(timeit.repeat(func, timer=_timer, number=number, repeat=repeat)) / number
+
+
+async def async_measure(
+    func: Callable[[], Awaitable[object]], number: int, repeat: int = REPEAT
+):
+    """Same as measure but for coroutine functions (run in the current loop)."""
+    results = []
+    for _ in range(repeat):
+        epoch = _timer()
+        for _ in range(number):
+            await func()
+        results.append(_timer() - epoch)
+    return min(results) / number
+
+
+def _load_baseline() -> dict[str, dict]:
+    try:
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def check(group: str, results: dict[str, float], capsys):
+    """
+    Reports the results of a group of benchmarks against the baseline of the
+    current environment and asserts no regressions (nor missing references).
+    When MEROSS_LAN_BENCHMARK_UPDATE is set the results are recorded instead.
+    """
+    baseline = _load_baseline()
+    environment_baseline = baseline.get(ENVIRONMENT_KEY)
+    benchmarks: dict[str, float] = (
+        environment_baseline["benchmarks"] if environment_baseline else {}
+    )
+    regressions = []
+    missing = []
+    with capsys.disabled():
+        print(
+            f"\nBenchmark '{group}' ({ENVIRONMENT_KEY} - threshold: {THRESHOLD:.0%}):"
+        )
+        for name, result in results.items():
+            key = f"{group}.{name}"
+            reference = benchmarks.get(key)
+            if reference:
+                ratio = result / reference - 1
+                status = f"{ratio:+.1%}"
+                if ratio > THRESHOLD:
+                    status += " REGRESSION"
+                    regressions.append(f"{key}: {status}")
+            else:
+                status = "no baseline"
+                missing.append(key)
+            print(f"{name}: {result * 1e6:.2f} us ({status})")
+            if UPDATE:
+                benchmarks[key] = result
+
+    if UPDATE:
+        baseline[ENVIRONMENT_KEY] = {
+            "environment": ENVIRONMENT,
+            "benchmarks": benchmarks,
+        }
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        return
+
+    assert environment_baseline, (
+        f"No benchmark baseline for environment {ENVIRONMENT_KEY}: "
+        "record it with MEROSS_LAN_BENCHMARK_UPDATE=1"
+    )
+    assert not missing, (
+        f"Benchmarks missing in the baseline: {missing}. "
+        "Record them with MEROSS_LAN_BENCHMARK_UPDATE=1"
+    )
+    assert not regressions, f"Performance regressions: {regressions}"
@@ -5,6 +5,7 @@ from copy import deepcopy
 from datetime import datetime, timedelta
 import hashlib
 import re
+import struct
 import time
 from typing import Any, Callable, Coroutine, Final
 from unittest.mock import ANY, MagicMock, patch
@@ -134,6 +135,30 @@ class MessageMatcher:
         )
 
 
+class PollingDeviceStub:
+    """
+    Minimal device interface needed by the PollingScheduler: it just
+    records the polls dispatched to it. Clearing 'polling_gate' holds
+    the polls (started) in flight: 'polling_task' is the last one
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self.polls = []
+        self.polling_gate = asyncio.Event()
+        self.polling_gate.set()
+        self.polling_task: asyncio.Task | None = None
+
+    def async_create_task(self, target, name):
+        # background (untracked) so that async_block_till_done doesn't wait the gate
+        self.polling_task = self.hass.async_create_background_task(target, name)
+        return self.polling_task
+
+    async def _async_polling_callback(self, namespace):
+        self.polls.append(namespace)
+        await self.polling_gate.wait()
+
+
 class TimeMocker(contextlib.AbstractContextManager):
     """
     time mocker helper using freeztime and providing some helpers
@@ -658,7 +683,8 @@ class DeviceContext(ConfigEntryMocker):
     async def async_poll_single(self):
         """Advances the time mocker up to the next polling cycle and executes it."""
         await self._time_mock.async_tick(
-            self.device._polling_callback_unsub.when() - self.hass.loop.time()  # type: ignore
+            self.device._polling_callback_unsub.when  # type: ignore
+            - self.hass.loop.time()
         )
 
     async def async_poll_timeout(
@@ -812,6 +838,105 @@ class CloudApiMocker(contextlib.AbstractContextManager):
         return {mc.KEY_APISTATUS: cloudapi.APISTATUS_NO_ERROR, mc.KEY_DATA: {}}
 
 
+class MQTTBrokerStandIn:
+    """
+    Just enough of an (in-process) MQTT 3.1.1 broker to connect, subscribe and
+    exchange PUBLISH with the clients. Messages published by the clients are
+    collected in 'published' and forwarded (qos 0) to the subscribers.
+    After a SUBSCRIBE the 'subscribe_burst' packets are sent to the client.
+    """
+
+    def __init__(self):
+        self.subscriptions: set[str] = set()
+        self.published: asyncio.Queue[tuple[str, bytes]] = asyncio.Queue()
+        self.subscribe_burst: list[bytes] = []
+        self.server: asyncio.Server = None  # type: ignore
+        self.writers: set[asyncio.StreamWriter] = set()
+
+    @staticmethod
+    def build_publish(topic: str, payload: bytes):
+        topic_bytes = topic.encode("utf-8")
+        body = struct.pack("!H", len(topic_bytes)) + topic_bytes + payload
+        length = len(body)
+        encoded = bytearray()
+        while True:
+            digit = length % 128
+            length //= 128
+            encoded.append(digit | 0x80 if length else digit)
+            if not length:
+                return b"\x30" + bytes(encoded) + body
+
+    async def async_start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def async_stop(self):
+        for writer in self.writers:
+            writer.close()
+        self.server.close()
+        await self.server.wait_closed()
+
+    def publish(self, topic: str, payload: bytes):
+        packet = self.build_publish(topic, payload)
+        for writer in self.writers:
+            writer.write(packet)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.writers.add(writer)
+        try:
+            while True:
+                header = (await reader.readexactly(1))[0]
+                command = header & 0xF0
+                length = 0
+                multiplier = 1
+                while True:
+                    digit = (await reader.readexactly(1))[0]
+                    length += (digit & 0x7F) * multiplier
+                    multiplier *= 128
+                    if not digit & 0x80:
+                        break
+                body = await reader.readexactly(length)
+                if command == 0x10:  # CONNECT
+                    writer.write(b"\x20\x02\x00\x00")
+                elif command == 0x30:  # PUBLISH
+                    topic_end = 2 + struct.unpack("!H", body[0:2])[0]
+                    topic = body[2:topic_end].decode("utf-8")
+                    if header & 0x06:  # qos > 0
+                        writer.write(b"\x40\x02" + body[topic_end : topic_end + 2])
+                        topic_end += 2
+                    payload = body[topic_end:]
+                    self.published.put_nowait((topic, payload))
+                    if topic in self.subscriptions:
+                        self.publish(topic, payload)
+                elif command == 0x80:  # SUBSCRIBE
+                    index = 2
+                    granted = bytearray()
+                    while index < length:
+                        topic_end = (
+                            index + 2 + struct.unpack("!H", body[index : index + 2])[0]
+                        )
+                        self.subscriptions.add(
+                            body[index + 2 : topic_end].decode("utf-8")
+                        )
+                        granted.append(body[topic_end])
+                        index = topic_end + 1
+                    writer.write(
+                        bytes((0x90, 2 + len(granted))) + body[0:2] + bytes(granted)
+                    )
+                    for packet in self.subscribe_burst:
+                        writer.write(packet)
+                        await writer.drain()
+                elif command == 0xC0:  # PINGREQ
+                    writer.write(b"\xd0\x00")
+                elif command == 0xE0:  # DISCONNECT
+                    break
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        self.writers.discard(writer)
+        writer.close()
+
+
 class MQTTConnectionMocker(contextlib.AbstractContextManager):
     def __init__(self, hass: HomeAssistant):
 
@@ -828,7 +953,7 @@ class MQTTConnectionMocker(contextlib.AbstractContextManager):
         )
 
         async def _async_identify_device(
-            _self: MQTTConnection, device_id: str, key: str
+            _self: MQTTConnection, device_id: str, key: str, packed: bool = False
         ) -> mlc.DeviceConfigType:
             # we're expecting a query for an MSH300
             device_info = tc.MOCK_CLOUDAPI_DEVICE_DEVLIST[1]
@@ -0,0 +1,224 @@
+"""
+    Benchmark suite: see tests/benchmark.py for the baseline/regression options.
+"""
+
+import tempfile
+import time
+
+from custom_components.meross_lan import const as mlc
+from custom_components.meross_lan.helpers.obfuscate import (
+    obfuscated_dict,
+    obfuscated_payload,
+)
+from custom_components.meross_lan.helpers.tracing import TraceWriter
+from custom_components.meross_lan.meross_device import MerossDevice
+from custom_components.meross_lan.merossclient import (
+    MerossLazyResponse,
+    MerossRequest,
+    MerossResponse,
+    const as mc,
+    json_dumps,
+)
+from emulator import MerossEmulator, generate_emulators
+
+from tests import benchmark, const as tc, helpers
+
+
+pytestmark = benchmark.requires_benchmark
+
+
+def _generate_emulators():
+    return generate_emulators(
+        tc.EMULATOR_TRACES_PATH, key=tc.MOCK_KEY, uuid=tc.MOCK_DEVICE_UUID
+    )
+
+
+def _get_emulator_label(emulator: MerossEmulator):
+    # uuids from the traces filenames are stable and disambiguate same types
+    return f"{emulator.descriptor.type}({emulator.uuid[-2:]})"
+
+
+def _get_poll_responses(device: MerossDevice, emulator: MerossEmulator):
+    """Queries the emulator with every polling request of the device."""
+    responses: list[MerossResponse] = []
+    for handler in device.namespace_handlers.values():
+        if not handler.polling_request:
+            continue
+        request = MerossRequest(emulator.key, *handler.polling_request)  # type: ignore
+        try:
+            response = MerossResponse(emulator.handle(request))  # type: ignore
+        except Exception:
+            # unsupported in emulator or truncated response
+            continue
+        # some emulators just echo the request payload (i.e. mrs100 ToggleX)
+        if (response[mc.KEY_HEADER][mc.KEY_METHOD] == mc.METHOD_GETACK) and (
+            handler.ns.key in response[mc.KEY_PAYLOAD]
+        ):
+            responses.append(response)
+    return responses
+
+
+def profile_benchmark_message_codec(capsys):
+    messages = [
+        MerossRequest(emulator.key, namespace, mc.METHOD_GETACK, payload)
+        for emulator in _generate_emulators()
+        for namespace, payload in emulator.descriptor.namespaces.items()
+    ]
+    messages_bytes = [message.json().encode("utf-8") for message in messages]
+    count = len(messages)
+
+    def _encode():
+        for message in messages:
+            json_dumps(message)
+
+    def _decode():
+        for message_bytes in messages_bytes:
+            MerossResponse(message_bytes)
+
+    def _decode_header():
+        for message_bytes in messages_bytes:
+            MerossLazyResponse(message_bytes)[mc.KEY_HEADER]
+
+    benchmark.check(
+        "message_codec",
+        {
+            "encode": benchmark.measure(_encode, 20) / count,
+            "decode": benchmark.measure(_decode, 20) / count,
+            "decode_header": benchmark.measure(_decode_header, 20) / count,
+        },
+        capsys,
+    )
+
+
+def profile_benchmark_obfuscation(capsys):
+    payloads = [
+        payload
+        for emulator in _generate_emulators()
+        for payload in emulator.descriptor.namespaces.values()
+    ]
+    count = len(payloads)
+
+    def _obfuscate():
+        for payload in payloads:
+            obfuscated_dict(payload)
+
+    def _obfuscate_payload():
+        for payload in payloads:
+            obfuscated_payload(payload)
+
+    benchmark.check(
+        "obfuscation",
+        {
+            "obfuscated_dict": benchmark.measure(_obfuscate, 20) / count,
+            "obfuscated_payload": benchmark.measure(_obfuscate_payload, 20) / count,
+        },
+        capsys,
+    )
+
+
+async def profile_benchmark_handle(hass, aioclient_mock, capsys):
+    """Dispatch (MerossDevice._handle) of the polling responses per device type."""
+    results = {}
+    for emulator in _generate_emulators():
+        async with helpers.DeviceContext(hass, emulator, aioclient_mock) as context:
+            device = await context.perform_coldstart()
+            responses = _get_poll_responses(device, emulator)
+            if not responses:
+                continue
+            messages = [
+                (response[mc.KEY_HEADER], response[mc.KEY_PAYLOAD])
+                for response in responses
+            ]
+
+            def _handle():
+                for header, payload in messages:
+                    device._handle(header, payload)
+
+            duration = benchmark.measure(_handle, 20)
+            results[_get_emulator_label(emulator)] = duration / len(messages)
+
+    benchmark.check("handle", results, capsys)
+
+
+async def profile_benchmark_device(hass, aioclient_mock, capsys):
+    """ns_multiple packing/flush and trace writing."""
+    results = {}
+    async with helpers.DeviceContext(hass, mc.TYPE_MTS200, aioclient_mock) as context:
+        device = await context.perform_coldstart()
+        # disable delay in emulator<->aioclient_mock response
+        context.emulator_context.frozen_time = None
+        multiple_requests = [
+            (handler.polling_request, handler.polling_response_size)
+            for handler in device.namespace_handlers.values()
+            if handler.polling_request
+        ]
+        results["multiple_plan"] = benchmark.measure(
+            lambda: device._multiple_requests_plan(list(multiple_requests)), 1000
+        )
+        requests = [request for request, _ in multiple_requests[: device.multiple_max]]
+
+        async def _multiple_flush():
+            await device.async_multiple_requests_ack(requests)
+
+        results["multiple_flush"] = await benchmark.async_measure(_multiple_flush, 50)
+
+        responses = _get_poll_responses(device, context.emulator)
+        epoch = time.time()
+
+        def _trace():
+            for response in responses:
+                header = response[mc.KEY_HEADER]
+                device.trace(
+                    epoch,
+                    response[mc.KEY_PAYLOAD],
+                    header[mc.KEY_NAMESPACE],
+                    header[mc.KEY_METHOD],
+                    mlc.CONF_PROTOCOL_HTTP,
+                    "RX",
+                )
+
+        with tempfile.TemporaryDirectory() as tracedir:
+            # event loop side cost (the writer thread does the file io)
+            # with no size limit so that trace never stops
+            trace_writer = TraceWriter(
+                f"{tracedir}/trace",
+                mlc.PARAM_TRACE_FORMAT,
+                mlc.PARAM_TRACE_COMPRESSION,
+            )
+            trace_writer.open()
+            device._trace_writer = trace_writer
+            results["trace"] = benchmark.measure(_trace, 100) / len(responses)
+            device._trace_writer = None
+            trace_writer.close()
+            trace_writer.join()
+
+    async with helpers.DeviceContext(hass, mc.TYPE_MSH300, aioclient_mock) as context:
+        await context.perform_coldstart()
+        context.emulator_context.frozen_time = None
+        results["hub_poll"] = await benchmark.async_measure(
+            context.async_poll_single, 50
+        )
+
+    benchmark.check("device", results, capsys)
+
+
+async def profile_benchmark_setup_entry(hass, aioclient_mock, capsys):
+    emulator = helpers.build_emulator(mc.TYPE_MSS310)
+
+    async def _setup_entry():
+        async with helpers.DeviceContext(hass, emulator, aioclient_mock) as context:
+            assert await context.async_setup()
+
+    async def _setup_entry_cold():
+        # the init plan is cached per abilities/digest set
+        MerossDevice.INIT_PLANS.clear()
+        await _setup_entry()
+
+    benchmark.check(
+        "setup_entry",
+        {
+            "cold": await benchmark.async_measure(_setup_entry_cold, 5),
+            "warm": await benchmark.async_measure(_setup_entry, 5),
+        },
+        capsys,
+    )
@@ -0,0 +1,312 @@
+""""""
+
+import asyncio
+import contextlib
+import random
+import time
+import typing
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.meross_lan import MerossApi, const as mlc
+from custom_components.meross_lan.helpers.metrics import LatencyHistogram
+from custom_components.meross_lan.merossclient import (
+    HostAddress,
+    compute_message_encryption_key,
+    const as mc,
+    json_loads,
+    mqttclient,
+    namespaces as mn,
+)
+from custom_components.meross_lan.merossclient.httpclient import MerossHttpClient
+from emulator.fleet import EmulatorFleet
+from emulator.mixins import MerossEmulator
+
+from tests import benchmark, const as tc, helpers
+
+if typing.TYPE_CHECKING:
+    from custom_components.meross_lan.meross_profile import MQTTConnection
+
+pytestmark = benchmark.requires_benchmark
+
+
+class _PushClient(mqttclient._MerossMQTTClient):
+    """
+    Integration side: receives the PUSHes from the whole fleet. When an
+    mqtt_connection is set the messages are forwarded to it (i.e. to the
+    meross_lan MQTT ingress) and the latency includes their processing.
+    """
+
+    def __init__(self, mqtt_connection: "MQTTConnection | None" = None):
+        super().__init__(
+            "app:fleet",
+            [(mc.TOPIC_RESPONSE.format("+"), 0)],
+            loop=asyncio.get_running_loop(),
+            asyncio_transport=True,
+        )
+        self.mqtt_connection = mqtt_connection
+        self.received = 0
+        self.latency = LatencyHistogram()
+
+    async def async_mqtt_message(self, msg):
+        if self.mqtt_connection:
+            await self.mqtt_connection.async_mqtt_message(msg)
+        header = json_loads(msg.payload)[mc.KEY_HEADER]
+        self.received += 1
+        self.latency.record(
+            time.time() - header[mc.KEY_TIMESTAMP] - header[mc.KEY_TIMESTAMPMS] / 1000
+        )
+
+
+def _ms(latency: float | None):
+    return "-" if latency is None else f"{latency * 1000:.0f}"
+
+
+class _PollResults:
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.errors = 0
+
+
+async def _async_poll(
+    emulator: MerossEmulator,
+    http_port: int,
+    period: float,
+    end: float,
+    results: _PollResults,
+):
+    """Integration side: polls ns_all like a device configured on HTTP would."""
+    client = MerossHttpClient(f"127.0.0.1:{http_port}/{emulator.uuid}", emulator.key)
+    if emulator._encryption_codec:
+        client.set_encryption(
+            compute_message_encryption_key(
+                emulator.uuid, emulator.key, emulator.descriptor.macAddress
+            ).encode("utf-8")
+        )
+    await asyncio.sleep(random.uniform(0, period))
+    while (epoch := time.perf_counter()) < end:
+        try:
+            await client.async_request_strict(*mn.Appliance_System_All.request_default)
+            results.latency.record(time.perf_counter() - epoch)
+        except Exception:
+            # this includes responses truncated by the emulator (big hubs)
+            results.errors += 1
+        await asyncio.sleep(max(period - (time.perf_counter() - epoch), 0))
+
+
+async def _async_run(devices: int, push_rate: float, period: float, duration: float):
+    fleet = EmulatorFleet(tc.EMULATOR_TRACES_PATH, devices, push_rate=push_rate)
+    http_port, mqtt_port = await fleet.async_start()
+    push_client = _PushClient()
+    await asyncio.wait_for(
+        await push_client.async_connect(HostAddress.build(f"127.0.0.1:{mqtt_port}")),
+        5,
+    )
+    poll_results = _PollResults()
+    epoch = time.perf_counter()
+    cpu_epoch = time.process_time()
+    fleet_busy_epoch = fleet.busy_time
+    await asyncio.gather(
+        *(
+            _async_poll(emulator, http_port, period, epoch + duration, poll_results)
+            for emulator in fleet.emulators.values()
+        )
+    )
+    duration = time.perf_counter() - epoch
+    fleet_cpu = fleet.busy_time - fleet_busy_epoch
+    cpu = time.process_time() - cpu_epoch - fleet_cpu
+    pushes = fleet.pushes
+    await push_client.async_shutdown()
+    await fleet.async_stop()
+    await MerossHttpClient.async_shutdown_session()
+    return {
+        "duration": duration,
+        "cpu": cpu,
+        "fleet_cpu": fleet_cpu,
+        "poll": poll_results,
+        "push": push_client,
+        "pushes": pushes,
+    }
+
+
+def _merge(histograms: "typing.Iterable[LatencyHistogram]"):
+    merged = LatencyHistogram()
+    for histogram in histograms:
+        merged.counts = [a + b for a, b in zip(merged.counts, histogram.counts)]
+        merged.count += histogram.count
+        merged.total += histogram.total
+        merged.max = max(merged.max, histogram.max)
+    return merged
+
+
+async def _async_run_devices(
+    hass: HomeAssistant, devices: int, push_rate: float, duration: float
+):
+    """
+    Integration side through the meross_lan pipeline: every emulator in the fleet
+    is configured (config entry) as a MerossDevice polling the fleet HTTP server
+    while the fleet PUSHes are fed to the meross_lan (local) MQTT ingress.
+    """
+    fleet = EmulatorFleet(tc.EMULATOR_TRACES_PATH, devices, push_rate=push_rate)
+    http_port, mqtt_port = await fleet.async_start()
+    async with contextlib.AsyncExitStack() as entries:
+        for uuid, emulator in fleet.emulators.items():
+            await entries.enter_async_context(
+                helpers.ConfigEntryMocker(
+                    hass,
+                    uuid,
+                    data=helpers.build_emulator_config_entry(
+                        emulator,
+                        config_data={
+                            mlc.CONF_HOST: f"127.0.0.1:{http_port}/{uuid}",
+                            mlc.CONF_PROTOCOL: mlc.CONF_PROTOCOL_AUTO,
+                            mlc.CONF_POLLING_PERIOD: mlc.CONF_POLLING_PERIOD_MIN,
+                        },
+                    ),
+                    auto_setup=False,
+                )
+            )
+        epoch = time.perf_counter()
+        await asyncio.gather(
+            *(
+                hass.config_entries.async_setup(entry.entry_id)
+                for entry in hass.config_entries.async_entries(mlc.DOMAIN)
+            )
+        )
+        meross_devices = MerossApi.devices
+        while not all(
+            (device := meross_devices.get(uuid)) and device.online
+            for uuid in fleet.emulators
+        ):
+            assert time.perf_counter() - epoch < 60, "fleet not online"
+            await asyncio.sleep(0.1)
+        startup = time.perf_counter() - epoch
+        meross_devices = [meross_devices[uuid] for uuid in fleet.emulators]
+
+        push_client = _PushClient(hass.data[mlc.DOMAIN].mqtt_connection)
+        await asyncio.wait_for(
+            await push_client.async_connect(
+                HostAddress.build(f"127.0.0.1:{mqtt_port}")
+            ),
+            5,
+        )
+        http_metrics = [
+            device.metrics.get_protocol(mlc.CONF_PROTOCOL_HTTP)
+            for device in meross_devices
+        ]
+        http_requests_epoch = sum(metrics.requests for metrics in http_metrics)
+        epoch = time.perf_counter()
+        cpu_epoch = time.process_time()
+        fleet_busy_epoch = fleet.busy_time
+        await asyncio.sleep(duration)
+        duration = time.perf_counter() - epoch
+        fleet_cpu = fleet.busy_time - fleet_busy_epoch
+        cpu = time.process_time() - cpu_epoch - fleet_cpu
+        pushes = fleet.pushes
+        await push_client.async_shutdown()
+        http_requests = (
+            sum(metrics.requests for metrics in http_metrics) - http_requests_epoch
+        )
+        http_errors = sum(metrics.errors + metrics.timeouts for metrics in http_metrics)
+        http_latency = _merge(metrics.latency for metrics in http_metrics)
+        startup_times = [device.startup_time or 0 for device in meross_devices]
+    await fleet.async_stop()
+    await MerossHttpClient.async_shutdown_session()
+    return {
+        "duration": duration,
+        "cpu": cpu,
+        "fleet_cpu": fleet_cpu,
+        "startup": startup,
+        "startup_max": max(startup_times),
+        "http_requests": http_requests,
+        "http_errors": http_errors,
+        "http_latency": http_latency,
+        "push": push_client,
+        "pushes": pushes,
+    }
+
+
+def profile_emulator_fleet(capsys):
+    period = 1.0
+    push_rate = 0.5
+    duration = 10.0
+    results = {}
+    for devices in (100, 500, 1000):
+        results[devices] = asyncio.run(_async_run(devices, push_rate, period, duration))
+
+    with capsys.disabled():
+        print(
+            f"Emulator fleet (HTTP poll every {period}s, {push_rate} PUSH/s per device):"
+        )
+        for devices, result in results.items():
+            duration = result["duration"]
+            poll: _PollResults = result["poll"]
+            push: _PushClient = result["push"]
+            print(f"{devices} devices:")
+            print(
+                f"  HTTP: {poll.latency.count / duration:.0f} req/s "
+                f"(errors: {poll.errors}) latency(ms) "
+                f"p50: {_ms(poll.latency.percentile(50))} "
+                f"p90: {_ms(poll.latency.percentile(90))} "
+                f"p99: {_ms(poll.latency.percentile(99))} "
+                f"max: {_ms(poll.latency.max)}"
+            )
+            print(
+                f"  MQTT: {push.received / duration:.0f} PUSH/s "
+                f"(sent: {result['pushes']} received: {push.received} "
+                f"dropped: {push.ingest_dropped}) latency(ms) "
+                f"p50: {_ms(push.latency.percentile(50))} "
+                f"p90: {_ms(push.latency.percentile(90))} "
+                f"max: {_ms(push.latency.max)}"
+            )
+            print(
+                f"  CPU: integration {result['cpu'] / duration * 100:.1f}% "
+                f"({result['cpu'] * 1e6 / duration / devices:.0f} us/s per device) "
+                f"fleet {result['fleet_cpu'] / duration * 100:.1f}%"
+            )
+
+
+async def profile_emulator_fleet_devices(hass: HomeAssistant, socket_enabled, capsys):
+    push_rate = 0.5
+    duration = 10.0
+    # asyncio debug mode (enabled by the HA test harness) would skew the cpu load
+    hass.loop.set_debug(False)
+    results = {}
+    for devices in (50, 200):
+        results[devices] = await _async_run_devices(hass, devices, push_rate, duration)
+
+    with capsys.disabled():
+        print(
+            f"Emulator fleet through meross_lan (HTTP polling every "
+            f"{mlc.CONF_POLLING_PERIOD_MIN}s, {push_rate} PUSH/s per device):"
+        )
+        for devices, result in results.items():
+            duration = result["duration"]
+            http_latency: LatencyHistogram = result["http_latency"]
+            push: _PushClient = result["push"]
+            print(f"{devices} devices:")
+            print(
+                f"  startup: all online in {result['startup']:.1f}s "
+                f"(max time to first state: {_ms(result['startup_max'])} ms)"
+            )
+            print(
+                f"  HTTP: {result['http_requests'] / duration:.0f} req/s "
+                f"(errors: {result['http_errors']}) latency(ms) "
+                f"p50: {_ms(http_latency.percentile(50))} "
+                f"p90: {_ms(http_latency.percentile(90))} "
+                f"p99: {_ms(http_latency.percentile(99))} "
+                f"max: {_ms(http_latency.max)}"
+            )
+            print(
+                f"  MQTT: {push.received / duration:.0f} PUSH/s "
+                f"(sent: {result['pushes']} received: {push.received} "
+                f"dropped: {push.ingest_dropped}) latency(ms) "
+                f"p50: {_ms(push.latency.percentile(50))} "
+                f"p90: {_ms(push.latency.percentile(90))} "
+                f"max: {_ms(push.latency.max)}"
+            )
+            print(
+                f"  CPU: integration {result['cpu'] / duration * 100:.1f}% "
+                f"({result['cpu'] * 1e6 / duration / devices:.0f} us/s per device) "
+                f"fleet {result['fleet_cpu'] / duration * 100:.1f}%"
+            )
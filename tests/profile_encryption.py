@@ -0,0 +1,71 @@
+""""""
+
+from base64 import b64decode, b64encode
+import timeit
+
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from custom_components.meross_lan.merossclient import (
+    MerossRequest,
+    compute_message_encryption_key,
+    const as mc,
+    namespaces as mn,
+)
+from custom_components.meross_lan.merossclient.encryption import MerossEncryptionCodec
+
+from tests import const as tc
+
+
+def _legacy_encrypt(cipher: Cipher, message: str):
+    message_bytes = message.encode("utf-8")
+    if pad_length := (len(message_bytes) % 16):
+        message_bytes += bytes([0] * (16 - pad_length))
+    encryptor = cipher.encryptor()
+    return b64encode(encryptor.update(message_bytes) + encryptor.finalize()).decode(
+        "utf-8"
+    )
+
+
+def _legacy_decrypt(cipher: Cipher, message: str):
+    decryptor = cipher.decryptor()
+    return (
+        (decryptor.update(b64decode(message)) + decryptor.finalize())
+        .decode("utf8")
+        .rstrip("\0")
+    )
+
+
+def profile_encryption_codec(capsys):
+    key = compute_message_encryption_key(
+        tc.MOCK_DEVICE_UUID, tc.MOCK_KEY, "48:e1:e9:aa:bb:cc"
+    ).encode("utf-8")
+    cipher = Cipher(algorithms.AES(key), modes.CBC("0000000000000000".encode("utf8")))
+    codec = MerossEncryptionCodec(key)
+    message = MerossRequest(
+        tc.MOCK_KEY,
+        mn.Appliance_Control_Multiple.name,
+        mc.METHOD_SET,
+        {"multiple": [{"header": {"namespace": "x" * 64}, "payload": {}}] * 20},
+    ).json()
+    message_encrypted = codec.encrypt(message)
+    # check both paths are interoperable
+    assert _legacy_decrypt(cipher, message_encrypted) == message
+    assert codec.decrypt(_legacy_encrypt(cipher, message)) == message
+
+    number = 10000
+    results = {
+        "legacy encrypt": timeit.timeit(
+            lambda: _legacy_encrypt(cipher, message), number=number
+        ),
+        "codec encrypt": timeit.timeit(lambda: codec.encrypt(message), number=number),
+        "legacy decrypt": timeit.timeit(
+            lambda: _legacy_decrypt(cipher, message_encrypted), number=number
+        ),
+        "codec decrypt": timeit.timeit(
+            lambda: codec.decrypt(message_encrypted), number=number
+        ),
+    }
+    with capsys.disabled():
+        print(f"Encryption codec ({len(message)} bytes message, {number} loops):")
+        for label, duration in results.items():
+            print(f"{label}: {number * len(message) / duration / 1e6:.1f} MB/s")
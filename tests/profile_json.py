@@ -0,0 +1,115 @@
+""""""
+
+import json
+import os
+import timeit
+
+from custom_components.meross_lan import merossclient
+
+from tests import const as tc
+
+
+def _load_trace_messages():
+    """Extract every json message/payload found in the emulator traces."""
+    messages = []
+    for filename in os.listdir(tc.EMULATOR_TRACES_PATH):
+        with open(
+            os.path.join(tc.EMULATOR_TRACES_PATH, filename), encoding="utf-8"
+        ) as f:
+            if filename.endswith(".json.txt"):
+                messages.append(json.load(f))
+                continue
+            for line in f:
+                data = line.rstrip("\n").split("\t")[-1]
+                if data.startswith("{"):
+                    try:
+                        messages.append(json.loads(data))
+                    except json.JSONDecodeError:
+                        pass
+    return messages
+
+
+def profile_json_codec(capsys):
+    messages = _load_trace_messages()
+    messages_str = [json.dumps(message) for message in messages]
+    messages_bytes = [message_str.encode("utf-8") for message_str in messages_str]
+    total_size = sum(len(message_str) for message_str in messages_str)
+
+    def _stdlib_dumps():
+        for message in messages:
+            merossclient.JSON_ENCODER.encode(message)
+
+    def _stdlib_loads():
+        for message_str in messages_str:
+            merossclient.JSON_DECODER.decode(message_str)
+
+    def _codec_dumps():
+        for message in messages:
+            merossclient.json_dumps(message)
+
+    def _codec_loads():
+        for message_str in messages_str:
+            merossclient.json_decode(message_str)
+
+    def _codec_loads_bytes():
+        for message_bytes in messages_bytes:
+            merossclient.json_decode(message_bytes)
+
+    number = 100
+    results = {
+        "json dumps": timeit.timeit(_stdlib_dumps, number=number),
+        f"{merossclient.JSON_CODEC} dumps": timeit.timeit(_codec_dumps, number=number),
+        "json loads": timeit.timeit(_stdlib_loads, number=number),
+        f"{merossclient.JSON_CODEC} loads": timeit.timeit(_codec_loads, number=number),
+        f"{merossclient.JSON_CODEC} loads (bytes)": timeit.timeit(
+            _codec_loads_bytes, number=number
+        ),
+    }
+    with capsys.disabled():
+        print(
+            f"JSON codec ({len(messages)} trace messages, {total_size} bytes, {number} loops):"
+        )
+        for label, duration in results.items():
+            print(f"{label}: {number * total_size / duration / 1e6:.1f} MB/s")
+
+
+def profile_lazy_response(capsys):
+    """Compare full vs header only decoding (as when routing/dropping messages)."""
+    # traces carry the payloads: wrap them in a (device like) message
+    messages_bytes = [
+        merossclient.MerossRequest(
+            tc.MOCK_KEY, "Appliance.System.All", "GETACK", payload
+        )
+        .json()
+        .encode("utf-8")
+        for payload in _load_trace_messages()
+        if isinstance(payload, dict)
+    ]
+    total_size = sum(len(message_bytes) for message_bytes in messages_bytes)
+
+    def _response():
+        for message_bytes in messages_bytes:
+            merossclient.MerossResponse(message_bytes)["header"]["namespace"]
+
+    def _lazy_response():
+        for message_bytes in messages_bytes:
+            merossclient.MerossLazyResponse(message_bytes)["header"]["namespace"]
+
+    def _lazy_response_payload():
+        for message_bytes in messages_bytes:
+            merossclient.MerossLazyResponse(message_bytes)["payload"]
+
+    number = 100
+    results = {
+        "MerossResponse": timeit.timeit(_response, number=number),
+        "MerossLazyResponse (header)": timeit.timeit(_lazy_response, number=number),
+        "MerossLazyResponse (payload)": timeit.timeit(
+            _lazy_response_payload, number=number
+        ),
+    }
+    with capsys.disabled():
+        print(
+            f"Response decoding ({len(messages_bytes)} messages, {total_size} bytes, {number} loops):"
+        )
+        for label, duration in results.items():
+            print(f"{label}: {number * total_size / duration / 1e6:.1f} MB/s")
@@ -0,0 +1,90 @@
+""""""
+
+import asyncio
+import threading
+import time
+
+from custom_components.meross_lan.merossclient import (
+    HostAddress,
+    MerossRequest,
+    const as mc,
+    mqttclient,
+    namespaces as mn,
+)
+
+from tests import benchmark, const as tc, helpers
+
+pytestmark = benchmark.requires_benchmark
+
+_TOPIC = "/app/0-bench/subscribe"
+
+
+class _Client(mqttclient._MerossMQTTClient):
+
+    def __init__(self, messages: int, asyncio_transport: bool):
+        self.INGEST_QUEUE_SIZE = messages
+        loop = asyncio.get_running_loop()
+        super().__init__(
+            "app:bench",
+            [(_TOPIC, 0)],
+            loop=loop,
+            asyncio_transport=asyncio_transport,
+        )
+        self.messages = messages
+        self.received = 0
+        self.done = loop.create_future()
+
+    async def async_mqtt_message(self, msg):
+        self.received += 1
+        if self.received == self.messages:
+            self.done.set_result(time.perf_counter())
+
+
+async def _async_run(asyncio_transport: bool, messages: int, payload: bytes):
+    broker = helpers.MQTTBrokerStandIn()
+    broker.subscribe_burst = [broker.build_publish(_TOPIC, payload)] * messages
+    port = await broker.async_start()
+    # warm up the default executor so that its thread isn't accounted
+    await asyncio.get_running_loop().run_in_executor(None, time.perf_counter)
+    client = _Client(messages, asyncio_transport)
+    threads = threading.active_count()
+    await asyncio.wait_for(
+        await client.async_connect(HostAddress.build(f"127.0.0.1:{port}")), 5
+    )
+    t_connected = time.perf_counter()
+    threads = threading.active_count() - threads
+    duration = await asyncio.wait_for(client.done, 30) - t_connected
+    await client.async_shutdown()
+    await asyncio.sleep(0.1)  # let the DISCONNECT go through
+    await broker.async_stop()
+    return duration, threads
+
+
+def profile_mqttclient_transport(capsys):
+    messages = 20000
+    payload = (
+        MerossRequest(
+            tc.MOCK_KEY,
+            mn.Appliance_Control_ToggleX.name,
+            mc.METHOD_PUSH,
+            {mc.KEY_TOGGLEX: [{mc.KEY_CHANNEL: 0, mc.KEY_ONOFF: 1}]},
+            f"/appliance/{tc.MOCK_DEVICE_UUID}/publish",
+        )
+        .json()
+        .encode("utf-8")
+    )
+    results = {}
+    for label, asyncio_transport in (
+        ("paho thread", False),
+        ("asyncio transport", True),
+    ):
+        results[label] = asyncio.run(_async_run(asyncio_transport, messages, payload))
+
+    with capsys.disabled():
+        print(
+            f"MQTT client receive ({messages} messages, {len(payload)} bytes payload):"
+        )
+        for label, (duration, threads) in results.items():
+            print(
+                f"{label}: {messages / duration:.0f} msg/s (extra threads: {threads})"
+            )
@@ -0,0 +1,142 @@
+""""""
+
+import timeit
+
+from custom_components.meross_lan.helpers.namespaces import NamespaceHandler
+from custom_components.meross_lan.merossclient import const as mc, namespaces as mn
+
+
+class _Device:
+    """Just what NamespaceHandler needs to be instantiated."""
+
+    def __init__(self):
+        self.namespace_handlers = {}
+
+
+class _Parser:
+
+    namespace_handlers = None
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.parsed = 0
+
+    def _parse(self, payload: dict):
+        self.parsed += 1
+
+
+class _LegacyNamespaceHandler(NamespaceHandler):
+    """The former try/except (payload shape guessing) dispatching."""
+
+    __slots__ = ()
+
+    def register_parser(self, parser, key_channel: str):
+        super().register_parser(parser, key_channel)
+        self.handler = self._handle_list_legacy
+
+    def _handle_list_legacy(self, header, payload):
+        try:
+            for p_channel in payload[self.ns.key]:
+                try:
+                    _parse = self.parsers[p_channel[self.key_channel]]
+                except KeyError as key_error:
+                    _parse = self._try_create_entity(key_error)
+                _parse(p_channel)
+        except TypeError:
+            self.handler = self._handle_dict_legacy
+            self._handle_dict_legacy(header, payload)
+
+    def _handle_dict_legacy(self, header, payload):
+        p_channel = payload[self.ns.key]
+        try:
+            _parse = self.parsers[p_channel.get(self.key_channel)]
+        except KeyError as key_error:
+            _parse = self._try_create_entity(key_error)
+        except AttributeError:
+            self.handler = self._handle_generic_legacy
+            self._handle_generic_legacy(header, payload)
+            return
+        _parse(p_channel)
+
+    def _handle_generic_legacy(self, header, payload):
+        p_channel = payload[self.ns.key]
+        if type(p_channel) is dict:
+            try:
+                _parse = self.parsers[p_channel.get(self.key_channel)]
+            except KeyError as key_error:
+                _parse = self._try_create_entity(key_error)
+            _parse(p_channel)
+        else:
+            for p_channel in p_channel:
+                try:
+                    _parse = self.parsers[p_channel[self.key_channel]]
+                except KeyError as key_error:
+                    _parse = self._try_create_entity(key_error)
+                _parse(p_channel)
+
+
+def _build_stream(handler_class: type[NamespaceHandler], channels: int):
+    device = _Device()
+    stream = []
+    for ns, p_channel_builder, is_list in (
+        (
+            mn.Appliance_Control_ToggleX,
+            lambda channel: {mc.KEY_CHANNEL: channel, mc.KEY_ONOFF: 1},
+            True,
+        ),
+        (
+            mn.Appliance_Control_Electricity,
+            lambda channel: {
+                mc.KEY_CHANNEL: channel,
+                mc.KEY_CURRENT: 100,
+                mc.KEY_VOLTAGE: 2300,
+                mc.KEY_POWER: 23000,
+            },
+            False,
+        ),
+    ):
+        handler = handler_class(device, ns)  # type: ignore
+        for channel in range(channels):
+            handler.register_parser(_Parser(channel), mc.KEY_CHANNEL)  # type: ignore
+        header = {mc.KEY_NAMESPACE: ns.name, mc.KEY_METHOD: mc.METHOD_PUSH}
+        if is_list:
+            payload = {ns.key: [p_channel_builder(c) for c in range(channels)]}
+            stream.append((handler, header, payload))
+        else:
+            for channel in range(channels):
+                payload = {ns.key: p_channel_builder(channel)}
+                stream.append((handler, header, payload))
+    # ToggleX is also known to come as a dict payload for single channel updates
+    handler = device.namespace_handlers[mn.Appliance_Control_ToggleX.name]
+    stream.append(
+        (
+            handler,
+            {mc.KEY_NAMESPACE: handler.ns.name, mc.KEY_METHOD: mc.METHOD_PUSH},
+            {mc.KEY_TOGGLEX: {mc.KEY_CHANNEL: 0, mc.KEY_ONOFF: 0}},
+        )
+    )
+    return stream
+
+
+def profile_namespace_dispatch(capsys):
+    channels = 6
+    number = 10000
+    results = {}
+    for label, handler_class in (
+        ("try/except dispatch", _LegacyNamespaceHandler),
+        ("compiled dispatch", NamespaceHandler),
+    ):
+        stream = _build_stream(handler_class, channels)
+
+        def _dispatch():
+            for handler, header, payload in stream:
+                handler.handler(header, payload)
+
+        results[label] = min(timeit.repeat(_dispatch, number=number, repeat=5))
+
+    with capsys.disabled():
+        print(
+            f"NamespaceHandler dispatch (ToggleX/Electricity {channels} channels, {number} loops):"
+        )
+        for label, duration in results.items():
+            print(f"{label}: {duration * 1e6 / number:.2f} us/stream")
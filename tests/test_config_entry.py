@@ -9,6 +9,7 @@ from pytest_homeassistant_custom_component.test_util.aiohttp import AiohttpClien
 
 from custom_components.meross_lan import MerossApi, const as mlc
 from custom_components.meross_lan.light import MLDNDLightEntity
+from custom_components.meross_lan.meross_device import MerossDevice
 from custom_components.meross_lan.merossclient import const as mc, namespaces as mn
 from emulator import generate_emulators
 
@@ -100,6 +101,23 @@ async def test_device_entry(hass: HomeAssistant, aioclient_mock: AiohttpClientMo
                 assert state and state.state.isdigit()
 
 
+async def test_device_init_plan(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+):
+    """Devices sharing the same abilities/digest replay the same (cached) init plan"""
+    async with helpers.DeviceContext(hass, mc.TYPE_MSS310, aioclient_mock) as context:
+        assert await context.async_setup()
+        device = context.device
+        descriptor = device.descriptor
+        init_plan = MerossDevice.INIT_PLANS[MerossDevice.get_init_plan_key(descriptor)]
+        assert init_plan.device_class is type(device)
+        for namespace, ns_init_func in init_plan.namespace_inits:
+            assert namespace in descriptor.ability
+            assert callable(ns_init_func)
+        assert init_plan.digest_inits.keys() == descriptor.digest.keys()
+        assert await MerossDevice.async_get_init_plan(descriptor, device) is init_plan
+
+
 async def test_profile_entry(
     hass: HomeAssistant,
     cloudapi_mock: helpers.CloudApiMocker,
@@ -1,7 +1,31 @@
 """Test the .helpers module"""
 
-from custom_components.meross_lan.helpers import obfuscate
-from custom_components.meross_lan.merossclient import const as mc
+import logging
+import os
+from unittest import mock
+
+from custom_components.meross_lan import const as mlc
+from custom_components.meross_lan.helpers import (
+    _Logger,
+    discovery,
+    getLogger,
+    jsonlog,
+    manager,
+    metrics,
+    obfuscate,
+    scheduler,
+    tracing,
+)
+from custom_components.meross_lan.merossclient import (
+    MerossLazyResponse,
+    MerossRequest,
+    const as mc,
+    json_dumps,
+    json_loads,
+    namespaces as mn,
+)
+
+from . import helpers
 
 
 def test_obfuscated_key():
@@ -27,3 +51,368 @@ def test_obfuscated_key():
             assert (
                 obfuscate.obfuscated_dict({key: src})[key] == result
             ), f"{key}: {src}"
+
+
+def test_obfuscated_payload():
+    """
+    Verify the copy on write obfuscation shares whatever doesn't need obfuscation
+    """
+    togglex = [
+        {mc.KEY_CHANNEL: 0, mc.KEY_ONOFF: 1},
+        {mc.KEY_CHANNEL: 1, mc.KEY_ONOFF: 0},
+    ]
+    payload = {mc.KEY_TOGGLEX: togglex}
+    assert obfuscate.obfuscated_payload(payload) is payload
+    obfuscated = obfuscate.obfuscated_dict(payload)
+    assert obfuscated == payload and obfuscated is not payload
+    assert obfuscated[mc.KEY_TOGGLEX] is togglex
+
+    uuid = "eb40234d5ec8db162c08447c0dc7d772"
+    hardware = {mc.KEY_UUID: uuid, mc.KEY_TYPE: "mss310"}
+    payload = {
+        mc.KEY_ALL: {mc.KEY_SYSTEM: {mc.KEY_HARDWARE: hardware}},
+        "list": togglex,
+    }
+    obfuscated = obfuscate.obfuscated_payload(payload)
+    obfuscated_hardware = obfuscated[mc.KEY_ALL][mc.KEY_SYSTEM][mc.KEY_HARDWARE]
+    assert obfuscated_hardware[mc.KEY_UUID] != uuid
+    assert obfuscated_hardware[mc.KEY_TYPE] == "mss310"
+    assert hardware[mc.KEY_UUID] == uuid  # the source is never modified
+    assert obfuscated["list"] is togglex
+    # obfuscation is stable (and the 'from' rule result cached)
+    header = {mc.KEY_FROM: f"/appliance/{uuid}/publish"}
+    assert obfuscate.obfuscated_payload(header) == obfuscate.obfuscated_dict(header)
+    assert obfuscated_hardware[mc.KEY_UUID] in obfuscate.obfuscated_payload(header)[
+        mc.KEY_FROM
+    ]
+
+
+def test_logging(tmp_path, monkeypatch):
+    # the timeouts cache is a bounded LRU
+    monkeypatch.setattr(_Logger, "LOGGER_TIMEOUTS_SIZE", 4)
+    monkeypatch.setattr(_Logger, "_LOGGER_TIMEOUTS", type(_Logger._LOGGER_TIMEOUTS)())
+    logger = getLogger(f"{mlc.DOMAIN}.test_logging")
+    logger.warning("bounded %s", 0, timeout=60)
+    for i in range(10):
+        logger.warning("bounded %s", i, timeout=60)
+    assert len(_Logger._LOGGER_TIMEOUTS) == 4
+    assert ("bounded %s", (0,)) not in _Logger._LOGGER_TIMEOUTS
+
+    # lazy message rendering
+    message = MerossRequest("key", *mn.Appliance_System_All.request_default)
+    message_dump = manager.MessageDump(message, True)
+    assert message_dump._dump is None
+    assert json_loads(str(message_dump)) == message
+    assert str(message_dump) is message_dump._dump
+    # lazy payloads are decoded upfront (not in the logging thread)
+    response = MerossLazyResponse(message.json())
+    assert not response.is_loaded
+    message_dump = manager.MessageDump(response, True)
+    assert response.is_loaded
+    assert json_loads(str(message_dump)) == message
+    assert manager.MessageDump(message, False)._dump == message.json()
+
+    # json lines sink
+    path = str(tmp_path / "logs" / "test.jsonl")
+    logger.setLevel(logging.DEBUG)
+    jsonlog.JsonLinesSink.attach(logger, path, 65536, 1)
+    logger.debug(
+        "message %s",
+        message_dump,
+        extra={jsonlog.JsonLinesFormatter.FIELDS: {"namespace": "test"}},
+    )
+    jsonlog.JsonLinesSink.detach(logger)
+    assert not jsonlog.JsonLinesSink.instance
+    logger.setLevel(logging.NOTSET)
+    with open(path, encoding="utf8") as f:
+        records = [json_loads(line) for line in f]
+    assert len(records) == 1
+    record = records[0]
+    assert record["level"] == "DEBUG"
+    assert record["logger"] == logger.name
+    assert record["message"] == f"message {message_dump}"
+    assert record["namespace"] == "test"
+
+
+async def test_log_sampling(hass, aioclient_mock):
+    """
+    Verify the message logs are sampled 1 every 'log_sampling' per namespace
+    """
+    async with helpers.DeviceContext(
+        hass,
+        mc.TYPE_MSS310,
+        aioclient_mock,
+        config_data={mlc.CONF_LOGGING_SAMPLING: 3},
+    ) as context:
+        assert await context.async_setup()
+        device = context.device
+        assert device.log_sampling == 3
+        samples = [
+            device.log_sampled(namespace)
+            for namespace in ("a", "b", "a", "a", "a", "b")
+        ]
+        assert samples == [True, True, False, False, True, False]
+
+
+def test_device_metrics():
+    """
+    Verify the transport metrics accounting
+    """
+    device_metrics = metrics.DeviceMetrics()
+    for latency in (0.01, 0.02, 0.2, 0.3, 12):
+        device_metrics.record_request(
+            mlc.CONF_PROTOCOL_MQTT, "Appliance.System.All", latency, 100
+        )
+    device_metrics.record_failure(mlc.CONF_PROTOCOL_MQTT, 100, True)
+    device_metrics.record_failure(mlc.CONF_PROTOCOL_MQTT, 100, False)
+    device_metrics.record_bytes_in(mlc.CONF_PROTOCOL_MQTT, 500)
+    device_metrics.record_multiple(4, 1500, 3000)
+
+    mqtt_metrics = device_metrics.protocols[mlc.CONF_PROTOCOL_MQTT]
+    assert mqtt_metrics.requests == 7
+    assert mqtt_metrics.timeouts == 1
+    assert mqtt_metrics.errors == 1
+    assert mqtt_metrics.bytes_out == 700
+    assert mqtt_metrics.bytes_in == 500
+    latency = mqtt_metrics.latency
+    assert latency.count == 5
+    assert latency.max == 12
+    assert latency.percentile(40) == 0.025
+    assert latency.percentile(60) == 0.25
+    assert latency.percentile(99) == 12
+    metrics_dict = device_metrics.as_dict()
+    namespace_metrics = metrics_dict["namespaces"]["Appliance.System.All"]
+    assert namespace_metrics[mlc.CONF_PROTOCOL_MQTT]["count"] == 5
+    assert metrics_dict["multiple"]["requests_per_message"] == 4
+    assert metrics_dict["multiple"]["fill_ratio"] == 0.5
+
+
+def test_discovery_cache():
+    hosts = discovery.BulkDiscovery.expand_hosts(
+        ["10.0.0.1", " 10.0.1.0/30 ", "", "10.0.0.1"]
+    )
+    assert hosts == ["10.0.0.1", "10.0.1.1", "10.0.1.2"]
+    try:
+        discovery.BulkDiscovery.expand_hosts(["10.0.0.0/16"])
+        assert False, "subnet too large"
+    except ValueError:
+        pass
+
+    cache = discovery.DiscoveryCache()
+    device_config: mlc.DeviceConfigType = {
+        mlc.CONF_DEVICE_ID: "uuid",
+        mlc.CONF_HOST: "10.0.0.1",
+        mlc.CONF_KEY: "key",
+        mlc.CONF_PAYLOAD: {},  # type: ignore
+    }
+    cache.set(device_config)
+    assert cache.get("uuid", "key") == device_config
+    assert cache.get("uuid", "wrong") is None
+    assert cache.get_by_host("10.0.0.1", "key") == device_config
+    # the device moved to another host
+    cache.set(device_config | {mlc.CONF_HOST: "10.0.0.2"})  # type: ignore
+    assert cache.get_by_host("10.0.0.1", "key") is None
+    assert cache.get_by_host("10.0.0.2", "key")
+    assert len(cache) == 1
+    cache.pop("uuid")
+    assert cache.get_by_host("10.0.0.2", "key") is None
+
+    # expired (or oldest when full) entries are evicted when adding new ones
+    def _device_config(index: int) -> mlc.DeviceConfigType:
+        return device_config | {
+            mlc.CONF_DEVICE_ID: f"uuid{index}",
+            mlc.CONF_HOST: f"10.0.0.{index}",
+        }  # type: ignore
+
+    with mock.patch.object(discovery.DiscoveryCache, "SIZE", 3):
+        epoch = discovery.time()
+        with mock.patch.object(discovery, "time", return_value=epoch):
+            for index in range(5):
+                cache.set(_device_config(index))
+        assert len(cache) == 3
+        assert cache.get_by_host("10.0.0.1", "key") is None
+        assert cache.get_by_host("10.0.0.4", "key")
+        with mock.patch.object(
+            discovery, "time", return_value=epoch + cache.TIMEOUT + 1
+        ):
+            cache.set(_device_config(5))
+        assert len(cache) == 1
+        assert not cache._hosts.keys() - {"10.0.0.5"}
+
+
+async def test_namespace_push_dedup(hass, aioclient_mock):
+    """
+    Verify the per channel PUSH deduplication in NamespaceHandler
+    """
+    async with helpers.DeviceContext(
+        hass, mc.TYPE_MSS310, aioclient_mock, config_data={mlc.CONF_PUSH_DEDUP: True}
+    ) as context:
+        device = await context.perform_coldstart()
+        handler = device.namespace_handlers[mn.Appliance_Control_ToggleX.name]
+        handler.push_lastvalues.clear()
+        push_dedup_skipped = device.metrics.push_dedup_skipped
+        togglex_0 = {mc.KEY_CHANNEL: 0, mc.KEY_ONOFF: 1}
+        togglex_1 = {mc.KEY_CHANNEL: 1, mc.KEY_ONOFF: 0}
+        payload = {mc.KEY_TOGGLEX: [togglex_0, togglex_1]}
+        assert handler.push_dedup(payload) is payload
+        assert handler.push_dedup({mc.KEY_TOGGLEX: [dict(togglex_0)]}) is None
+        assert handler.push_dedup({mc.KEY_TOGGLEX: dict(togglex_1)}) is None
+        assert device.metrics.push_dedup_skipped == push_dedup_skipped + 2
+        togglex_1_on = {mc.KEY_CHANNEL: 1, mc.KEY_ONOFF: 1}
+        assert handler.push_dedup({mc.KEY_TOGGLEX: [togglex_0, togglex_1_on]}) == {
+            mc.KEY_TOGGLEX: [togglex_1_on]
+        }
+        assert device.metrics.push_dedup_skipped == push_dedup_skipped + 3
+        # the last values are forgotten across outages
+        device._set_offline()
+        assert not handler.push_lastvalues
+        payload = {mc.KEY_TOGGLEX: togglex_0}
+        assert handler.push_dedup(payload) is payload
+
+
+def test_trace_writer(tmp_path):
+    payload = {mc.KEY_TOGGLEX: {mc.KEY_CHANNEL: 0, mc.KEY_ONOFF: 1}}
+    records = [
+        [
+            1700000000.0 + index,
+            "RX",
+            mlc.CONF_PROTOCOL_HTTP,
+            mc.METHOD_GETACK,
+            mn.Appliance_Control_ToggleX.name,
+            payload,
+        ]
+        for index in range(100)
+    ]
+    records.append(
+        [1700000100.0, "", mlc.CONF_PROTOCOL_AUTO, tracing.METHOD_LOG, "DEBUG", "log"]
+    )
+
+    def _write(path_base: str, *args):
+        writer = tracing.TraceWriter(str(tmp_path / path_base), *args)
+        writer.open()
+        for epoch, rxtx, protocol, method, namespace, data in records:
+            if method != tracing.METHOD_LOG:
+                data = json_dumps(data)
+            if not writer.write(epoch, rxtx, protocol, method, namespace, data):
+                break
+        writer.close()
+        writer.join(5)
+        assert writer.stopped and not writer.error
+        return writer
+
+    for format, compression in (
+        (tracing.TraceFormat.NDJSON, tracing.TraceCompression.NONE),
+        (tracing.TraceFormat.BINARY, tracing.TraceCompression.GZIP),
+    ):
+        writer = _write(f"{format}_{compression}", format, compression)
+        assert writer.path and tracing.is_trace_file(writer.path)
+        assert list(tracing.read_records(writer.path)) == records
+        path_csv = tracing.convert_to_csv(writer.path)
+        with open(path_csv, encoding="utf8") as f:
+            lines = f.read().splitlines()
+        assert len(lines) == len(records)
+        assert lines[-1].split("\t")[-3:] == [tracing.METHOD_LOG, "DEBUG", "log"]
+
+    # rotation: keeps at most 'segments' files (the latest records)
+    writer = _write("rotation", tracing.TraceFormat.NDJSON, None, 2048, 3)
+    assert len(writer.paths) == 3
+    assert len(list(tmp_path.glob("rotation*"))) == 3
+    assert list(tracing.read_records(writer.path))[-1] == records[-1]
+    # no rotation: stops when the size limit is reached
+    writer = _write("maxsize", tracing.TraceFormat.CSV, None, 2048)
+    assert len(writer.paths) == 1
+    assert os.path.getsize(writer.path) <= 2048
+
+
+async def test_polling_scheduler(hass):
+    """
+    Verify the shared polling scheduler dispatches devices in due order
+    and skips the cancelled ones
+    """
+
+    with helpers.TimeMocker(hass) as time_mock:
+        polling_scheduler = scheduler.PollingScheduler(hass.loop)
+        device_1 = helpers.PollingDeviceStub(hass)
+        device_2 = helpers.PollingDeviceStub(hass)
+        device_3 = helpers.PollingDeviceStub(hass)
+        polling_scheduler.schedule(10, device_1, None)
+        polling_scheduler.schedule(5, device_2, "ns2")
+        polling_scheduler.schedule(7, device_3, None).cancel()
+        assert len(polling_scheduler) == 2
+
+        await time_mock.async_tick(6)
+        assert device_1.polls == []
+        assert device_2.polls == ["ns2"]
+        assert device_3.polls == []
+
+        await time_mock.async_tick(5)
+        assert device_1.polls == [None]
+        assert device_3.polls == []
+        assert len(polling_scheduler) == 0
+
+        polling_scheduler.schedule(5, device_1, None)
+        polling_scheduler.shutdown()
+        await time_mock.async_tick(10)
+        assert device_1.polls == [None]
+
+
+async def test_polling_scheduler_startup(hass):
+    """
+    Verify the staged startup releases the devices in order as soon as
+    a startup slot is available, skipping the cancelled ones
+    """
+    PollingScheduler = scheduler.PollingScheduler
+    with (
+        helpers.TimeMocker(hass) as time_mock,
+        mock.patch.object(PollingScheduler, "STARTUP_CONCURRENCY", 2),
+    ):
+        polling_scheduler = PollingScheduler(hass.loop)
+        device_1 = helpers.PollingDeviceStub(hass)
+        device_2 = helpers.PollingDeviceStub(hass)
+        device_3 = helpers.PollingDeviceStub(hass)
+        device_4 = helpers.PollingDeviceStub(hass)
+        device_5 = helpers.PollingDeviceStub(hass)
+        for device in (device_1, device_2, device_4):
+            device.polling_gate.clear()
+        # the first ones are released straight away
+        polling_scheduler.schedule_start(device_1)
+        polling_scheduler.schedule_start(device_2)
+        polling_scheduler.schedule_start(device_3).cancel()
+        polling_scheduler.schedule_start(device_4)
+        polling_scheduler.schedule_start(device_5)
+        assert polling_scheduler.startup_pending == 2
+        await time_mock.async_tick(0)
+        assert device_1.polls == [None]
+        assert device_2.polls == [None]
+        assert device_4.polls == []
+
+        # a completed first poll releases the next device (through the heap)
+        device_1.polling_gate.set()
+        await device_1.polling_task
+        await time_mock.async_tick(0)
+        assert device_3.polls == []
+        assert device_4.polls == [None]
+        assert device_5.polls == []
+        assert polling_scheduler.startup_pending == 1
+
+        # a stuck first poll releases its slot after STARTUP_TIMEOUT
+        await time_mock.async_tick(PollingScheduler.STARTUP_TIMEOUT)
+        await time_mock.async_tick(0)
+        assert device_5.polls == [None]
+        assert polling_scheduler.startup_pending == 0
+        assert len(polling_scheduler) == 0
+
+        device_1.polling_gate.clear()
+        polling_scheduler.schedule_start(device_1)
+        polling_scheduler.schedule_start(device_5)
+        polling_scheduler.schedule_start(device_3)
+        assert polling_scheduler.startup_pending == 1
+        await time_mock.async_tick(0)
+        assert device_1.polls == [None, None]
+        assert device_5.polls == [None, None]
+        polling_scheduler.shutdown()
+        assert polling_scheduler.startup_pending == 0
+        for device in (device_1, device_2, device_4):
+            device.polling_gate.set()
+        await time_mock.async_tick(PollingScheduler.STARTUP_TIMEOUT)
+        assert device_3.polls == []
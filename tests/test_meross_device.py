@@ -0,0 +1,221 @@
+"""Test MerossDevice request/transport management"""
+
+import asyncio
+from unittest import mock
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity import Entity
+from pytest_homeassistant_custom_component.test_util.aiohttp import AiohttpClientMocker
+
+from custom_components.meross_lan import const as mlc
+from custom_components.meross_lan.meross_device import MerossDevice
+from custom_components.meross_lan.merossclient import const as mc, namespaces as mn
+
+from tests import helpers
+
+
+async def test_request_singleflight(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+):
+    """
+    Identical GETs share the in-flight request: its response or error, while a
+    caller being cancelled doesn't affect the others
+    """
+    async with helpers.DeviceContext(hass, mc.TYPE_MSS310, aioclient_mock) as context:
+        assert await context.async_setup()
+        device = context.device
+        calls = []
+        gate = asyncio.Event()
+
+        async def _async_request(namespace: str):
+            calls.append(namespace)
+            await gate.wait()
+            if namespace == "error":
+                raise Exception(namespace)
+            return {mc.KEY_PAYLOAD: namespace}
+
+        def _request(namespace: str):
+            return asyncio.create_task(
+                device._async_request_singleflight(
+                    (namespace,), _async_request, namespace
+                )
+            )
+
+        # sharing
+        requests = [_request("ns") for _ in range(3)]
+        await asyncio.sleep(0)
+        assert calls == ["ns"]
+        assert device.requests_collapsed == 2
+        # the 'owner' being cancelled doesn't cancel the shared request
+        requests[0].cancel()
+        await asyncio.sleep(0)
+        gate.set()
+        results = await asyncio.gather(*requests, return_exceptions=True)
+        assert requests[0].cancelled()
+        assert results[1:] == [{mc.KEY_PAYLOAD: "ns"}] * 2
+        assert not device._requests_inflight
+        # the request is done: a new one is issued
+        assert await _request("ns") == {mc.KEY_PAYLOAD: "ns"}
+        assert calls == ["ns", "ns"]
+
+        # error propagation
+        gate.clear()
+        requests = [_request("error") for _ in range(2)]
+        await asyncio.sleep(0)
+        gate.set()
+        results = await asyncio.gather(*requests, return_exceptions=True)
+        assert [str(result) for result in results] == ["error", "error"]
+        assert not device._requests_inflight
+
+        # the request is cancelled when nobody waits for it anymore
+        gate.clear()
+        requests = [_request("cancel") for _ in range(2)]
+        await asyncio.sleep(0)
+        inflight = device._requests_inflight[("cancel",)]
+        for request in requests:
+            request.cancel()
+        await asyncio.gather(*requests, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert inflight.task.cancelled()
+        assert not device._requests_inflight
+        assert calls == ["ns", "ns", "error", "cancel"]
+
+
+async def test_multiple_requests_plan(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+):
+    """
+    Polls are packed in as few NS_MULTIPLE as possible (bounded by the
+    device limits) keeping their original order
+    """
+    async with helpers.DeviceContext(hass, mc.TYPE_MSS310, aioclient_mock) as context:
+        assert await context.async_setup()
+        device = context.device
+        device.device_response_size_max = 1000
+        device.multiple_max = 3
+        lazypoll_requests = device.lazypoll_requests
+        device.lazypoll_requests = []
+        requests = [
+            ((namespace, mc.METHOD_GET, {}), size)
+            for namespace, size in (
+                ("a", 400),
+                ("b", 300),
+                ("c", 500),
+                ("d", 100),
+                ("e", 200),
+            )
+        ]
+        plan = device._multiple_requests_plan(requests)
+        assert [
+            ([request[0] for request in multiple], size) for multiple, size in plan
+        ] == [(["a"], 700), (["b"], 600), (["c", "d"], 900), (["e"], 500)]
+        device.multiple_max = 1
+        plan = device._multiple_requests_plan(requests)
+        assert [multiple[0][0] for multiple, _ in plan] == ["a", "b", "c", "d", "e"]
+        device.lazypoll_requests = lazypoll_requests
+
+        # response size estimate: bigger responses are accounted at once
+        handler = device.namespace_handlers[mn.Appliance_System_All.name]
+        handler.polling_response_size = 1000
+        handler.polling_response_size_update(2000)
+        assert handler.polling_response_size == 2000
+        handler.polling_response_size_update(1000)
+        assert handler.polling_response_size == 1750
+
+
+async def test_response_size_max(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+):
+    """
+    The learned response size limit is persisted in the config entry together
+    with any other pending entry update
+    """
+    async with helpers.DeviceContext(hass, mc.TYPE_MSS310, aioclient_mock) as context:
+        device = await context.perform_coldstart()
+        productmodel = device.descriptor.productmodel
+        calls_count = len(aioclient_mock.mock_calls)
+        device.schedule_entry_update(True)
+        device._update_response_size_max(2000.5)
+        assert device.device_response_size_max == 2000
+        assert MerossDevice.RESPONSE_SIZE_MAX_MODELS[productmodel] == 2000
+        # the pending abilities query is not lost
+        assert device._entry_update_query_abilities
+        await context.async_tick(5)
+        await hass.async_block_till_done()
+        assert not device._entry_update_unsub
+        assert not device._entry_update_query_abilities
+        config_entry = hass.config_entries.async_get_entry(device.config_entry_id)
+        assert config_entry
+        assert config_entry.data[mlc.CONF_RESPONSE_SIZE_MAX] == 2000
+        assert any(
+            mn.Appliance_System_Ability.name in str(call[2])
+            for call in aioclient_mock.mock_calls[calls_count:]
+        )
+        MerossDevice.RESPONSE_SIZE_MAX_MODELS.pop(productmodel)
+
+
+async def test_entities_batch(hass: HomeAssistant, aioclient_mock: AiohttpClientMocker):
+    """
+    Entities state updates inside a (possibly nested) batch are written once
+    at the end, including the ones of the hub subdevices
+    """
+    async with helpers.DeviceContext(hass, mc.TYPE_MSH300, aioclient_mock) as context:
+        device = await context.perform_coldstart()
+        assert device.subdevices
+        entities = [
+            entity
+            for manager in (device, *device.subdevices.values())
+            for entity in manager.entities.values()
+            if entity._hass_connected
+        ]
+        assert any(entity.manager is not device for entity in entities)
+
+        with mock.patch.object(
+            Entity, "async_write_ha_state", autospec=True
+        ) as write_mock:
+            entities_dirty = device.entities_batch_begin()
+            assert entities_dirty is not None
+            for subdevice in device.subdevices.values():
+                assert subdevice.entities_dirty is entities_dirty
+            # nested batch: the outer one will flush
+            assert device.entities_batch_begin() is None
+            for entity in entities:
+                entity.flush_state()
+                entity.flush_state()
+            write_mock.assert_not_called()
+            device.entities_batch_end(entities_dirty)
+            assert write_mock.call_count == len(entities)
+            assert {call.args[0] for call in write_mock.call_args_list} == set(entities)
+            assert device.entities_dirty is None
+            # no batch: written straight away
+            write_mock.reset_mock()
+            entities[0].flush_state()
+            assert write_mock.call_count == 1
+
+
+async def test_metrics_sensor(hass: HomeAssistant, aioclient_mock: AiohttpClientMocker):
+    """
+    The transport metrics sensor exposes all of its latencies in ms
+    """
+    async with helpers.DeviceContext(
+        hass,
+        mc.TYPE_MSS310,
+        aioclient_mock,
+        config_data={mlc.CONF_CREATE_DIAGNOSTIC_ENTITIES: True},
+    ) as context:
+        device = await context.perform_coldstart()
+        sensor_metrics = next(
+            sensor
+            for sensor in device.sensors_metrics
+            if sensor.protocol is mlc.CONF_PROTOCOL_HTTP
+        )
+        device.metrics.protocols.pop(mlc.CONF_PROTOCOL_HTTP, None)
+        for latency in (0.2, 0.4):
+            device.metrics.record_request(
+                mlc.CONF_PROTOCOL_HTTP, mn.Appliance_System_All.name, latency, 100
+            )
+        sensor_metrics.update_metrics()
+        assert sensor_metrics.native_value == 300
+        attrs = sensor_metrics.extra_state_attributes
+        assert attrs[sensor_metrics.ATTR_LATENCY_P90] == 400
+        assert attrs[sensor_metrics.ATTR_LATENCY_MAX] == 400
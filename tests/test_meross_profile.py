@@ -1,5 +1,6 @@
 """Test for meross cloud profiles"""
 
+import asyncio
 from unittest import mock
 
 from homeassistant.core import HomeAssistant
@@ -7,8 +8,19 @@ from homeassistant.helpers import device_registry
 from pytest_homeassistant_custom_component.common import flush_store
 
 from custom_components.meross_lan import MerossApi, const as mlc
-from custom_components.meross_lan.meross_profile import MerossCloudProfile
-from custom_components.meross_lan.merossclient import HostAddress, cloudapi, const as mc
+from custom_components.meross_lan.meross_profile import (
+    MerossCloudProfile,
+    _MQTTTransaction,
+)
+from custom_components.meross_lan.merossclient import (
+    HostAddress,
+    MerossRequest,
+    build_message,
+    cloudapi,
+    const as mc,
+    json_dumps,
+    namespaces as mn,
+)
 
 from . import const as tc, helpers
 
@@ -249,3 +261,269 @@ async def test_meross_profile_with_device(
         assert device._profile is None
         assert device._mqtt_connection is None
         assert device._mqtt_connected is None
+
+
+async def test_meross_profile_mqtt_pool_push(
+    hass: HomeAssistant,
+    hass_storage,
+    aioclient_mock,
+    cloudapi_mock: helpers.CloudApiMocker,
+    merossmqtt_mock: helpers.MerossMQTTMocker,
+):
+    """
+    Verify the account PUSHes (only subscribed by the primary connection of
+    the pool) are processed even when the device connection is down.
+    """
+    hass_storage.update(tc.MOCK_PROFILE_STORAGE)
+
+    async with (
+        helpers.DeviceContext(
+            hass,
+            helpers.build_emulator_for_profile(
+                tc.MOCK_PROFILE_CONFIG, model=mc.TYPE_MSS310
+            ),
+            aioclient_mock,
+            config_data={
+                mlc.CONF_PROTOCOL: mlc.CONF_PROTOCOL_AUTO,
+            },
+        ) as devicecontext,
+        helpers.ProfileEntryMocker(
+            hass,
+            data=tc.MOCK_PROFILE_CONFIG | {mlc.CONF_MQTT_POOL_SIZE: 2},
+            auto_setup=False,
+        ),
+    ):
+        assert await devicecontext.async_setup()
+        device = await devicecontext.perform_coldstart()
+        profile = device._profile
+        assert isinstance(profile, MerossCloudProfile)
+        assert (mqttconnection := device._mqtt_connection)
+        primary = profile._get_mqttconnection(mqttconnection.broker)
+        secondary = profile._get_mqttconnection(mqttconnection.broker, 1)
+        if mqttconnection is not secondary:
+            secondary.attach(device)
+        if secondary.mqtt_is_connected:
+            secondary._mqtt_disconnected()
+        assert device._mqtt_connection is secondary
+        assert not device._mqtt_connected
+        assert not device._mqtt_active
+
+        togglex = device.entities[0]
+        onoff = 0 if togglex.is_on else 1
+        message = build_message(
+            mn.Appliance_Control_ToggleX.name,
+            mc.METHOD_PUSH,
+            {mc.KEY_TOGGLEX: [{mc.KEY_CHANNEL: 0, mc.KEY_ONOFF: onoff}]},
+            device.key,
+            mc.TOPIC_RESPONSE.format(device.id),
+        )
+        await primary.async_mqtt_message(
+            mock.Mock(topic=primary.topic_push, payload=json_dumps(message))
+        )
+        assert togglex.is_on == onoff
+        assert device._mqtt_active is primary
+        # the device is not requested through the (disconnected) secondary
+        assert device.curr_protocol is mlc.CONF_PROTOCOL_HTTP
+
+
+async def test_meross_profile_mqtt_pool(
+    hass: HomeAssistant,
+    hass_storage,
+    aioclient_mock,
+    cloudapi_mock: helpers.CloudApiMocker,
+    merossmqtt_mock: helpers.MerossMQTTMocker,
+    time_mock: helpers.TimeMocker,
+):
+    """
+    Verify devices are consistently spread over the pool of MQTT connections
+    and moved away from a stalled one.
+    """
+    pool_size = 3
+    hass_storage.update(tc.MOCK_PROFILE_STORAGE)
+    async with helpers.ProfileEntryMocker(
+        hass, data=tc.MOCK_PROFILE_CONFIG | {mlc.CONF_MQTT_POOL_SIZE: pool_size}
+    ):
+        assert (profile := MerossApi.profiles.get(tc.MOCK_PROFILE_ID))
+        assert isinstance(profile, MerossCloudProfile)
+        broker = HostAddress.build(tc.MOCK_PROFILE_MSS310_DOMAIN)
+        device_ids = [f"{index:032x}" for index in range(100, 130)]
+        pool_map = {
+            device_id: profile._get_pool_mqttconnection(broker, device_id)
+            for device_id in device_ids
+        }
+        pool = set(pool_map.values())
+        assert len(pool) == pool_size
+        assert len({mqttconnection.app_id for mqttconnection in pool}) == pool_size
+        for mqttconnection in pool:
+            # only the primary connection receives the account PUSHes
+            assert (
+                (mqttconnection.topic_push, 1) in mqttconnection._subscribe_topics
+            ) == (mqttconnection.pool_index == 0)
+        # consistent mapping
+        for device_id, mqttconnection in pool_map.items():
+            assert profile._get_pool_mqttconnection(broker, device_id) is mqttconnection
+
+        stalled = profile._get_mqttconnection(broker, 1)
+        stalled._stateext = stalled.STATE_CONNECTED
+        stalled._mqtt_is_connected = True
+        transactions = stalled._mqtt_transactions
+        # the mocker short-circuits async_mqtt_publish: we need the real one here
+        merossmqtt_mock.async_mqtt_publish_patcher.stop()
+        # requests are published but never replied
+        with mock.patch.object(stalled, "_async_mqtt_publish", mock.AsyncMock()):
+            # background (untracked) so that async_block_till_done doesn't wait them
+            for device_id in device_ids[: stalled.POOL_STALL_TIMEOUTS]:
+                hass.async_create_background_task(
+                    stalled.async_mqtt_publish(
+                        device_id,
+                        MerossRequest(
+                            tc.MOCK_KEY, *mn.Appliance_System_All.request_get
+                        ),
+                    ),
+                    "stalled_publish",
+                )
+            await asyncio.sleep(0)
+            assert stalled.pool_healthy
+            for _ in range(transactions.SLOTS):
+                await time_mock.async_tick(transactions.TICK)
+        assert transactions.timeouts_consecutive == stalled.POOL_STALL_TIMEOUTS
+        assert not transactions
+        assert not stalled.pool_healthy
+        for device_id, mqttconnection in pool_map.items():
+            remapped = profile._get_pool_mqttconnection(broker, device_id)
+            if mqttconnection is stalled:
+                assert remapped is not stalled
+            else:
+                assert remapped is mqttconnection
+
+
+async def test_mqtt_publish_cancel(
+    hass: HomeAssistant,
+    hass_storage,
+    aioclient_mock,
+    cloudapi_mock: helpers.CloudApiMocker,
+    merossmqtt_mock: helpers.MerossMQTTMocker,
+    time_mock: helpers.TimeMocker,
+):
+    """
+    Verify a publish cancelled while waiting the rate limiter doesn't leak
+    its transaction.
+    """
+    hass_storage.update(tc.MOCK_PROFILE_STORAGE)
+    async with helpers.ProfileEntryMocker(hass):
+        assert (profile := MerossApi.profiles.get(tc.MOCK_PROFILE_ID))
+        broker = HostAddress.build(tc.MOCK_PROFILE_MSS310_DOMAIN)
+        mqttconnection = profile._get_mqttconnection(broker, 1)
+        transactions = mqttconnection._mqtt_transactions
+        rl_acquired = asyncio.Event()
+        # the mocker short-circuits async_mqtt_publish: we need the real one here
+        merossmqtt_mock.async_mqtt_publish_patcher.stop()
+
+        async def _async_mqtt_publish(device_id, request):
+            await rl_acquired.wait()
+
+        with mock.patch.object(
+            mqttconnection, "_async_mqtt_publish", _async_mqtt_publish
+        ):
+            publish_task = hass.async_create_task(
+                mqttconnection.async_mqtt_publish(
+                    tc.MOCK_DEVICE_UUID,
+                    MerossRequest(tc.MOCK_KEY, *mn.Appliance_System_All.request_get),
+                )
+            )
+            await asyncio.sleep(0)
+            assert len(transactions) == 1
+            publish_task.cancel()
+            await asyncio.gather(publish_task, return_exceptions=True)
+            assert publish_task.cancelled()
+            assert len(transactions) == 0
+            assert not transactions.device_transactions
+
+
+async def test_mqtt_transactions(
+    hass: HomeAssistant,
+    hass_storage,
+    aioclient_mock,
+    cloudapi_mock: helpers.CloudApiMocker,
+    merossmqtt_mock: helpers.MerossMQTTMocker,
+    time_mock: helpers.TimeMocker,
+):
+    """
+    Verify the MQTT transactions timing wheel expiring and cancelling
+    """
+    hass_storage.update(tc.MOCK_PROFILE_STORAGE)
+    async with helpers.ProfileEntryMocker(hass):
+        assert (profile := MerossApi.profiles.get(tc.MOCK_PROFILE_ID))
+        broker = HostAddress.build(tc.MOCK_PROFILE_MSS310_DOMAIN)
+        mqtt_connection = profile._get_mqttconnection(broker, 1)
+
+        def _build_transaction(device_id: str):
+            return _MQTTTransaction(
+                mqtt_connection,
+                device_id,
+                MerossRequest(tc.MOCK_KEY, *mn.Appliance_System_All.request_get),
+            )
+
+        transactions = mqtt_connection._mqtt_transactions
+        transaction_1 = _build_transaction("1")
+        transaction_2 = _build_transaction("2")
+        transaction_3 = _build_transaction("2")
+        assert len(transactions) == 3
+
+        await time_mock.async_tick(1)
+        transactions.resolve(
+            transaction_1.messageid, transaction_1.namespace, {}  # type: ignore
+        )
+        assert transaction_1.response_future.result() == {}
+        assert transactions.latency.count == 1
+        transactions.cancel_device("1")  # nothing pending
+        assert len(transactions) == 2
+
+        transactions.cancel_device("2")
+        assert transaction_2.response_future.cancelled()
+        assert transaction_3.response_future.cancelled()
+        assert len(transactions) == 0
+        assert not transactions.device_transactions
+
+        transaction_4 = _build_transaction("1")
+        # the timeout only starts once the request is published
+        await time_mock.async_tick(mqtt_connection.DEFAULT_RESPONSE_TIMEOUT * 2)
+        assert not transaction_4.response_future.done()
+        transactions.arm(transaction_4, mqtt_connection.DEFAULT_RESPONSE_TIMEOUT)
+        for _ in range(10):
+            await time_mock.async_tick(transactions.TICK)
+        assert not transaction_4.response_future.done()
+        for _ in range(2):
+            await time_mock.async_tick(transactions.TICK)
+        assert isinstance(
+            transaction_4.response_future.exception(), asyncio.TimeoutError
+        )
+        assert transactions.timeouts == 1
+        assert len(transactions) == 0
+        assert not transactions._timer
+
+        # many transactions expiring in the same slot
+        transactions_5 = [_build_transaction(str(i)) for i in range(3)]
+        for transaction in transactions_5:
+            transactions.arm(transaction, mqtt_connection.DEFAULT_RESPONSE_TIMEOUT)
+        for _ in range(12):
+            await time_mock.async_tick(transactions.TICK)
+        for transaction in transactions_5:
+            assert isinstance(
+                transaction.response_future.exception(), asyncio.TimeoutError
+            )
+        assert transactions.timeouts == 4
+        assert transactions.timeouts_consecutive == 4
+        assert len(transactions) == 0
+        assert not transactions._timer
+        # the timer is re-armed for later transactions
+        transaction_6 = _build_transaction("1")
+        transactions.arm(transaction_6, mqtt_connection.DEFAULT_RESPONSE_TIMEOUT)
+        assert transactions._timer
+        for _ in range(12):
+            await time_mock.async_tick(transactions.TICK)
+        assert isinstance(
+            transaction_6.response_future.exception(), asyncio.TimeoutError
+        )
+        assert transactions.timeouts == 5
+        assert not transactions._timer
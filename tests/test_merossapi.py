@@ -1,9 +1,15 @@
 """Test the core MerossApi class"""
 
+from datetime import timedelta
 from time import time
 
+from homeassistant import config_entries
 from homeassistant.core import HomeAssistant
-from pytest_homeassistant_custom_component.common import async_fire_mqtt_message
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    async_fire_mqtt_message,
+    async_fire_time_changed,
+)
 
 from custom_components.meross_lan import MerossApi, const as mlc
 from custom_components.meross_lan.merossclient import (
@@ -120,3 +126,42 @@ async def test_hamqtt_device_session(
             topic_subscribe,
             helpers.MessageMatcher(header=header_consumption_reply),
         )
+
+
+async def test_hamqtt_ignored_device(
+    hass: HomeAssistant, hamqtt_mock: helpers.HAMQTTMocker
+):
+    """
+    check the traffic from an ignored device is dropped (before decoding)
+    once the uuid lands in the MQTTConnection negative cache
+    """
+    device_id = tc.MOCK_DEVICE_UUID
+    await hass.config_entries.flow.async_init(
+        mlc.DOMAIN,
+        context={"source": config_entries.SOURCE_IGNORE},
+        data={"unique_id": device_id, "title": ""},
+    )
+    topic_publish = mc.TOPIC_RESPONSE.format(device_id)
+    message_push = build_message(
+        mn.Appliance_Control_ToggleX.name,
+        mc.METHOD_PUSH,
+        {mn.Appliance_Control_ToggleX.key: {mc.KEY_CHANNEL: 0, mc.KEY_ONOFF: 0}},
+        "",
+        topic_publish,
+    )
+    async_fire_mqtt_message(hass, topic_publish, json_dumps(message_push))
+    await hass.async_block_till_done()
+
+    mqtt_connection = MerossApi.get(hass).mqtt_connection
+    assert device_id in mqtt_connection.mqttignored
+    assert mqtt_connection.mqttfiltered == 0
+
+    # the payload is not even looked at now
+    async_fire_mqtt_message(hass, topic_publish, "not a json")
+    await hass.async_block_till_done()
+    assert mqtt_connection.mqttfiltered == 1
+    for flow in hass.config_entries.flow.async_progress_by_handler(mlc.DOMAIN):
+        assert flow.get("context", {}).get("unique_id") != device_id
+    # let the (mocked) HA MQTT client misc loop expire before teardown
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=2))
+    await hass.async_block_till_done()
@@ -1,10 +1,20 @@
 """Test the merossclient module (low level device/cloud api)"""
 
+import asyncio
+from unittest import mock
+
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from custom_components.meross_lan.merossclient import (
+    HostAddress,
+    MerossLazyResponse,
+    MerossRequest,
     cloudapi,
     const as mc,
+    httpclient,
+    json_dumps,
+    json_loads,
+    mqttclient,
     namespaces as mn,
 )
 
@@ -18,6 +28,255 @@ def test_merossclient_module():
     pass
 
 
+def test_merossclient_lazyresponse():
+    message = MerossRequest(
+        tc.MOCK_KEY,
+        mn.Appliance_Control_ToggleX.name,
+        mc.METHOD_PUSH,
+        {mc.KEY_TOGGLEX: [{mc.KEY_CHANNEL: 0, mc.KEY_ONOFF: 1, "x": "}"}]},
+    )
+    message_json = message.json()
+    for json_str in (
+        message_json,
+        message_json.encode("utf-8"),
+        message_json + "\n",
+        # non canonical layouts should be fully decoded
+        json_dumps(
+            {mc.KEY_PAYLOAD: message.payload, mc.KEY_HEADER: message[mc.KEY_HEADER]}
+        ),
+        json_dumps(dict(message, extra=1)),
+    ):
+        response = MerossLazyResponse(json_str)
+        assert response[mc.KEY_HEADER] == message[mc.KEY_HEADER]
+        assert response.get(mc.KEY_PAYLOAD) == message.payload
+        assert response.is_loaded
+        assert response.json_size() == len(json_str)
+
+    response = MerossLazyResponse(message_json)
+    assert not response.is_loaded
+    assert dict(response) == message
+    assert response.is_loaded
+
+    response = MerossLazyResponse(message_json.replace('"onoff":1', '"onoff":'))
+    assert response[mc.KEY_HEADER] == message[mc.KEY_HEADER]
+    try:
+        response[mc.KEY_PAYLOAD]
+        assert False, "malformed payload should raise on access"
+    except ValueError:
+        pass
+
+
+async def test_mqttclient_ingest(hass):
+    """
+    Verify the MQTT receive queue processing and overflow policy
+    """
+
+    class _MQTTClient(mqttclient.MerossMQTTAppClient):
+        INGEST_QUEUE_SIZE = 3
+        INGEST_BATCH_SIZE = 2
+
+        def __init__(self):
+            super().__init__(tc.MOCK_KEY, "0", loop=hass.loop)
+            self.messages = []
+            self.ingested = 0
+
+        def _mqtt_ingested(self):
+            self.ingested += 1
+
+        async def async_mqtt_message(self, msg):
+            self.messages.append(msg)
+
+    def _build_msg(uuid: str, namespace: str, method: str):
+        msg = mqttclient.mqtt.MQTTMessage(topic=b"/app/0/subscribe")
+        msg.payload = MerossRequest(
+            tc.MOCK_KEY, namespace, method, {}, f"/appliance/{uuid}/publish"
+        ).json()
+        return msg
+
+    client = _MQTTClient()
+    # push_1_toggle is superseded by push_1_toggle_2
+    push_1_toggle = _build_msg("1", mn.Appliance_Control_ToggleX.name, mc.METHOD_PUSH)
+    push_1_toggle_2 = _build_msg("1", mn.Appliance_Control_ToggleX.name, mc.METHOD_PUSH)
+    # push_2_toggle is the oldest PUSH when getack_2 overflows
+    push_2_toggle = _build_msg("2", mn.Appliance_Control_ToggleX.name, mc.METHOD_PUSH)
+    getack_1 = _build_msg("1", mn.Appliance_System_All.name, mc.METHOD_GETACK)
+    getack_2 = _build_msg("2", mn.Appliance_System_All.name, mc.METHOD_GETACK)
+    for msg in (push_1_toggle, push_2_toggle, getack_1, push_1_toggle_2, getack_2):
+        client._mqttc_message_loop(client, None, msg)
+    assert client.ingest_queue_depth == 3
+    assert client.ingest_dropped == 2
+
+    while client._ingest_scheduled:
+        await asyncio.sleep(0)
+    assert client.messages == [getack_1, push_1_toggle_2, getack_2]
+    assert client.ingested == 2
+    assert client.ingest_queue_depth == 0
+
+    # the consumer restarts on new messages
+    client._mqttc_message_loop(client, None, push_2_toggle)
+    while client._ingest_scheduled:
+        await asyncio.sleep(0)
+    assert client.messages[-1] is push_2_toggle
+
+
+async def test_mqttclient_ratelimit(hass):
+    """
+    Verify the MQTT publish token bucket deferring (and superseding) GETs
+    """
+    client = mqttclient.MerossMQTTAppClient(tc.MOCK_KEY, "0", loop=hass.loop)
+    uuid = "1"
+
+    def _build_request(ns: mn.Namespace, method: str = mc.METHOD_GET):
+        return MerossRequest(tc.MOCK_KEY, ns.name, method, {})
+
+    for _ in range(mqttclient._MQTTRateLimiter.MAXQUEUE):
+        assert not await client.async_rl_acquire(
+            uuid, _build_request(mn.Appliance_Control_ToggleX)
+        )
+    assert client.get_rl_safe_delay(uuid) > 0
+    # commands are never deferred
+    try:
+        await client.async_rl_acquire(
+            uuid, _build_request(mn.Appliance_Control_ToggleX, mc.METHOD_SET)
+        )
+        assert False, "SET should have been dropped"
+    except mqttclient.MerossMQTTRateLimitException:
+        pass
+
+    get_1 = asyncio.create_task(
+        client.async_rl_acquire(uuid, _build_request(mn.Appliance_System_All))
+    )
+    get_2 = asyncio.create_task(
+        client.async_rl_acquire(uuid, _build_request(mn.Appliance_Control_ToggleX))
+    )
+    await asyncio.sleep(0)
+    # supersedes get_1 keeping its place in the queue
+    get_1_new = asyncio.create_task(
+        client.async_rl_acquire(uuid, _build_request(mn.Appliance_System_All))
+    )
+    try:
+        await get_1
+        assert False, "get_1 should have been superseded"
+    except mqttclient.MerossMQTTRateLimitException:
+        pass
+    assert client.rl_deferred == 3
+    assert client.rl_dropped == 2
+
+    _rl2 = client._rl2_queues[uuid]
+    assert list(_rl2.deferred) == [
+        mn.Appliance_System_All.name,
+        mn.Appliance_Control_ToggleX.name,
+    ]
+    _rl2.deferred_timer.cancel()  # type: ignore
+    _rl2.tokens = 1  # only enough for the oldest
+    client._rl_release(_rl2)
+    await asyncio.sleep(0)
+    assert get_1_new.result() is True
+    assert not get_2.done()
+    assert _rl2.deferred_timer
+    await client.async_shutdown()
+    await asyncio.sleep(0)
+    assert isinstance(get_2.exception(), mqttclient.MerossMQTTRateLimitException)
+
+
+async def test_mqttclient_asyncio_transport(hass, socket_enabled):
+    """
+    Verify the asyncio transport (socket managed in the loop) connects,
+    subscribes, publishes and receives
+    """
+    topic = "/app/0-test/subscribe"
+
+    class _MQTTClient(mqttclient._MerossMQTTClient):
+        def __init__(self):
+            super().__init__(
+                "app:test", [(topic, 1)], loop=hass.loop, asyncio_transport=True
+            )
+            self.messages = asyncio.Queue()
+
+        async def async_mqtt_message(self, msg):
+            self.messages.put_nowait(msg)
+
+    broker = helpers.MQTTBrokerStandIn()
+    port = await broker.async_start()
+    client = _MQTTClient()
+    try:
+        assert client.asyncio_transport
+        await asyncio.wait_for(
+            await client.async_connect(HostAddress("127.0.0.1", port)), 5
+        )
+        assert client.stateext == client.STATE_CONNECTED
+        assert broker.subscriptions == {topic}
+
+        # publishing doesn't need an executor
+        request = MerossRequest(tc.MOCK_KEY, *mn.Appliance_System_All.request_get)
+        client.rl_publish(tc.MOCK_DEVICE_UUID, request)
+        assert await asyncio.wait_for(broker.published.get(), 5) == (
+            mc.TOPIC_REQUEST.format(tc.MOCK_DEVICE_UUID),
+            request.json().encode("utf-8"),
+        )
+
+        push = MerossRequest(
+            tc.MOCK_KEY,
+            mn.Appliance_Control_ToggleX.name,
+            mc.METHOD_PUSH,
+            {mc.KEY_TOGGLEX: [{mc.KEY_CHANNEL: 0, mc.KEY_ONOFF: 1}]},
+            mc.TOPIC_RESPONSE.format(tc.MOCK_DEVICE_UUID),
+        )
+        broker.publish(topic, push.json().encode("utf-8"))
+        msg = await asyncio.wait_for(client.messages.get(), 5)
+        assert msg.topic == topic
+        assert json_loads(msg.payload) == push
+    finally:
+        await client.async_shutdown()
+        await broker.async_stop()
+    assert client.state_inactive
+
+
+async def test_httpclient_queue(hass):
+    """
+    Verify the HTTP requests are serialized per host in priority order
+    """
+    MerossHttpClient = httpclient.MerossHttpClient
+    client = MerossHttpClient("1.2.3.4", session=async_get_clientsession(hass))
+    sent = []
+    gate = asyncio.Event()
+
+    async def _async_request_raw(_self, request: str):
+        sent.append(request)
+        await gate.wait()
+        return request
+
+    with mock.patch.object(MerossHttpClient, "_async_request_raw", _async_request_raw):
+        requests = {
+            "busy": MerossHttpClient.PRIORITY_DEFAULT,
+            "poll_1": MerossHttpClient.PRIORITY_LOW,
+            "set_1": MerossHttpClient.PRIORITY_HIGH,
+            "cancelled": MerossHttpClient.PRIORITY_HIGH,
+            "default": MerossHttpClient.PRIORITY_DEFAULT,
+            "poll_2": MerossHttpClient.PRIORITY_LOW,
+            "set_2": MerossHttpClient.PRIORITY_HIGH,
+        }
+        tasks = {}
+        for request, priority in requests.items():
+            tasks[request] = asyncio.create_task(
+                client.async_request_raw(request, priority)
+            )
+            await asyncio.sleep(0)
+        assert sent == ["busy"]
+        tasks["cancelled"].cancel()
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+    assert sent == ["busy", "set_1", "set_2", "default", "poll_1", "poll_2"]
+    for request in sent:
+        assert tasks[request].result() == request
+    assert tasks["cancelled"].cancelled()
+    assert client.stats_requests == 6
+    assert not client._queue_busy
+    assert not client._queue
+
+
 async def test_cloudapi(hass, cloudapi_mock: helpers.CloudApiMocker):
     cloudapiclient = cloudapi.CloudApiClient(session=async_get_clientsession(hass))
     credentials = await cloudapiclient.async_signin(
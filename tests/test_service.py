@@ -1,10 +1,12 @@
 """Test for meross_lan.request service calls"""
 
-from unittest.mock import ANY
+from unittest.mock import ANY, patch
 
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
 
-from custom_components.meross_lan import const as mlc
+from custom_components.meross_lan import MerossApi, const as mlc
+from custom_components.meross_lan.helpers.discovery import BulkDiscovery
 from custom_components.meross_lan.merossclient import (
     const as mc,
     json_dumps,
@@ -114,3 +116,59 @@ async def test_request_notification(
         # this call, should not be routed to mqtt since our device is
         # emulated in http
         hamqtt_mock.async_publish_mock.assert_not_called()
+
+
+async def test_discover(hass: HomeAssistant, aioclient_mock):
+    """
+    Test the bulk discovery service starts a (ready to finalize)
+    config flow for the identified device
+    """
+    # the services are registered by the MerossApi singleton
+    MerossApi.get(hass)
+    with helpers.EmulatorContext(mc.TYPE_MSS310, aioclient_mock) as emulator_context:
+        emulator = emulator_context.emulator
+        device_id = emulator.descriptor.uuid
+        response = await hass.services.async_call(
+            mlc.DOMAIN,
+            mlc.SERVICE_DISCOVER,
+            service_data={
+                mlc.CONF_HOST: emulator_context.host,
+                mlc.CONF_KEY: emulator.key,
+            },
+            blocking=True,
+            return_response=True,
+        )
+        assert response
+        assert response["devices"][device_id]["status"] == "discovered"  # type: ignore
+        for flow in hass.config_entries.flow.async_progress_by_handler(mlc.DOMAIN):
+            if flow.get("context", {}).get("unique_id") == device_id:
+                assert flow.get("step_id") == "finalize"
+                break
+        else:
+            assert False, "discovery didn't start the config flow"
+
+
+async def test_discover_mqtt_unavailable(hass: HomeAssistant):
+    """
+    Discovering uuids without the HA MQTT broker fails before any
+    host identification is started
+    """
+    MerossApi.get(hass)
+    with patch.object(
+        BulkDiscovery, "async_identify_host", autospec=True
+    ) as async_identify_host_mock:
+        try:
+            await hass.services.async_call(
+                mlc.DOMAIN,
+                mlc.SERVICE_DISCOVER,
+                service_data={
+                    mlc.CONF_HOST: "10.0.0.1",
+                    mlc.CONF_DEVICE_ID: tc.MOCK_DEVICE_UUID,
+                },
+                blocking=True,
+                return_response=True,
+            )
+            assert False, "discovery should fail without the HA MQTT broker"
+        except HomeAssistantError:
+            pass
+        async_identify_host_mock.assert_not_called()